@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from alembic import op
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
 
 # revision identifiers, used by Alembic.
 revision = "202403211200"
@@ -13,10 +14,15 @@ depends_on = None
 
 
 def upgrade() -> None:
-    slot_mode_enum = sa.Enum("onsite", "tele", name="slot_mode")
-    slot_status_enum = sa.Enum("open", "closed", name="slot_status")
-    appointment_status_enum = sa.Enum("booked", "cancelled", name="appointment_status")
-    appointment_mode_enum = sa.Enum("onsite", "tele", name="appointment_mode")
+    # create_type=False: the types are created once below, not again by create_table().
+    slot_mode_enum = postgresql.ENUM("onsite", "tele", name="slot_mode", create_type=False)
+    slot_status_enum = postgresql.ENUM("open", "closed", name="slot_status", create_type=False)
+    appointment_status_enum = postgresql.ENUM(
+        "booked", "cancelled", name="appointment_status", create_type=False
+    )
+    appointment_mode_enum = postgresql.ENUM(
+        "onsite", "tele", name="appointment_mode", create_type=False
+    )
 
     slot_mode_enum.create(op.get_bind(), checkfirst=True)
     slot_status_enum.create(op.get_bind(), checkfirst=True)
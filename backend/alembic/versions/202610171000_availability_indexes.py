@@ -0,0 +1,69 @@
+"""Composite and partial indexes for availability and booking queries."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202610171000"
+down_revision = "202410081100"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Availability listing: tenant + open + starts_at range, ordered by (starts_at, id) for the
+    # keyset pagination. The included columns let the scan skip the heap for the row path.
+    op.create_index(
+        "ix_slots_open_tenant_starts",
+        "slots",
+        ["tenant_id", "starts_at", "id"],
+        postgresql_include=["ends_at", "calendar_id", "mode", "status"],
+        postgresql_where=sa.text("status = 'open'"),
+    )
+    # Practitioner filter: the calendars of a practitioner within a tenant.
+    op.create_index(
+        "ix_calendars_tenant_practitioner",
+        "calendars",
+        ["tenant_id", "practitioner_id"],
+        postgresql_include=["id"],
+    )
+    # Booking: count of the booked appointments of a slot.
+    op.create_index(
+        "ix_appointments_slot_booked",
+        "appointments",
+        ["slot_id", "tenant_id"],
+        postgresql_include=["id"],
+        postgresql_where=sa.text("status = 'booked'"),
+    )
+    # Superseded by the partial indexes above; a status alone is not selective.
+    op.drop_index("ix_slots_status", table_name="slots")
+    op.drop_index("ix_appointments_status", table_name="appointments")
+
+    # Optional: no two slots of a calendar may overlap. Equality on calendar_id in a GiST
+    # index needs btree_gist, which is not available on every server.
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'btree_gist') THEN
+                CREATE EXTENSION IF NOT EXISTS btree_gist;
+                ALTER TABLE slots ADD CONSTRAINT ex_slots_calendar_no_overlap
+                    EXCLUDE USING gist (calendar_id WITH =, tstzrange(starts_at, ends_at) WITH &&);
+            ELSE
+                RAISE NOTICE 'btree_gist unavailable: ex_slots_calendar_no_overlap not created';
+            END IF;
+        END
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE slots DROP CONSTRAINT IF EXISTS ex_slots_calendar_no_overlap")
+    op.create_index("ix_appointments_status", "appointments", ["status"])
+    op.create_index("ix_slots_status", "slots", ["status"])
+    op.drop_index("ix_appointments_slot_booked", table_name="appointments")
+    op.drop_index("ix_calendars_tenant_practitioner", table_name="calendars")
+    op.drop_index("ix_slots_open_tenant_starts", table_name="slots")
@@ -0,0 +1,123 @@
+"""Daily rollup of open slots per practitioner and mode."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "202610171100"
+down_revision = "202610171000"
+branch_labels = None
+depends_on = None
+
+# Upsert of the (tenant, practitioner, mode, UTC day) deltas selected by each branch below.
+_MERGE = """
+        ON CONFLICT (tenant_id, practitioner_id, mode, day)
+        DO UPDATE SET open_slots = slot_daily_rollups.open_slots + EXCLUDED.open_slots
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "slot_daily_rollups",
+        sa.Column("tenant_id", sa.String(length=36), nullable=False),
+        sa.Column("practitioner_id", sa.String(length=36), nullable=False),
+        sa.Column(
+            "mode",
+            postgresql.ENUM("onsite", "tele", name="slot_mode", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("open_slots", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("tenant_id", "practitioner_id", "mode", "day"),
+    )
+    op.create_index("ix_slot_daily_rollups_tenant_day", "slot_daily_rollups", ["tenant_id", "day"])
+
+    op.execute("ALTER TABLE slot_daily_rollups ENABLE ROW LEVEL SECURITY")
+    op.execute("ALTER TABLE slot_daily_rollups FORCE ROW LEVEL SECURITY")
+    op.execute(
+        """
+        CREATE POLICY tenant_isolation ON slot_daily_rollups
+        USING (tenant_id = current_setting('app.tenant_id', true))
+        WITH CHECK (tenant_id = current_setting('app.tenant_id', true));
+        """
+    )
+
+    # Statement-level triggers with transition tables: a bulk insert of slots costs one
+    # upsert per (practitioner, mode, day) it touches, not one per slot.
+    op.execute(
+        f"""
+        CREATE FUNCTION slot_daily_rollups_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO slot_daily_rollups (tenant_id, practitioner_id, mode, day, open_slots)
+                SELECT s.tenant_id, c.practitioner_id, s.mode,
+                       (s.starts_at AT TIME ZONE 'UTC')::date, count(*)
+                FROM new_slots s JOIN calendars c ON c.id = s.calendar_id
+                WHERE s.status = 'open'
+                GROUP BY 1, 2, 3, 4
+                {_MERGE};
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO slot_daily_rollups (tenant_id, practitioner_id, mode, day, open_slots)
+                SELECT s.tenant_id, c.practitioner_id, s.mode,
+                       (s.starts_at AT TIME ZONE 'UTC')::date, -count(*)
+                FROM old_slots s JOIN calendars c ON c.id = s.calendar_id
+                WHERE s.status = 'open'
+                GROUP BY 1, 2, 3, 4
+                {_MERGE};
+            ELSE
+                INSERT INTO slot_daily_rollups (tenant_id, practitioner_id, mode, day, open_slots)
+                SELECT s.tenant_id, c.practitioner_id, s.mode,
+                       (s.starts_at AT TIME ZONE 'UTC')::date, sum(s.delta)
+                FROM (
+                    SELECT tenant_id, calendar_id, mode, starts_at, 1 AS delta
+                    FROM new_slots WHERE status = 'open'
+                    UNION ALL
+                    SELECT tenant_id, calendar_id, mode, starts_at, -1
+                    FROM old_slots WHERE status = 'open'
+                ) s JOIN calendars c ON c.id = s.calendar_id
+                GROUP BY 1, 2, 3, 4
+                HAVING sum(s.delta) <> 0
+                {_MERGE};
+            END IF;
+            RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    for event, tables in (
+        ("insert", "NEW TABLE AS new_slots"),
+        ("update", "OLD TABLE AS old_slots NEW TABLE AS new_slots"),
+        ("delete", "OLD TABLE AS old_slots"),
+    ):
+        op.execute(
+            f"""
+            CREATE TRIGGER slot_daily_rollups_{event} AFTER {event.upper()} ON slots
+            REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION slot_daily_rollups_apply()
+            """
+        )
+
+    # Backfill from the existing slots (the migration role must bypass RLS to see them all).
+    op.execute(
+        """
+        INSERT INTO slot_daily_rollups (tenant_id, practitioner_id, mode, day, open_slots)
+        SELECT s.tenant_id, c.practitioner_id, s.mode, (s.starts_at AT TIME ZONE 'UTC')::date,
+               count(*)
+        FROM slots s JOIN calendars c ON c.id = s.calendar_id
+        WHERE s.status = 'open'
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+def downgrade() -> None:
+    for event in ("delete", "update", "insert"):
+        op.execute(f"DROP TRIGGER IF EXISTS slot_daily_rollups_{event} ON slots")
+    op.execute("DROP FUNCTION IF EXISTS slot_daily_rollups_apply()")
+    op.execute("DROP POLICY IF EXISTS tenant_isolation ON slot_daily_rollups")
+    op.drop_index("ix_slot_daily_rollups_tenant_day", table_name="slot_daily_rollups")
+    op.drop_table("slot_daily_rollups")
@@ -0,0 +1,76 @@
+"""Weekly schedule templates of calendars; lighter slot indexes for bulk generation."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "202610171200"
+down_revision = "202610171100"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "schedule_templates",
+        sa.Column("id", sa.String(length=36), primary_key=True),
+        sa.Column("tenant_id", sa.String(length=36), nullable=False),
+        sa.Column(
+            "calendar_id",
+            sa.String(length=36),
+            sa.ForeignKey("calendars.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        # ISO days of the week, 1 (Monday) to 7 (Sunday).
+        sa.Column("weekdays", postgresql.ARRAY(sa.SmallInteger()), nullable=False),
+        sa.Column("start_time", sa.Time(), nullable=False),
+        sa.Column("end_time", sa.Time(), nullable=False),
+        sa.Column("slot_minutes", sa.Integer(), nullable=False),
+        sa.Column("capacity", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column(
+            "mode",
+            postgresql.ENUM("onsite", "tele", name="slot_mode", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("timezone", sa.String(length=64), nullable=False),
+        sa.Column("valid_from", sa.Date(), nullable=False),
+        sa.Column("valid_until", sa.Date(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.CheckConstraint("slot_minutes > 0", name="ck_schedule_templates_slot_minutes"),
+        sa.CheckConstraint("start_time < end_time", name="ck_schedule_templates_times"),
+        sa.CheckConstraint("capacity > 0", name="ck_schedule_templates_capacity"),
+    )
+    op.create_index(
+        "ix_schedule_templates_tenant_calendar", "schedule_templates", ["tenant_id", "calendar_id"]
+    )
+
+    op.execute("ALTER TABLE schedule_templates ENABLE ROW LEVEL SECURITY")
+    op.execute("ALTER TABLE schedule_templates FORCE ROW LEVEL SECURITY")
+    op.execute(
+        """
+        CREATE POLICY tenant_isolation ON schedule_templates
+        USING (tenant_id = current_setting('app.tenant_id', true))
+        WITH CHECK (tenant_id = current_setting('app.tenant_id', true));
+        """
+    )
+
+    # Every generated slot updates each index of slots. Reads by start go through
+    # ix_slots_open_tenant_starts or uq_slot_calendar_starts; ends_at is never a leading key.
+    op.drop_index("ix_slots_starts_at", table_name="slots")
+    op.drop_index("ix_slots_ends_at", table_name="slots")
+
+
+def downgrade() -> None:
+    op.create_index("ix_slots_ends_at", "slots", ["ends_at"])
+    op.create_index("ix_slots_starts_at", "slots", ["starts_at"])
+    op.execute("DROP POLICY IF EXISTS tenant_isolation ON schedule_templates")
+    op.drop_index("ix_schedule_templates_tenant_calendar", table_name="schedule_templates")
+    op.drop_table("schedule_templates")
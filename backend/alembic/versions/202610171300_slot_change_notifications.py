@@ -0,0 +1,118 @@
+"""NOTIFY slot_changes on every change of slots and schedule templates."""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610171300"
+down_revision = "202610171200"
+branch_labels = None
+depends_on = None
+
+# Changed slots sent in one notification (NOTIFY payloads stay under 8000 bytes);
+# beyond that, and for deletions, listeners reload the tenant.
+_MAX_SLOTS = 30
+
+
+def upgrade() -> None:
+    # One notification per tenant and statement, sent at commit. A payload carries the
+    # changed slots as [id, starts_at, ends_at, practitioner_id, mode, status], or
+    # "reload": true when listeners must read the tenant again.
+    op.execute(
+        f"""
+        CREATE FUNCTION slots_notify_changes() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            change record;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                FOR change IN SELECT DISTINCT tenant_id FROM old_slots LOOP
+                    PERFORM pg_notify(
+                        'slot_changes',
+                        json_build_object('tenant_id', change.tenant_id, 'reload', true)::text
+                    );
+                END LOOP;
+                RETURN NULL;
+            END IF;
+            FOR change IN
+                SELECT s.tenant_id, count(*) AS changed,
+                       json_agg(json_build_array(
+                           s.id, s.starts_at, s.ends_at,
+                           (SELECT c.practitioner_id FROM calendars c WHERE c.id = s.calendar_id),
+                           s.mode, s.status
+                       )) FILTER (WHERE s.position <= {_MAX_SLOTS}) AS slots
+                FROM (
+                    SELECT *, row_number() OVER (PARTITION BY tenant_id) AS position
+                    FROM new_slots
+                ) s
+                GROUP BY s.tenant_id
+            LOOP
+                PERFORM pg_notify(
+                    'slot_changes',
+                    CASE WHEN change.changed <= {_MAX_SLOTS}
+                        THEN json_build_object('tenant_id', change.tenant_id, 'slots', change.slots)
+                        ELSE json_build_object('tenant_id', change.tenant_id, 'reload', true)
+                    END::text
+                );
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    for event, tables in (
+        ("insert", "NEW TABLE AS new_slots"),
+        ("update", "NEW TABLE AS new_slots"),
+        ("delete", "OLD TABLE AS old_slots"),
+    ):
+        op.execute(
+            f"""
+            CREATE TRIGGER slots_notify_{event} AFTER {event.upper()} ON slots
+            REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION slots_notify_changes()
+            """
+        )
+
+    # With virtual slots, templates are availabilities too.
+    op.execute(
+        """
+        CREATE FUNCTION schedule_templates_notify_changes() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            change record;
+        BEGIN
+            FOR change IN SELECT DISTINCT tenant_id FROM changed_templates LOOP
+                PERFORM pg_notify(
+                    'slot_changes',
+                    json_build_object('tenant_id', change.tenant_id, 'reload', true)::text
+                );
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    for event, tables in (
+        ("insert", "NEW TABLE AS changed_templates"),
+        ("update", "NEW TABLE AS changed_templates"),
+        ("delete", "OLD TABLE AS changed_templates"),
+    ):
+        op.execute(
+            f"""
+            CREATE TRIGGER schedule_templates_notify_{event}
+            AFTER {event.upper()} ON schedule_templates
+            REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION schedule_templates_notify_changes()
+            """
+        )
+
+
+def downgrade() -> None:
+    for event in ("delete", "update", "insert"):
+        op.execute(
+            f"DROP TRIGGER IF EXISTS schedule_templates_notify_{event} ON schedule_templates"
+        )
+        op.execute(f"DROP TRIGGER IF EXISTS slots_notify_{event} ON slots")
+    op.execute("DROP FUNCTION IF EXISTS schedule_templates_notify_changes()")
+    op.execute("DROP FUNCTION IF EXISTS slots_notify_changes()")
@@ -0,0 +1,28 @@
+"""Partial index of the open slots of a calendar, for the next availabilities."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202610171400"
+down_revision = "202610171300"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Next availabilities: the first open slots of each calendar from an instant, read by
+    # a LIMIT per calendar that stops after a few index entries however far the slots go.
+    op.create_index(
+        "ix_slots_open_calendar_starts",
+        "slots",
+        ["calendar_id", "starts_at", "id"],
+        postgresql_include=["tenant_id", "ends_at", "mode", "status"],
+        postgresql_where=sa.text("status = 'open'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_slots_open_calendar_starts", table_name="slots")
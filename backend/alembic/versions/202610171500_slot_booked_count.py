@@ -0,0 +1,46 @@
+"""Count of the booked appointments of each slot."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202610171500"
+down_revision = "202610171400"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Booking reserves capacity with one conditional UPDATE of this counter instead of
+    # locking the slot and counting its appointments.
+    op.add_column(
+        "slots",
+        sa.Column("booked_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE slots SET booked_count = booked.appointments
+        FROM (
+            SELECT slot_id, count(*) AS appointments
+            FROM appointments
+            WHERE status = 'booked'
+            GROUP BY slot_id
+        ) booked
+        WHERE booked.slot_id = slots.id
+        """
+    )
+    # NOT VALID: slots booked beyond their capacity before this revision are left as they
+    # are; every booking from now on is checked.
+    op.execute(
+        """
+        ALTER TABLE slots ADD CONSTRAINT ck_slots_booked_count
+            CHECK (booked_count >= 0 AND booked_count <= capacity) NOT VALID
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_slots_booked_count", "slots", type_="check")
+    op.drop_column("slots", "booked_count")
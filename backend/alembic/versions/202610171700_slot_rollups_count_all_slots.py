@@ -0,0 +1,100 @@
+"""Slot rollups count every slot; closed slots are subtracted at read time."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202610171700"
+down_revision = "202610171600"
+branch_labels = None
+depends_on = None
+
+
+def _apply_function(column: str, status_filter: str) -> str:
+    """``slot_daily_rollups_apply()`` adding to ``column`` the slots matching
+    ``status_filter`` (a condition on ``status``, or ``TRUE``)."""
+    merge = f"""
+        ON CONFLICT (tenant_id, practitioner_id, mode, day)
+        DO UPDATE SET {column} = slot_daily_rollups.{column} + EXCLUDED.{column}
+    """
+    return f"""
+        CREATE OR REPLACE FUNCTION slot_daily_rollups_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO slot_daily_rollups (tenant_id, practitioner_id, mode, day, {column})
+                SELECT s.tenant_id, c.practitioner_id, s.mode,
+                       (s.starts_at AT TIME ZONE 'UTC')::date, count(*)
+                FROM new_slots s JOIN calendars c ON c.id = s.calendar_id
+                WHERE {status_filter}
+                GROUP BY 1, 2, 3, 4
+                {merge};
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO slot_daily_rollups (tenant_id, practitioner_id, mode, day, {column})
+                SELECT s.tenant_id, c.practitioner_id, s.mode,
+                       (s.starts_at AT TIME ZONE 'UTC')::date, -count(*)
+                FROM old_slots s JOIN calendars c ON c.id = s.calendar_id
+                WHERE {status_filter}
+                GROUP BY 1, 2, 3, 4
+                {merge};
+            ELSE
+                INSERT INTO slot_daily_rollups (tenant_id, practitioner_id, mode, day, {column})
+                SELECT s.tenant_id, c.practitioner_id, s.mode,
+                       (s.starts_at AT TIME ZONE 'UTC')::date, sum(s.delta)
+                FROM (
+                    SELECT tenant_id, calendar_id, mode, starts_at, 1 AS delta
+                    FROM new_slots WHERE {status_filter}
+                    UNION ALL
+                    SELECT tenant_id, calendar_id, mode, starts_at, -1
+                    FROM old_slots WHERE {status_filter}
+                ) s JOIN calendars c ON c.id = s.calendar_id
+                GROUP BY 1, 2, 3, 4
+                HAVING sum(s.delta) <> 0
+                {merge};
+            END IF;
+            RETURN NULL;
+        END;
+        $$;
+    """
+
+
+def _backfill(column: str, status_filter: str) -> None:
+    # The migration role must bypass RLS to see every tenant.
+    op.execute("TRUNCATE slot_daily_rollups")
+    op.execute(
+        f"""
+        INSERT INTO slot_daily_rollups (tenant_id, practitioner_id, mode, day, {column})
+        SELECT s.tenant_id, c.practitioner_id, s.mode, (s.starts_at AT TIME ZONE 'UTC')::date,
+               count(*)
+        FROM slots s JOIN calendars c ON c.id = s.calendar_id
+        WHERE {status_filter}
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+def upgrade() -> None:
+    # Counting open slots made every booking that closes a slot upsert the rollup row of its
+    # (practitioner, mode, day), and concurrent bookings queue on that row until commit.
+    # Counting all slots, a status change nets to zero and the trigger writes nothing.
+    op.alter_column("slot_daily_rollups", "open_slots", new_column_name="slot_count")
+    op.execute(_apply_function("slot_count", "TRUE"))
+    _backfill("slot_count", "TRUE")
+    # Availability summary: the slots that are not open in the window, subtracted from the
+    # rollups at read time.
+    op.create_index(
+        "ix_slots_not_open_tenant_starts",
+        "slots",
+        ["tenant_id", "starts_at"],
+        postgresql_include=["calendar_id", "mode"],
+        postgresql_where=sa.text("status <> 'open'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_slots_not_open_tenant_starts", table_name="slots")
+    op.alter_column("slot_daily_rollups", "slot_count", new_column_name="open_slots")
+    op.execute(_apply_function("open_slots", "status = 'open'"))
+    _backfill("open_slots", "status = 'open'")
@@ -0,0 +1,73 @@
+"""Compare the threadpool-per-subject authorization path with ``authorize_any``.
+
+Run from ``backend/``::
+
+    python benchmarks/bench_authorization.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))
+
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+
+from src.core import casbin_enforcer  # noqa: E402
+from src.core.casbin_enforcer import DecisionCache, VersionedEnforcer  # noqa: E402
+
+ITERATIONS = 5_000
+# A doctor who is also a secretary and clinic admin: the sub is never allowed
+# directly and the allowing role comes last, which is the worst case.
+SUBJECTS = ["7c1c9d3e-user", "secretary", "doctor", "clinic_admin"]
+REQUEST = ("tenant-1", "/commands/onboarding/pro-invitations", "POST")
+
+
+async def threadpool_path(enforcer: VersionedEnforcer) -> bool:
+    """Previous implementation: one threadpool round trip per subject."""
+    for subject in SUBJECTS:
+        if await run_in_threadpool(enforcer.enforce, subject, *REQUEST):
+            return True
+    return False
+
+
+async def in_loop_path(_enforcer: VersionedEnforcer) -> bool:
+    return await casbin_enforcer.authorize_any(SUBJECTS, *REQUEST)
+
+
+async def measure(label: str, check, enforcer: VersionedEnforcer) -> None:
+    assert await check(enforcer)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await check(enforcer)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed / ITERATIONS * 1e6:8.1f} µs/check")
+
+
+async def main() -> None:
+    enforcer = VersionedEnforcer(
+        str(BACKEND_DIR / "casbin" / "model.conf"),
+        str(BACKEND_DIR / "casbin" / "seed_policy.csv"),
+        enable_log=False,
+    )
+    casbin_enforcer._enforcer = enforcer
+
+    await measure("threadpool, one hop per subject", threadpool_path, enforcer)
+
+    casbin_enforcer._decisions = DecisionCache(maxsize=0)
+    enforcer.use_compiled_matcher = False
+    await measure("authorize_any, generic evaluator", in_loop_path, enforcer)
+
+    enforcer.use_compiled_matcher = True
+    await measure("authorize_any, compiled matcher", in_loop_path, enforcer)
+
+    casbin_enforcer._decisions = DecisionCache(maxsize=10_000)
+    await measure("authorize_any, decision cache", in_loop_path, enforcer)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""Per-row CPU cost of the availability read path: ORM + DTO vs rows straight to JSON.
+
+Both paths run the repository's statements against an in-memory SQLite
+database, so the numbers cover result processing and encoding, not the network.
+
+Run from ``backend/``::
+
+    python benchmarks/bench_availability_json.py
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus  # noqa: E402
+from src.features.scheduling.infra import mappers  # noqa: E402
+from src.features.scheduling.infra.models import CalendarDB, SlotDB  # noqa: E402
+from src.features.scheduling.infra.repositories import SchedulingRepository  # noqa: E402
+from src.features.scheduling.interfaces.dto import (  # noqa: E402
+    AvailabilityDTO,
+    availability_rows_json,
+)
+
+ROWS = 2_000
+ITERATIONS = 20
+TENANT = "tenant-1"
+DAY = datetime(2025, 3, 3, 8, tzinfo=timezone.utc)
+WINDOW = (TENANT, DAY, DAY + timedelta(days=30), None, None)
+DTO_LIST = TypeAdapter(list[AvailabilityDTO])
+
+
+def seed(session: Session) -> None:
+    calendars = [
+        CalendarDB(id=f"cal-{index}", tenant_id=TENANT, practitioner_id=f"prac-{index}")
+        for index in range(10)
+    ]
+    session.add_all(calendars)
+    session.add_all(
+        SlotDB(
+            id=f"slot-{index:05d}",
+            tenant_id=TENANT,
+            calendar_id=calendars[index % len(calendars)].id,
+            starts_at=DAY + timedelta(minutes=15 * index),
+            ends_at=DAY + timedelta(minutes=15 * index + 15),
+            capacity=1,
+            mode=SlotMode.ONSITE,
+            status=SlotStatus.OPEN,
+        )
+        for index in range(ROWS)
+    )
+    session.commit()
+
+
+def orm_path(session: Session) -> bytes:
+    """Previous implementation: SlotDB + CalendarDB, domain Slot, AvailabilityDTO, encode."""
+    statement = SchedulingRepository(session)._availabilities_statement(*WINDOW)
+    slots = [mappers.map_slot(slot) for slot in session.execute(statement).scalars().all()]
+    dtos = DTO_LIST.validate_python([AvailabilityDTO.from_domain(slot) for slot in slots])
+    session.expunge_all()
+    return DTO_LIST.dump_json(dtos)
+
+
+def row_path(session: Session) -> bytes:
+    statement = SchedulingRepository(session)._availabilities_statement(*WINDOW, rows=True)
+    return availability_rows_json(session.execute(statement).all())
+
+
+def measure(label: str, path, session: Session) -> None:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        path(session)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed / (ITERATIONS * ROWS) * 1e6:8.2f} µs/row")
+
+
+def main() -> None:
+    engine = create_engine("sqlite://")
+    tables = [CalendarDB.__table__, SlotDB.__table__]
+    CalendarDB.metadata.create_all(engine, tables=tables)
+    with Session(engine) as session:
+        seed(session)
+        session.expunge_all()
+        assert orm_path(session) == row_path(session), "row path output differs"
+
+        measure("ORM entities + domain + DTO", orm_path, session)
+        measure("rows straight to JSON", row_path, session)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Materialising a year of template slots: per-slot inserts from Python vs the generator.
+
+The baseline expands the templates in Python and sends the slots as batched
+``INSERT ... ON CONFLICT DO NOTHING`` statements; ``generate_slots`` expands and
+inserts them in PostgreSQL with one ``INSERT ... SELECT`` per batch of calendars.
+The baseline runs on a tenth of the calendars and both report the cost per slot.
+
+Needs a PostgreSQL database migrated to head (it creates and deletes its own
+tenants). Run from ``backend/``::
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_slot_generation.py [calendars]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))
+
+from sqlalchemy import delete, func, select, text  # noqa: E402
+from sqlalchemy.dialects.postgresql import insert as pg_insert  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus  # noqa: E402
+from src.features.scheduling.infra import mappers  # noqa: E402
+from src.features.scheduling.infra.models import (  # noqa: E402
+    CalendarDB,
+    ScheduleTemplateDB,
+    SlotDailyRollupDB,
+    SlotDB,
+)
+from src.features.scheduling.infra.repositories import SchedulingRepository  # noqa: E402
+
+FIRST_DAY = date(2026, 1, 1)
+LAST_DAY = date(2026, 12, 31)
+# Mon-Fri 08:00-12:00, 20 min, onsite: 12 slots a day, about 3,100 a year per calendar.
+TEMPLATE = {
+    "weekdays": [1, 2, 3, 4, 5],
+    "start_time": dtime(8),
+    "end_time": dtime(12),
+    "slot_minutes": 20,
+    "mode": SlotMode.ONSITE,
+    "timezone": "Africa/Dakar",
+    "valid_from": FIRST_DAY,
+    "valid_until": None,
+    "capacity": 1,
+}
+BATCH_ROWS = 1_000
+
+
+async def seed(session: AsyncSession, tenant_id: str, calendars: int) -> None:
+    for index in range(calendars):
+        calendar_id = f"{tenant_id}-cal-{index}"
+        session.add(CalendarDB(id=calendar_id, tenant_id=tenant_id, practitioner_id=calendar_id))
+        session.add(
+            ScheduleTemplateDB(
+                id=mappers.generate_id(), tenant_id=tenant_id, calendar_id=calendar_id, **TEMPLATE
+            )
+        )
+    await session.commit()
+
+
+async def python_path(session: AsyncSession, tenant_id: str) -> int:
+    """Expand in Python, insert ``BATCH_ROWS`` slots per statement."""
+    templates = (
+        await session.scalars(
+            select(ScheduleTemplateDB).where(ScheduleTemplateDB.tenant_id == tenant_id)
+        )
+    ).all()
+    rows = []
+    for template in templates:
+        zone = ZoneInfo(template.timezone)
+        length = timedelta(minutes=template.slot_minutes)
+        day = FIRST_DAY
+        while day <= LAST_DAY:
+            if day.isoweekday() in template.weekdays:
+                start = datetime.combine(day, template.start_time, zone)
+                while start + length <= datetime.combine(day, template.end_time, zone):
+                    rows.append(
+                        {
+                            "id": mappers.generate_id(),
+                            "tenant_id": tenant_id,
+                            "calendar_id": template.calendar_id,
+                            "starts_at": start,
+                            "ends_at": start + length,
+                            "capacity": template.capacity,
+                            "mode": template.mode,
+                            "status": SlotStatus.OPEN,
+                        }
+                    )
+                    start += length
+            day += timedelta(days=1)
+    for index in range(0, len(rows), BATCH_ROWS):
+        await session.execute(
+            pg_insert(SlotDB).on_conflict_do_nothing(), rows[index : index + BATCH_ROWS]
+        )
+    await session.commit()
+    return len(rows)
+
+
+async def generator_path(session: AsyncSession, tenant_id: str) -> int:
+    generated = await SchedulingRepository(session).generate_slots(tenant_id, FIRST_DAY, LAST_DAY)
+    await session.commit()
+    return generated
+
+
+async def measure(engine, label: str, path, tenant_id: str, calendars: int) -> None:
+    async with engine.connect() as connection:
+        # Row-level security: the whole run stays on this connection, in this tenant.
+        await connection.execute(
+            text("SELECT set_config('app.tenant_id', :tenant_id, false)"), {"tenant_id": tenant_id}
+        )
+        await connection.commit()
+        session = AsyncSession(bind=connection, join_transaction_mode="rollback_only")
+        await seed(session, tenant_id, calendars)
+        try:
+            start = time.perf_counter()
+            slots = await path(session, tenant_id)
+            elapsed = time.perf_counter() - start
+            stored = await session.scalar(
+                select(func.count()).select_from(SlotDB).where(SlotDB.tenant_id == tenant_id)
+            )
+            assert stored == slots, f"{label}: {stored} slots stored, {slots} reported"
+            print(
+                f"{label:<28} {calendars:4d} calendars {slots:9,d} slots "
+                f"{elapsed:7.2f} s {elapsed / slots * 1e6:6.1f} µs/slot"
+            )
+        finally:
+            await session.rollback()
+            await session.execute(delete(CalendarDB).where(CalendarDB.tenant_id == tenant_id))
+            await session.execute(
+                delete(SlotDailyRollupDB).where(SlotDailyRollupDB.tenant_id == tenant_id)
+            )
+            await session.commit()
+            await session.close()
+
+
+async def main() -> None:
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a PostgreSQL database migrated to head")
+    calendars = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    engine = create_async_engine(url)
+    try:
+        await measure(
+            engine, "python expansion + batches", python_path, "bench-py", calendars // 10
+        )
+        await measure(engine, "generate_slots", generator_path, "bench-gen", calendars)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
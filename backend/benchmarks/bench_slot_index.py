@@ -0,0 +1,157 @@
+"""Availability lookups answered by the in-process slot index vs the repository statement.
+
+The statement runs against an in-memory SQLite database, which leaves out the
+network round trip PostgreSQL adds. The memory the
+index holds is measured with ``tracemalloc`` and compared with the estimate it
+reports as ``slot_index_bytes``.
+
+Run from ``backend/``::
+
+    python benchmarks/bench_slot_index.py [practitioners]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from src.features.scheduling.application.queries import FetchAvailabilitiesQuery  # noqa: E402
+from src.features.scheduling.application.slot_index import SlotIndex  # noqa: E402
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus  # noqa: E402
+from src.features.scheduling.infra.models import CalendarDB, SlotDB  # noqa: E402
+from src.features.scheduling.infra.repositories import SchedulingRepository  # noqa: E402
+
+TENANT = "tenant-1"
+TODAY = datetime(2026, 6, 1, tzinfo=timezone.utc)
+DAYS = 60
+# 08:00-12:00 and 14:00-18:00 UTC, 30 minutes, teleconsultation in the afternoon.
+STARTS = [timedelta(hours=8, minutes=30 * step) for step in range(8)] + [
+    timedelta(hours=14, minutes=30 * step) for step in range(8)
+]
+ROUNDS = 200
+
+
+def seed(session: Session, practitioners: int) -> None:
+    session.add_all(
+        CalendarDB(id=f"cal-{index}", tenant_id=TENANT, practitioner_id=f"prac-{index}")
+        for index in range(practitioners)
+    )
+    session.add_all(
+        SlotDB(
+            id=f"slot-{index}-{day}-{position}",
+            tenant_id=TENANT,
+            calendar_id=f"cal-{index}",
+            starts_at=TODAY + timedelta(days=day) + start,
+            ends_at=TODAY + timedelta(days=day) + start + timedelta(minutes=30),
+            capacity=1,
+            mode=SlotMode.TELE if start.seconds >= 14 * 3600 else SlotMode.ONSITE,
+            # One slot in eight is already booked.
+            status=SlotStatus.CLOSED if position % 8 == 3 else SlotStatus.OPEN,
+        )
+        for index in range(practitioners)
+        for day in range(DAYS)
+        for position, start in enumerate(STARTS)
+    )
+    session.commit()
+
+
+def queries(practitioners: int) -> dict[str, FetchAvailabilitiesQuery]:
+    day = TODAY + timedelta(days=10)
+    return {
+        "one day, tenant, page of 100": FetchAvailabilitiesQuery(
+            tenant_id=TENANT, starts_at=day, ends_at=day + timedelta(days=1), limit=100
+        ),
+        "one week, one practitioner": FetchAvailabilitiesQuery(
+            tenant_id=TENANT,
+            starts_at=day,
+            ends_at=day + timedelta(days=7),
+            practitioner_id=f"prac-{practitioners // 2}",
+        ),
+        "one month, tele, page of 500": FetchAvailabilitiesQuery(
+            tenant_id=TENANT,
+            starts_at=day,
+            ends_at=day + timedelta(days=30),
+            mode=SlotMode.TELE,
+            limit=500,
+        ),
+    }
+
+
+def timed(call) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        call()
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main() -> None:
+    practitioners = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    engine = create_engine("sqlite://")
+    CalendarDB.metadata.create_all(engine, tables=[CalendarDB.__table__, SlotDB.__table__])
+    with Session(engine) as session:
+        seed(session, practitioners)
+        repository = SchedulingRepository(session)
+
+        async def fetch(tenant_id, starts_from, starts_before):
+            statement = repository._availabilities_statement(
+                tenant_id, starts_from, None, None, None, rows=True, starts_before=starts_before
+            )
+            # SQLite drops the time zone PostgreSQL returns.
+            return [
+                (
+                    row.id,
+                    row.starts_at.replace(tzinfo=timezone.utc),
+                    row.ends_at.replace(tzinfo=timezone.utc),
+                    *row[3:],
+                )
+                for row in session.execute(statement).all()
+            ]
+
+        index = SlotIndex(
+            max_rows=10_000_000,
+            horizon_days=DAYS,
+            ttl_seconds=3600,
+            fetch=fetch,
+            now=lambda: TODAY,
+        )
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        asyncio.run(index.load(TENANT))
+        held = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        print(
+            f"{index.rows:,d} open slots indexed: {held / 2**20:.1f} MiB measured, "
+            f"{index.approximate_bytes / 2**20:.1f} MiB estimated"
+        )
+
+        print(f"{'query':<30} {'rows':>6} {'index':>12} {'SQLite':>12}")
+        for label, query in queries(practitioners).items():
+            statement = repository._availabilities_statement(
+                query.tenant_id,
+                query.starts_at,
+                query.ends_at,
+                query.practitioner_id,
+                query.mode,
+                limit=query.limit,
+                rows=True,
+            )
+            rows = index.lookup(query)
+            expected = [row.id for row in session.execute(statement).all()]
+            assert [row.id for row in rows] == expected, label
+            index_time = timed(lambda query=query: index.lookup(query))
+            sql_time = timed(lambda statement=statement: session.execute(statement).all())
+            print(f"{label:<30} {len(rows):6d} {index_time * 1e6:9.1f} µs {sql_time * 1e6:9.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Availability reads over virtual slots vs the same slots generated for a year.
+
+Seeds one tenant with a calendar and a weekly template per practitioner, times the
+availability queries with virtual slots (``slots`` stays empty), then generates a
+year of slots and times the same queries on the materialised rows. Both modes must
+return the same results; the size of the generated rows is reported as well.
+
+Needs a PostgreSQL database migrated to head (it creates and deletes its own
+tenant). Run from ``backend/``::
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_virtual_slots.py [calendars]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from datetime import time as dtime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))
+
+from sqlalchemy import delete, func, select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from src.features.scheduling.domain.value_objects import SlotMode  # noqa: E402
+from src.features.scheduling.infra import mappers  # noqa: E402
+from src.features.scheduling.infra.models import (  # noqa: E402
+    CalendarDB,
+    ScheduleTemplateDB,
+    SlotDailyRollupDB,
+)
+from src.features.scheduling.infra.repositories import SchedulingRepository  # noqa: E402
+
+TENANT = "bench-virtual"
+FIRST_DAY = date(2026, 1, 1)
+LAST_DAY = date(2026, 12, 31)
+# Mon-Fri mornings onsite and Tuesday/Thursday afternoons in teleconsultation.
+TEMPLATES = (
+    {
+        "weekdays": [1, 2, 3, 4, 5],
+        "start_time": dtime(8),
+        "end_time": dtime(12),
+        "slot_minutes": 20,
+        "mode": SlotMode.ONSITE,
+    },
+    {
+        "weekdays": [2, 4],
+        "start_time": dtime(14),
+        "end_time": dtime(18),
+        "slot_minutes": 30,
+        "mode": SlotMode.TELE,
+    },
+)
+MONDAY = datetime(2026, 6, 8, tzinfo=timezone.utc)
+ROUNDS = 20
+
+
+def queries(calendars: int) -> dict:
+    """Label -> coroutine factory reading availabilities through a repository."""
+    practitioner = f"{TENANT}-cal-{calendars // 2}"
+    return {
+        "one day, tenant, page of 100": lambda repository: repository.list_availability_rows(
+            TENANT, MONDAY, MONDAY + timedelta(days=1), None, None, limit=100
+        ),
+        "one week, one practitioner": lambda repository: repository.list_availability_rows(
+            TENANT, MONDAY, MONDAY + timedelta(days=7), practitioner, None
+        ),
+        "one month, tele, page of 500": lambda repository: repository.list_availability_rows(
+            TENANT, MONDAY, MONDAY + timedelta(days=30), None, SlotMode.TELE, limit=500
+        ),
+        "summary, one month": lambda repository: repository.availability_summary(
+            TENANT, MONDAY.date(), MONDAY.date() + timedelta(days=30), None, None
+        ),
+    }
+
+
+async def seed(session: AsyncSession, calendars: int) -> None:
+    for index in range(calendars):
+        calendar_id = f"{TENANT}-cal-{index}"
+        session.add(CalendarDB(id=calendar_id, tenant_id=TENANT, practitioner_id=calendar_id))
+        for template in TEMPLATES:
+            session.add(
+                ScheduleTemplateDB(
+                    id=mappers.generate_id(),
+                    tenant_id=TENANT,
+                    calendar_id=calendar_id,
+                    timezone="Africa/Dakar",
+                    valid_from=FIRST_DAY,
+                    capacity=1,
+                    **template,
+                )
+            )
+    await session.commit()
+
+
+async def run(session: AsyncSession, virtual_slots: bool, calendars: int) -> dict:
+    """Median latency and result of each query."""
+    repository = SchedulingRepository(session, virtual_slots=virtual_slots)
+    measured = {}
+    for label, query in queries(calendars).items():
+        result = await query(repository)
+        timings = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            await query(repository)
+            timings.append(time.perf_counter() - start)
+        measured[label] = (statistics.median(timings), list(result))
+    return measured
+
+
+async def slots_size(session: AsyncSession) -> int:
+    """Bytes on disk of ``slots``, indexes included."""
+    return await session.scalar(select(func.pg_total_relation_size("slots")))
+
+
+async def vacuum(engine) -> None:
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("VACUUM ANALYZE calendars, schedule_templates, slots"))
+
+
+async def main() -> None:
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a PostgreSQL database migrated to head")
+    calendars = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    engine = create_async_engine(url)
+    async with engine.connect() as connection:
+        # Row-level security: the whole run stays on this connection, in this tenant.
+        await connection.execute(
+            text("SELECT set_config('app.tenant_id', :tenant_id, false)"), {"tenant_id": TENANT}
+        )
+        await connection.commit()
+        session = AsyncSession(bind=connection, join_transaction_mode="rollback_only")
+        try:
+            await seed(session, calendars)
+            await vacuum(engine)
+            virtual = await run(session, True, calendars)
+            await session.commit()
+
+            size_before = await slots_size(session)
+            repository = SchedulingRepository(session)
+            generated = await repository.generate_slots(TENANT, FIRST_DAY, LAST_DAY)
+            await session.commit()
+            await vacuum(engine)
+            size = await slots_size(session) - size_before
+            materialised = await run(session, False, calendars)
+            await session.commit()
+
+            print(
+                f"{calendars} calendars: {generated:,d} slots generated for {FIRST_DAY.year}, "
+                f"{size / 2**20:.1f} MiB of slots and indexes ({size / generated:.0f} B/slot); "
+                "virtual slots store none"
+            )
+            print(f"{'query':<32} {'rows':>6} {'virtual':>10} {'materialised':>13}")
+            for label, (virtual_time, rows) in virtual.items():
+                materialised_time, materialised_rows = materialised[label]
+                assert rows == materialised_rows, f"{label}: results differ"
+                print(
+                    f"{label:<32} {len(rows):6d} {virtual_time * 1e3:8.2f} ms "
+                    f"{materialised_time * 1e3:10.2f} ms"
+                )
+        finally:
+            await session.rollback()
+            await session.execute(delete(CalendarDB).where(CalendarDB.tenant_id == TENANT))
+            await session.execute(
+                delete(SlotDailyRollupDB).where(SlotDailyRollupDB.tenant_id == TENANT)
+            )
+            await session.commit()
+            await session.close()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,15 +6,17 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from .core.casbin_enforcer import get_enforcer
+from .core.casbin_enforcer import close_enforcer, get_enforcer
 from .core.db import dispose_engine
 from .core.errors import register_exception_handlers
 from .core.http import setup_http
 from .core.logging import configure_logging
 from .core.observability import setup_observability
+from .core.security import close_signing_keys, warm_up_signing_keys
 from .core.settings import Settings, get_settings
 from .features.dictation.interfaces.router import router as dictation_router
 from .features.onboarding.interfaces.router import router as onboarding_router
+from .features.scheduling.application.slot_index import close_slot_index, start_slot_index
 from .features.scheduling.interfaces.router_commands import router as scheduling_commands_router
 from .features.scheduling.interfaces.router_queries import router as scheduling_queries_router
 
@@ -24,7 +26,12 @@ async def _lifespan(app: FastAPI):
     settings = get_settings()
     configure_logging(settings)
     await get_enforcer(settings)
+    await warm_up_signing_keys(settings)
+    await start_slot_index(settings)
     yield
+    await close_slot_index()
+    await close_signing_keys()
+    await close_enforcer()
     await dispose_engine()
 
 
@@ -0,0 +1,226 @@
+"""Per-domain (tenant) loading of the Casbin policy.
+
+Global rules (domain ``*``) are loaded at startup. The rules of a tenant
+domain are read the first time a request for that domain is authorised and
+dropped again once the domain has been idle for a while, so a worker only
+keeps the tenants it is actually serving in memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Callable, Iterable, Sequence
+
+import structlog
+from casbin.persist import load_policy_line
+from casbin_sqlalchemy_adapter import Adapter
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import and_, or_
+
+from .casbin_watcher import DOMAIN_LOADER_ORIGIN, PolicyChange, apply_policy_change
+from .policy_matcher import GLOBAL_DOMAIN
+
+if TYPE_CHECKING:
+    from .casbin_enforcer import VersionedEnforcer
+
+LOADED_DOMAINS = Gauge(
+    "casbin_loaded_domains",
+    "Tenant domains whose Casbin rules are held in memory",
+)
+DOMAIN_LOAD_LATENCY = Histogram(
+    "casbin_domain_load_duration_seconds",
+    "Time spent loading the Casbin rules of one tenant domain",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DOMAIN_EVICTIONS = Counter(
+    "casbin_domain_evictions_total",
+    "Tenant domains dropped from memory after being idle",
+)
+
+logger = structlog.get_logger(__name__)
+
+
+def rule_domain(sec: str, rule: Sequence[str]) -> str | None:
+    """Domain of a stored rule: ``p.dom`` for policies, the third field of ``g`` links."""
+    index = 1 if sec == "p" else 2
+    return rule[index] if len(rule) > index else None
+
+
+class DomainScopedAdapter(Adapter):
+    """SQLAlchemy adapter whose ``load_policy`` only reads the domains held by this worker.
+
+    ``domains`` is None when lazy loading is disabled: the whole table is read,
+    as with the stock adapter.
+    """
+
+    def __init__(self, engine, *, lazy: bool = True, **kwargs) -> None:
+        super().__init__(engine, **kwargs)
+        self.domains: set[str] | None = {GLOBAL_DOMAIN} if lazy else None
+
+    def is_filtered(self) -> bool:
+        # Casbin refuses save_policy() on a filtered adapter: it would delete unloaded domains.
+        return self.domains is not None
+
+    def load_policy(self, model) -> None:
+        for ptype, values in self.read_rules(self.domains):
+            load_policy_line(", ".join([ptype, *values]), model)
+
+    def read_rules(self, domains: Iterable[str] | None) -> list[tuple[str, list[str]]]:
+        """Return ``(ptype, values)`` for the rules of ``domains`` (every rule if None)."""
+        rule = self._db_class
+        with self._session_scope() as session:
+            query = session.query(rule)
+            if domains is not None:
+                domains = list(domains)
+                query = query.filter(
+                    or_(
+                        and_(rule.ptype.like("p%"), rule.v1.in_(domains)),
+                        and_(rule.ptype.like("g%"), rule.v2.in_(domains)),
+                    )
+                )
+            return [(line.ptype, _values(line)) for line in query.order_by(rule.id).all()]
+
+    def is_empty(self) -> bool:
+        with self._session_scope() as session:
+            return session.query(self._db_class.id).first() is None
+
+
+def _values(line) -> list[str]:
+    values = []
+    for value in (line.v0, line.v1, line.v2, line.v3, line.v4, line.v5):
+        if value is None:
+            break
+        values.append(value.strip())
+    return values
+
+
+class DomainPolicyLoader:
+    """Load tenant domains into an enforcer on demand and evict the idle ones.
+
+    Rules are read in a worker thread and applied on the event loop, like the
+    changes received by the policy watcher. A domain is registered with the
+    adapter before its rules are read, so full reloads keep it; a watcher
+    change for a domain that is still being read triggers a second read.
+    """
+
+    def __init__(
+        self,
+        enforcer: "VersionedEnforcer",
+        adapter: DomainScopedAdapter,
+        idle_seconds: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if adapter.domains is None:
+            raise ValueError("DomainPolicyLoader needs an adapter with lazy domains")
+        self._enforcer = enforcer
+        self._adapter = adapter
+        # The adapter's own set: domains added or discarded here are the ones it reads.
+        self._domains: set[str] = adapter.domains
+        self._idle_seconds = idle_seconds
+        self._timer = timer
+        self._last_used: dict[str, float] = {}
+        self._loading: dict[str, asyncio.Task[None]] = {}
+        self._stale: set[str] = set()
+        self._next_sweep = timer() + idle_seconds
+
+    @property
+    def loaded_domains(self) -> set[str]:
+        return set(self._last_used)
+
+    async def ensure_loaded(self, domain: str) -> None:
+        """Make sure the rules of ``domain`` are in memory and mark it as used."""
+        now = self._timer()
+        if now >= self._next_sweep:
+            self.evict_idle(now)
+        if domain == GLOBAL_DOMAIN:
+            return
+        if domain in self._last_used:
+            self._last_used[domain] = now
+            return
+
+        task = self._loading.get(domain)
+        if task is None:
+            task = asyncio.create_task(self._load(domain))
+            self._loading[domain] = task
+            task.add_done_callback(lambda _task: self._loading.pop(domain, None))
+        # A cancelled request must not cancel the load other requests are waiting for.
+        await asyncio.shield(task)
+
+    def evict_idle(self, now: float | None = None) -> list[str]:
+        """Drop the domains not used for ``idle_seconds``; return their names."""
+        now = self._timer() if now is None else now
+        self._next_sweep = now + self._idle_seconds / 4
+        idle = [
+            domain
+            for domain, last_used in self._last_used.items()
+            if now - last_used >= self._idle_seconds
+        ]
+        for domain in idle:
+            self._evict(domain)
+        return idle
+
+    def relevant_rules(self, sec: str, rules: Iterable[Sequence[str]]) -> list[list[str]]:
+        """Keep the rules of a remote change that belong to a domain held in memory."""
+        kept = []
+        for rule in rules:
+            domain = rule_domain(sec, rule)
+            if domain in self._loading:
+                self._stale.add(domain)
+            if domain in self._domains:
+                kept.append(list(rule))
+        return kept
+
+    def note_remote_change(self) -> None:
+        """Re-read every domain being loaded (for changes that do not name a domain)."""
+        self._stale.update(self._loading)
+
+    async def _load(self, domain: str) -> None:
+        start_time = time.perf_counter()
+        self._domains.add(domain)
+        try:
+            while True:
+                self._stale.discard(domain)
+                rows = await asyncio.to_thread(self._adapter.read_rules, [domain])
+                if domain not in self._stale:
+                    break
+        except BaseException:
+            self._domains.discard(domain)
+            raise
+
+        grouped: dict[tuple[str, str], list[list[str]]] = defaultdict(list)
+        for ptype, values in rows:
+            grouped[(ptype[0], ptype)].append(values)
+        for (sec, ptype), rules in grouped.items():
+            apply_policy_change(
+                self._enforcer,
+                PolicyChange(
+                    op="add", origin=DOMAIN_LOADER_ORIGIN, sec=sec, ptype=ptype, rules=rules
+                ),
+            )
+        self._last_used[domain] = self._timer()
+        LOADED_DOMAINS.set(len(self._last_used))
+
+        elapsed = time.perf_counter() - start_time
+        DOMAIN_LOAD_LATENCY.observe(elapsed)
+        logger.debug("casbin_domain_loaded", domain=domain, rules=len(rows), seconds=elapsed)
+
+    def _evict(self, domain: str) -> None:
+        self._domains.discard(domain)
+        del self._last_used[domain]
+        for sec, field_index in (("p", 1), ("g", 2)):
+            for ptype in list(self._enforcer.model[sec]):
+                apply_policy_change(
+                    self._enforcer,
+                    PolicyChange(
+                        op="remove_filtered",
+                        origin=DOMAIN_LOADER_ORIGIN,
+                        sec=sec,
+                        ptype=ptype,
+                        field_index=field_index,
+                        field_values=[domain],
+                    ),
+                )
+        LOADED_DOMAINS.set(len(self._last_used))
+        DOMAIN_EVICTIONS.inc()
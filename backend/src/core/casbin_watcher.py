@@ -0,0 +1,251 @@
+"""Casbin watcher propagating policy changes between workers via PostgreSQL LISTEN/NOTIFY."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING
+
+import asyncpg
+import psycopg
+import structlog
+from casbin.model.policy_op import PolicyOp
+
+if TYPE_CHECKING:
+    from .casbin_enforcer import VersionedEnforcer
+
+logger = structlog.get_logger(__name__)
+
+# Origin of the changes applied by the per-domain policy loader of this worker.
+DOMAIN_LOADER_ORIGIN = "domain-loader"
+
+# NOTIFY payloads are limited to 8000 bytes; larger changes fall back to a reload.
+_MAX_PAYLOAD_BYTES = 7900
+
+
+@dataclass(frozen=True, slots=True)
+class PolicyChange:
+    """A single policy mutation, as broadcast to the other workers."""
+
+    op: str
+    origin: str
+    sec: str = ""
+    ptype: str = ""
+    rules: list[list[str]] = field(default_factory=list)
+    field_index: int = 0
+    field_values: list[str] = field(default_factory=list)
+
+    def to_payload(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "PolicyChange":
+        return cls(**json.loads(payload))
+
+
+def apply_policy_change(enforcer: "VersionedEnforcer", change: PolicyChange) -> None:
+    """Apply a change published by another worker to the in-memory policy only.
+
+    A ``reload`` reads the whole policy table here; ``PostgresWatcher`` runs those in a
+    thread instead.
+    """
+    if change.op == "reload":
+        enforcer.load_policy()
+        return
+
+    model = enforcer.model
+    loader = enforcer.domain_loader
+    if change.op == "add":
+        # Rules of tenant domains this worker has not loaded stay in the database.
+        rules = change.rules
+        if loader is not None and change.origin != DOMAIN_LOADER_ORIGIN:
+            rules = loader.relevant_rules(change.sec, rules)
+        affected = [rule for rule in rules if model.add_policy(change.sec, change.ptype, rule)]
+        role_op = PolicyOp.Policy_add
+    elif change.op == "remove":
+        if loader is not None and change.origin != DOMAIN_LOADER_ORIGIN:
+            loader.relevant_rules(change.sec, change.rules)
+        affected = [
+            rule for rule in change.rules if model.remove_policy(change.sec, change.ptype, rule)
+        ]
+        role_op = PolicyOp.Policy_remove
+    elif change.op == "remove_filtered":
+        if loader is not None and change.origin != DOMAIN_LOADER_ORIGIN:
+            loader.note_remote_change()
+        affected = model.remove_filtered_policy_returns_effects(
+            change.sec, change.ptype, change.field_index, *change.field_values
+        )
+        role_op = PolicyOp.Policy_remove
+    else:
+        raise ValueError(f"Unknown policy change operation '{change.op}'")
+
+    if not affected:
+        return
+    if change.sec == "g" and enforcer.auto_build_role_links:
+        model.build_incremental_role_links(
+            enforcer.rm_map[change.ptype], role_op, "g", change.ptype, affected
+        )
+    enforcer.policy_version += 1
+
+
+class PostgresWatcher:
+    """Publish local policy changes with NOTIFY and apply remote ones from LISTEN.
+
+    Casbin calls the ``update_for_*`` hooks synchronously after it has saved a
+    change through the adapter, so publishing reuses a small synchronous psycopg
+    connection. Listening runs on the event loop with asyncpg; after a lost
+    connection the worker reloads the full policy, since notifications sent in
+    the meantime are gone. Reloads run in a thread, one at a time: reloads asked
+    for while one runs are coalesced into a single next one.
+    """
+
+    def __init__(self, dsn: str, channel: str, reconnect_delay: float = 1.0) -> None:
+        self._dsn = dsn
+        self._channel = channel
+        self._reconnect_delay = reconnect_delay
+        self._origin = uuid.uuid4().hex
+        self._publish_lock = threading.Lock()
+        self._publish_conn: psycopg.Connection | None = None
+        self._listen_task: asyncio.Task[None] | None = None
+        self._reload_task: asyncio.Task[None] | None = None
+        self._reload_requested = False
+        self._update_callback = None
+
+    # -- casbin Watcher interface -------------------------------------------------
+
+    def set_update_callback(self, callback) -> None:
+        self._update_callback = callback
+
+    def update(self) -> None:
+        self._publish(PolicyChange(op="reload", origin=self._origin))
+
+    def update_for_add_policy(self, sec: str, ptype: str, rule: list[str]) -> None:
+        self._publish(
+            PolicyChange(op="add", origin=self._origin, sec=sec, ptype=ptype, rules=[rule])
+        )
+
+    def update_for_add_policies(self, sec: str, ptype: str, rules: list[list[str]]) -> None:
+        self._publish(
+            PolicyChange(op="add", origin=self._origin, sec=sec, ptype=ptype, rules=list(rules))
+        )
+
+    def update_for_remove_policy(self, sec: str, ptype: str, rule: list[str]) -> None:
+        self._publish(
+            PolicyChange(op="remove", origin=self._origin, sec=sec, ptype=ptype, rules=[rule])
+        )
+
+    def update_for_remove_policies(self, sec: str, ptype: str, rules: list[list[str]]) -> None:
+        self._publish(
+            PolicyChange(op="remove", origin=self._origin, sec=sec, ptype=ptype, rules=list(rules))
+        )
+
+    def update_for_remove_filtered_policy(
+        self, sec: str, ptype: str, field_index: int, *field_values: str
+    ) -> None:
+        self._publish(
+            PolicyChange(
+                op="remove_filtered",
+                origin=self._origin,
+                sec=sec,
+                ptype=ptype,
+                field_index=field_index,
+                field_values=list(field_values),
+            )
+        )
+
+    def update_for_save_policy(self, model) -> None:
+        self.update()
+
+    # -- publishing ---------------------------------------------------------------
+
+    def _publish(self, change: PolicyChange) -> None:
+        payload = change.to_payload()
+        if len(payload.encode("utf-8")) > _MAX_PAYLOAD_BYTES:
+            payload = PolicyChange(op="reload", origin=self._origin).to_payload()
+
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publish_conn is None or self._publish_conn.closed:
+                        self._publish_conn = psycopg.connect(self._dsn, autocommit=True)
+                    self._publish_conn.execute("SELECT pg_notify(%s, %s)", (self._channel, payload))
+                    return
+                except psycopg.OperationalError:
+                    self._publish_conn = None
+                    if attempt:
+                        raise
+
+    # -- listening ----------------------------------------------------------------
+
+    async def start(self, enforcer: "VersionedEnforcer") -> None:
+        if self._listen_task is None:
+            self._listen_task = asyncio.create_task(self._listen_forever(enforcer))
+
+    async def stop(self) -> None:
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+            self._listen_task = None
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            self._reload_task = None
+        with self._publish_lock:
+            if self._publish_conn is not None:
+                self._publish_conn.close()
+                self._publish_conn = None
+
+    def _on_notification(self, enforcer: "VersionedEnforcer", payload: str) -> None:
+        try:
+            change = PolicyChange.from_payload(payload)
+            if change.origin == self._origin:
+                return
+            if change.op == "reload":
+                self._schedule_reload(enforcer)
+            else:
+                apply_policy_change(enforcer, change)
+        except Exception:  # pragma: no cover - defensive, keep listening
+            logger.exception("casbin_policy_change_failed", payload=payload)
+
+    def _schedule_reload(self, enforcer: "VersionedEnforcer") -> None:
+        """Reload the policy off the event loop, after the reload in progress if any."""
+        self._reload_requested = True
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.create_task(self._reload(enforcer))
+
+    async def _reload(self, enforcer: "VersionedEnforcer") -> None:
+        # A reload asked for during a load may have missed its change: load once more.
+        while self._reload_requested:
+            self._reload_requested = False
+            try:
+                await asyncio.to_thread(enforcer.load_policy)
+            except Exception:  # pragma: no cover - defensive, the next reload retries
+                logger.exception("casbin_policy_reload_failed")
+
+    async def _listen_forever(self, enforcer: "VersionedEnforcer") -> None:
+        connected_before = False
+        while True:
+            connection: asyncpg.Connection | None = None
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _conn, lost=lost: lost.set())
+                await connection.add_listener(
+                    self._channel,
+                    lambda _conn, _pid, _channel, payload: self._on_notification(enforcer, payload),
+                )
+                if connected_before:
+                    self._schedule_reload(enforcer)
+                connected_before = True
+                await lost.wait()
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("casbin_watcher_disconnected", error=str(exc))
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self._reconnect_delay)
@@ -3,12 +3,16 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from contextvars import ContextVar
+from typing import Any, AsyncIterator
 
-from sqlalchemy import text
+from cachetools import TTLCache
+from prometheus_client import Counter
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
+from .db_pool import instrument_pool, pool_options
 from .settings import Settings, get_settings
 
 
@@ -18,24 +22,74 @@ class Base(DeclarativeBase):
 
 _engine: AsyncEngine | None = None
 _session_factory: async_sessionmaker[AsyncSession] | None = None
+_replica_engine: AsyncEngine | None = None
+_replica_session_factory: async_sessionmaker[AsyncSession] | None = None
+# Subjects whose reads stay on the primary for a while after they wrote (read-your-writes).
+_primary_pins: TTLCache = TTLCache(maxsize=100_000, ttl=5)
+
+READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Read-only sessions by the database they were routed to",
+    ["target"],
+)
+
+# Tenant the connections checked out by the current task must be scoped to.
+_current_tenant: ContextVar[str | None] = ContextVar("current_tenant", default=None)
+# Key of the pooled connection info holding the tenant its ``app.tenant_id`` is set to.
+_CONNECTION_TENANT = "app.tenant_id"
+# Marks a connection whose setting is unknown (a previous change failed half-way).
+_UNKNOWN_TENANT = object()
+
+
+def _tenant_change(current: Any, desired: str | None) -> tuple[str, tuple[str, ...]] | None:
+    """Return the statement moving a connection from ``current`` to ``desired``, if any."""
+    if current == desired:
+        return None
+    if desired is None:
+        return "RESET app.tenant_id", ()
+    return "SELECT set_config('app.tenant_id', $1, false)", (desired,)
+
+
+def _scope_connection_to_tenant(dbapi_connection, connection_record, _connection_proxy) -> None:
+    """Pool ``checkout`` hook: align ``app.tenant_id`` with the tenant of the current task.
+
+    The connection remembers the tenant it is set to, so a request reusing a
+    connection of the same tenant costs no extra round trip. The setting is
+    changed at checkout, before SQLAlchemy begins a transaction, so a later
+    rollback cannot undo it behind the recorded value.
+    """
+    change = _tenant_change(connection_record.info.get(_CONNECTION_TENANT), _current_tenant.get())
+    if change is None:
+        return
+    statement, args = change
+    connection_record.info[_CONNECTION_TENANT] = _UNKNOWN_TENANT
+    dbapi_connection.run_async(lambda connection: connection.execute(statement, *args))
+    connection_record.info[_CONNECTION_TENANT] = _current_tenant.get()
+
+
+def _create_engine(url: str, settings: Settings, label: str) -> AsyncEngine:
+    engine = create_async_engine(url, echo=False, **pool_options(settings, label))
+    instrument_pool(engine, label)
+    event.listen(engine.sync_engine, "checkout", _scope_connection_to_tenant)
+    return engine
 
 
 def get_engine(settings: Settings | None = None) -> AsyncEngine:
     """Return (and lazily create) the async engine."""
-    global _engine, _session_factory
+    global _engine, _session_factory, _replica_engine, _replica_session_factory, _primary_pins
     if _engine is None:
         settings = settings or get_settings()
-        _engine = create_async_engine(
-            settings.database_url,
-            pool_pre_ping=True,
-            echo=False,
-        )
+        _engine = _create_engine(settings.database_url, settings, "primary")
         _session_factory = async_sessionmaker(_engine, expire_on_commit=False)
+        _primary_pins = TTLCache(maxsize=100_000, ttl=settings.read_your_writes_seconds)
+        if settings.database_replica_url:
+            _replica_engine = _create_engine(settings.database_replica_url, settings, "replica")
+            _replica_session_factory = async_sessionmaker(_replica_engine, expire_on_commit=False)
     return _engine
 
 
 def get_session_factory(settings: Settings | None = None) -> async_sessionmaker[AsyncSession]:
-    """Return the async session factory."""
+    """Return the async session factory (primary database)."""
     global _session_factory
     if _session_factory is None:
         get_engine(settings=settings)
@@ -43,28 +97,85 @@ def get_session_factory(settings: Settings | None = None) -> async_sessionmaker[
     return _session_factory
 
 
+def get_read_session_factory(
+    subject: str | None = None,
+    settings: Settings | None = None,
+    *,
+    primary: bool = False,
+) -> async_sessionmaker[AsyncSession]:
+    """Return the session factory for read-only queries.
+
+    Reads go to the replica when ``DATABASE_REPLICA_URL`` is set, except for a
+    ``subject`` pinned to the primary by ``pin_reads_to_primary`` on this worker and
+    with ``primary``, for callers holding a pin taken by another worker.
+    """
+    session_factory = get_session_factory(settings=settings)
+    if (
+        _replica_session_factory is None
+        or primary
+        or (subject is not None and subject in _primary_pins)
+    ):
+        READ_SESSIONS.labels(target="primary").inc()
+        return session_factory
+    READ_SESSIONS.labels(target="replica").inc()
+    return _replica_session_factory
+
+
+def reads_primary(session: AsyncSession) -> bool:
+    """Whether ``session`` reads the primary, and so sees every committed write."""
+    return _replica_engine is None or session.bind is not _replica_engine
+
+
+def pin_reads_to_primary(subject: str) -> bool:
+    """Route the reads of ``subject`` to the primary for ``READ_YOUR_WRITES_SECONDS``.
+
+    The pin only holds on this worker; False when there is no replica to avoid.
+    """
+    if _replica_session_factory is None:
+        return False
+    _primary_pins[subject] = True
+    return True
+
+
 @asynccontextmanager
 async def tenant_session(
     tenant_id: str | None,
     settings: Settings | None = None,
+    *,
+    read_only: bool = False,
+    subject: str | None = None,
+    primary: bool = False,
 ) -> AsyncIterator[AsyncSession]:
-    """Provide a session scoped to a tenant via PostgreSQL RLS."""
-    session_factory = get_session_factory(settings=settings)
-    async with session_factory() as session:
-        if tenant_id:
-            await session.execute(text("SET app.tenant_id = :tenant_id"), {"tenant_id": tenant_id})
-        try:
+    """Provide a session scoped to a tenant via PostgreSQL RLS.
+
+    The tenant is applied when the session checks out its connection, and only
+    if that connection is currently set to another tenant (see
+    ``_scope_connection_to_tenant``). Sessions opened outside ``tenant_session``
+    always get a connection without tenant.
+
+    ``read_only`` sessions use ``get_read_session_factory(subject, primary=primary)``.
+    """
+    if read_only:
+        session_factory = get_read_session_factory(subject, settings=settings, primary=primary)
+    else:
+        session_factory = get_session_factory(settings=settings)
+    token = _current_tenant.set(tenant_id or None)
+    try:
+        async with session_factory() as session:
             yield session
-        finally:
-            if tenant_id:
-                await session.execute(text("RESET app.tenant_id"))
+    finally:
+        _current_tenant.reset(token)
 
 
 async def dispose_engine() -> None:
-    """Dispose the engine (used on application shutdown)."""
-    global _engine, _session_factory
+    """Dispose the engines (used on application shutdown)."""
+    global _engine, _session_factory, _replica_engine, _replica_session_factory
     if _engine is not None:
         await _engine.dispose()
+    if _replica_engine is not None:
+        await _replica_engine.dispose()
     _engine = None
     _session_factory = None
-
+    _replica_engine = None
+    _replica_session_factory = None
+    _primary_pins.clear()
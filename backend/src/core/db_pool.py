@@ -0,0 +1,104 @@
+"""Connection pool configuration and Prometheus instrumentation."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, cast
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .settings import Settings
+
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ["pool"],
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections open beyond the pool size (max_overflow in use)",
+    ["pool"],
+)
+POOL_SIZE = Gauge(
+    "db_pool_size_connections",
+    "Configured number of persistent connections",
+    ["pool"],
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection (including opening a new one)",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout because the pool was exhausted",
+    ["pool"],
+)
+POOL_CONNECTION_AGE = Histogram(
+    "db_pool_connection_age_seconds",
+    "Age of the connections handed out by the pool, observed at checkout",
+    ["pool"],
+    buckets=(1, 10, 30, 60, 300, 600, 1800, 3600, 7200, 21600, 86400),
+)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """``AsyncAdaptedQueuePool`` that times how long each checkout waits for a connection."""
+
+    metrics_label = "primary"
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(pool=self.metrics_label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(pool=self.metrics_label).observe(
+                time.perf_counter() - start_time
+            )
+
+
+def pool_options(settings: Settings, label: str) -> dict[str, Any]:
+    """Keyword arguments for ``create_async_engine`` configuring an instrumented pool."""
+    # A subclass per label: the pool re-creates itself from its class on dispose().
+    poolclass = type(
+        f"InstrumentedAsyncQueuePool[{label}]",
+        (InstrumentedAsyncQueuePool,),
+        {"metrics_label": label},
+    )
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": True,
+    }
+
+
+def instrument_pool(engine: AsyncEngine, label: str) -> None:
+    """Export the occupancy of ``engine``'s pool and the age of the connections it hands out."""
+    sync_engine = engine.sync_engine
+
+    POOL_CHECKED_OUT.labels(pool=label).set_function(lambda: _queue_pool(sync_engine).checkedout())
+    POOL_OVERFLOW.labels(pool=label).set_function(
+        lambda: max(_queue_pool(sync_engine).overflow(), 0)
+    )
+    POOL_SIZE.labels(pool=label).set_function(lambda: _queue_pool(sync_engine).size())
+
+    @event.listens_for(sync_engine, "checkout")
+    def _observe_connection_age(_dbapi_connection, connection_record, _connection_proxy) -> None:
+        POOL_CONNECTION_AGE.labels(pool=label).observe(time.time() - connection_record.starttime)
+
+
+def _queue_pool(sync_engine: Engine) -> QueuePool:
+    """The current pool of ``sync_engine`` (``dispose()`` replaces it), a queue pool as
+    configured by ``pool_options``."""
+    return cast(QueuePool, sync_engine.pool)
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import hashlib
+import hmac
+import time
 from typing import Callable
 
 from fastapi import FastAPI, Request
@@ -24,6 +27,42 @@ def _limiter_key(request: Request) -> str:
 
 limiter = Limiter(key_func=_limiter_key, default_limits=[])
 
+# Read-your-writes across workers: the end of the pin (epoch milliseconds) of a
+# subject whose reads must stay on the primary, whichever worker serves them, with
+# its HMAC so that clients cannot pin themselves.
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def _read_primary_signature(subject: str, until_ms: int, secret: str) -> str:
+    key = hmac.new(secret.encode("utf-8"), b"read-primary", hashlib.sha256).digest()
+    message = f"{subject}:{until_ms}".encode("utf-8")
+    return hmac.new(key, message, hashlib.sha256).hexdigest()
+
+
+def set_read_primary_cookie(response: Response, subject: str, seconds: float, secret: str) -> None:
+    until_ms = int((time.time() + seconds) * 1000)
+    response.set_cookie(
+        READ_PRIMARY_COOKIE,
+        f"{until_ms}.{_read_primary_signature(subject, until_ms, secret)}",
+        max_age=max(int(seconds), 1),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def reads_pinned_to_primary(request: Request, subject: str, seconds: float, secret: str) -> bool:
+    """Whether ``request`` carries a pin of ``subject`` signed with ``secret`` that has not
+    ended; pins ending more than ``seconds`` from now are ignored."""
+    until, _, signature = request.cookies.get(READ_PRIMARY_COOKIE, "").partition(".")
+    try:
+        until_ms = int(until)
+    except ValueError:
+        return False
+    now_ms = time.time() * 1000
+    if not now_ms < until_ms <= now_ms + seconds * 1000:
+        return False
+    return hmac.compare_digest(signature, _read_primary_signature(subject, until_ms, secret))
+
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """Add opinionated security headers to every response."""
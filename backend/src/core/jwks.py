@@ -0,0 +1,139 @@
+"""Asynchronous JWKS key manager with single-flight, background refresh."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable
+
+import httpx
+import jwt
+import structlog
+from jwt import PyJWK, PyJWKSet
+
+logger = structlog.get_logger(__name__)
+
+
+class JWKSError(jwt.PyJWTError):
+    """Raised when signing keys cannot be fetched or the requested key is unknown."""
+
+
+class JWKSKeyManager:
+    """Keep the signing keys of a JWKS endpoint in memory.
+
+    Known keys are always served from memory. Once the key set is within
+    ``refresh_ahead`` seconds of its TTL, the next lookup schedules a refresh in
+    the background instead of waiting for it. Concurrent misses share a single
+    download, and unknown ``kid`` values trigger at most one refetch per
+    ``min_refetch_interval`` seconds; a lookup made while a download is in flight
+    waits for it. After a failed download no other starts for
+    ``min_refetch_interval`` seconds, doubled after each further failure up to
+    ``max_backoff``.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        *,
+        ttl: float = 3600,
+        refresh_ahead: float = 300,
+        min_refetch_interval: float = 30,
+        max_backoff: float = 300,
+        timeout: float = 10,
+        client: httpx.AsyncClient | None = None,
+        on_rotate: Callable[[set[str]], None] | None = None,
+    ) -> None:
+        self._jwks_url = jwks_url
+        self._ttl = ttl
+        self._refresh_ahead = min(refresh_ahead, ttl)
+        self._min_refetch_interval = min_refetch_interval
+        self._max_backoff = max(max_backoff, min_refetch_interval)
+        self._client = client or httpx.AsyncClient(timeout=timeout)
+        self._on_rotate = on_rotate
+        self._keys: dict[str, PyJWK] = {}
+        self._expires_at = 0.0
+        self._last_fetch_at = float("-inf")
+        self._failures = 0
+        self._retry_at = float("-inf")
+        self._inflight: asyncio.Task[None] | None = None
+
+    @property
+    def kids(self) -> set[str]:
+        return set(self._keys)
+
+    async def get_signing_key(self, kid: str) -> PyJWK:
+        """Return the key for ``kid``, fetching the key set only when strictly needed."""
+        now = time.monotonic()
+        key = self._keys.get(kid)
+        if key is not None:
+            if now >= self._expires_at - self._refresh_ahead and now >= self._retry_at:
+                self._start_fetch()
+            return key
+
+        if self._inflight is None:
+            if now < self._retry_at:
+                raise JWKSError(f"Unknown signing key '{kid}' (JWKS unavailable)")
+            if self._keys and now - self._last_fetch_at < self._min_refetch_interval:
+                raise JWKSError(f"Unknown signing key '{kid}'")
+
+        await self.refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            raise JWKSError(f"Unknown signing key '{kid}'")
+        return key
+
+    async def refresh(self) -> None:
+        """Fetch the key set, joining the download already in flight if there is one."""
+        await asyncio.shield(self._start_fetch())
+
+    async def aclose(self) -> None:
+        if self._inflight is not None:
+            self._inflight.cancel()
+        await self._client.aclose()
+
+    def _start_fetch(self) -> asyncio.Task[None]:
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._fetch())
+            self._inflight.add_done_callback(self._fetch_done)
+        return self._inflight
+
+    def _fetch_done(self, task: asyncio.Task[None]) -> None:
+        self._inflight = None
+        if task.cancelled():
+            return
+        if task.exception() is None:
+            self._failures = 0
+            self._retry_at = float("-inf")
+            return
+        self._failures += 1
+        backoff = min(self._min_refetch_interval * 2 ** min(self._failures - 1, 16), self._max_backoff)
+        self._retry_at = time.monotonic() + backoff
+        logger.warning(
+            "jwks_refresh_failed",
+            jwks_url=self._jwks_url,
+            error=str(task.exception()),
+            retry_in_seconds=backoff,
+        )
+
+    async def _fetch(self) -> None:
+        self._last_fetch_at = time.monotonic()
+        try:
+            response = await self._client.get(self._jwks_url)
+            response.raise_for_status()
+            jwk_set = PyJWKSet.from_dict(response.json())
+        except (httpx.HTTPError, ValueError, jwt.PyJWTError) as exc:
+            raise JWKSError(f"Unable to fetch JWKS from {self._jwks_url}") from exc
+
+        keys = {
+            key.key_id: key
+            for key in jwk_set.keys
+            if key.key_id and key.public_key_use in ("sig", None)
+        }
+        if not keys:
+            raise JWKSError(f"JWKS at {self._jwks_url} has no signing keys")
+
+        retired = set(self._keys) - set(keys)
+        self._keys = keys
+        self._expires_at = time.monotonic() + self._ttl
+        if retired and self._on_rotate is not None:
+            self._on_rotate(retired)
@@ -0,0 +1,141 @@
+"""Compiled, route-indexed evaluation of the Casbin RBAC-with-domains model.
+
+The generic Casbin evaluator rebuilds and interprets the matcher expression
+for every policy line on every request. For the model shipped in
+``casbin/model.conf`` the decision reduces to "one of the subject's roles owns
+an *allow* rule, global or for the request domain, whose path and action
+patterns match", so the patterns are compiled once and indexed by role and by
+the first path segment.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+import casbin
+from casbin.util.builtin_operators import KEY_MATCH2_PATTERN
+
+SUPPORTED_MATCHER = (
+    'g(r_sub, p_sub, r_dom) && (p_dom == "*" || p_dom == r_dom) '
+    "&& keyMatch2(r_obj, p_obj) && regexMatch(r_act, p_act)"
+)
+# Earlier model without domain scoping of policy rules: p.dom is ignored.
+UNSCOPED_MATCHER = "g(r_sub, p_sub, r_dom) && keyMatch2(r_obj, p_obj) && regexMatch(r_act, p_act)"
+SUPPORTED_EFFECT = "some(where (p_eft == allow))"
+
+GLOBAL_DOMAIN = "*"
+
+# Rules whose first path segment is not a plain literal are checked for every request.
+_ANY_SEGMENT = ""
+_LITERAL_SEGMENT = re.compile(r"^/([A-Za-z0-9_-]+)(?:/|$)")
+
+
+@dataclass(frozen=True, slots=True)
+class _CompiledRule:
+    obj: re.Pattern[str]
+    act: re.Pattern[str]
+    # None when the rule applies to every domain.
+    dom: str | None
+
+
+# Shared by the lookups of segments without rules; never mutated.
+_NO_RULES: list[_CompiledRule] = []
+
+
+def _compile_key_match2(pattern: str) -> re.Pattern[str]:
+    """Compile a keyMatch2 pattern exactly as ``casbin.util.key_match2`` interprets it."""
+    pattern = pattern.replace("/*", "/.*")
+    pattern = KEY_MATCH2_PATTERN.sub(r"\g<1>[^\/]+\g<2>", pattern, 0)
+    if pattern == "*":
+        pattern = "(.*)"
+    return re.compile("^" + pattern + "$")
+
+
+def _segment_of_pattern(pattern: str) -> str:
+    match = _LITERAL_SEGMENT.match(pattern)
+    return match.group(1) if match else _ANY_SEGMENT
+
+
+class CompiledPolicyMatcher:
+    """Answer ``enforce(sub, dom, obj, act)`` with the same decisions as Casbin."""
+
+    def __init__(
+        self,
+        policies: Iterable[Sequence[str]],
+        groupings: Iterable[Sequence[str]],
+        max_hierarchy_level: int = 10,
+        domain_scoped: bool = True,
+    ) -> None:
+        self._max_hierarchy_level = max_hierarchy_level
+        self._rules: dict[str, dict[str, list[_CompiledRule]]] = defaultdict(lambda: defaultdict(list))
+        self._links: dict[str, dict[str, set[str]]] = defaultdict(lambda: defaultdict(set))
+        self.policy_count = 0
+
+        for sub, rule_dom, obj, act, eft in policies:
+            self.policy_count += 1
+            if eft != "allow":
+                # ``some(where (p.eft == allow))`` ignores every other effect.
+                continue
+            scope = rule_dom if domain_scoped and rule_dom != GLOBAL_DOMAIN else None
+            rule = _CompiledRule(obj=_compile_key_match2(obj), act=re.compile(act), dom=scope)
+            self._rules[sub][_segment_of_pattern(obj)].append(rule)
+
+        for user, role, domain in groupings:
+            self._links[domain][user].add(role)
+
+    @classmethod
+    def from_enforcer(cls, enforcer: casbin.Enforcer) -> "CompiledPolicyMatcher | None":
+        """Compile the enforcer policy, or return None if its model is not the supported one."""
+        model = enforcer.model
+        matcher = model["m"]["m"].value
+        if (
+            matcher not in (SUPPORTED_MATCHER, UNSCOPED_MATCHER)
+            or model["e"]["e"].value != SUPPORTED_EFFECT
+            or set(model["p"].keys()) != {"p"}
+            or set(model["g"].keys()) != {"g"}
+            or model["p"]["p"].tokens != ["p_sub", "p_dom", "p_obj", "p_act", "p_eft"]
+        ):
+            return None
+        return cls(
+            enforcer.get_policy(),
+            enforcer.get_grouping_policy(),
+            domain_scoped=matcher == SUPPORTED_MATCHER,
+        )
+
+    def _roles(self, sub: str, dom: str) -> set[str]:
+        """Roles reachable from ``sub`` in ``dom``, with Casbin's hierarchy depth limit."""
+        links = self._links.get(dom)
+        roles = {sub}
+        if not links:
+            return roles
+        frontier = {sub}
+        for _ in range(self._max_hierarchy_level - 1):
+            frontier = {role for name in frontier for role in links.get(name, ())} - roles
+            if not frontier:
+                break
+            roles |= frontier
+        return roles
+
+    def enforce(self, sub: str, dom: str, obj: str, act: str) -> bool:
+        segment = obj[1:].split("/", 1)[0] if obj.startswith("/") else None
+        # ``$`` also matches before a trailing newline: keep those requests on the slow path.
+        scan_all = segment is None or "\n" in obj
+
+        for role in self._roles(sub, dom):
+            buckets = self._rules.get(role)
+            if not buckets:
+                continue
+            if scan_all or segment is None:
+                candidates: Iterable[list[_CompiledRule]] = buckets.values()
+            else:
+                candidates = (buckets.get(segment, _NO_RULES), buckets.get(_ANY_SEGMENT, _NO_RULES))
+            for rules in candidates:
+                for rule in rules:
+                    if rule.dom is not None and rule.dom != dom:
+                        continue
+                    if rule.obj.match(obj) and rule.act.match(act):
+                        return True
+        return False
@@ -2,22 +2,27 @@
 
 from __future__ import annotations
 
-import asyncio
+import hashlib
+import time
 from dataclasses import dataclass
 from typing import Iterable
 
 import jwt
-from cachetools import TTLCache
+from cachetools import TLRUCache
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jwt import PyJWK, PyJWKClient
+from jwt import PyJWK
+from prometheus_client import Counter
 
-from .casbin_enforcer import authorize
+from .casbin_enforcer import authorize_any
+from .jwks import JWKSKeyManager
 from .settings import Settings, get_settings
 
-_SIGNING_KEY_CACHE: TTLCache = TTLCache(maxsize=64, ttl=3600)
-_JWK_CLIENT_CACHE: dict[str, PyJWKClient] = {}
-_bearer_scheme = HTTPBearer(auto_error=False)
+TOKEN_CACHE_LOOKUPS = Counter(
+    "jwt_verified_token_cache_total",
+    "Lookups in the verified access token cache",
+    ["result"],
+)
 
 
 class TokenError(HTTPException):
@@ -46,56 +51,105 @@ class AccessContext:
         return any(role in expected_lower for role in self.roles)
 
 
-def _get_jwk_client(jwks_url: str) -> PyJWKClient:
-    client = _JWK_CLIENT_CACHE.get(jwks_url)
-    if client is None:
-        client = PyJWKClient(jwks_url)
-        _JWK_CLIENT_CACHE[jwks_url] = client
-    return client
+@dataclass(slots=True, frozen=True)
+class _VerifiedToken:
+    """Access context of a token whose signature and claims were already checked."""
+
+    context: AccessContext
+    jwks_url: str
+    kid: str
+    expires_at: float
+
+
+def _verified_token_ttu(_key: bytes, value: _VerifiedToken, _now: float) -> float:
+    return value.expires_at
+
 
+_KEY_MANAGERS: dict[str, JWKSKeyManager] = {}
+_VERIFIED_TOKEN_CACHE: TLRUCache = TLRUCache(maxsize=4096, ttu=_verified_token_ttu, timer=time.time)
+_bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def _evict_tokens_signed_by(jwks_url: str, retired_kids: set[str]) -> None:
+    """Forget verified tokens whose signing key left the JWKS."""
+    retired = [
+        digest
+        for digest, entry in _VERIFIED_TOKEN_CACHE.items()
+        if entry.jwks_url == jwks_url and entry.kid in retired_kids
+    ]
+    for digest in retired:
+        _VERIFIED_TOKEN_CACHE.pop(digest, None)
+
+
+def _get_key_manager(settings: Settings) -> JWKSKeyManager:
+    jwks_url = settings.kc_jwks_url
+    manager = _KEY_MANAGERS.get(jwks_url)
+    if manager is None:
+        manager = JWKSKeyManager(
+            jwks_url,
+            ttl=settings.jwks_cache_ttl_seconds,
+            refresh_ahead=settings.jwks_refresh_ahead_seconds,
+            min_refetch_interval=settings.jwks_min_refetch_interval_seconds,
+            on_rotate=lambda kids: _evict_tokens_signed_by(jwks_url, kids),
+        )
+        _KEY_MANAGERS[jwks_url] = manager
+    return manager
 
-async def _get_signing_key(token: str, settings: Settings) -> PyJWK:
+
+async def warm_up_signing_keys(settings: Settings) -> None:
+    """Prime the JWKS so that the first requests do not wait on Keycloak."""
+    try:
+        await _get_key_manager(settings).refresh()
+    except jwt.PyJWTError:
+        # Keycloak may still be starting; the first request will fetch the keys.
+        pass
+
+
+async def close_signing_keys() -> None:
+    """Release the HTTP clients held by the key managers (application shutdown)."""
+    managers = list(_KEY_MANAGERS.values())
+    _KEY_MANAGERS.clear()
+    for manager in managers:
+        await manager.aclose()
+
+
+async def _get_signing_key(token: str, settings: Settings) -> tuple[str, PyJWK]:
     headers = jwt.get_unverified_header(token)
     kid = headers.get("kid")
     alg = headers.get("alg")
     if not kid or alg != "RS256":
         raise TokenError("Unsupported token header")
 
-    cache_key = (settings.kc_jwks_url, kid)
-    signing_key = _SIGNING_KEY_CACHE.get(cache_key)
-    if signing_key is not None:
-        return signing_key
+    signing_key = await _get_key_manager(settings).get_signing_key(kid)
+    return kid, signing_key
 
-    client = _get_jwk_client(settings.kc_jwks_url)
-    signing_key = await asyncio.to_thread(client.get_signing_key_from_jwt, token)
-    _SIGNING_KEY_CACHE[cache_key] = signing_key
-    return signing_key
 
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
 
-async def get_access_context(
-    request: Request,
-    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer_scheme),
-    settings: Settings = Depends(get_settings),
-) -> AccessContext:
-    """Extract the AccessContext from the Authorization header."""
-    if credentials is None or credentials.scheme.lower() != "bearer":
-        raise TokenError("Missing bearer token")
 
-    token = credentials.credentials
-    try:
-        signing_key = await _get_signing_key(token, settings)
-        claims = jwt.decode(
-            token,
-            signing_key.key,
-            algorithms=["RS256"],
-            audience=settings.kc_audience,
-            issuer=settings.kc_issuer,
-            leeway=settings.jwt_leeway_seconds,
-            options={"require": ["exp", "iat", "nbf"]},
-        )
-    except jwt.PyJWTError as exc:
-        raise TokenError("Invalid access token") from exc
+def _remember_verified_token(
+    digest: bytes,
+    context: AccessContext,
+    kid: str,
+    settings: Settings,
+) -> None:
+    """Cache a verified context until its expiry, minus the allowed clock leeway."""
+    exp = context.claims.get("exp")
+    if not isinstance(exp, (int, float)):
+        return
+    expires_at = float(exp) - settings.jwt_leeway_seconds
+    if expires_at <= time.time():
+        return
+    _VERIFIED_TOKEN_CACHE[digest] = _VerifiedToken(
+        context=context,
+        jwks_url=settings.kc_jwks_url,
+        kid=kid,
+        expires_at=expires_at,
+    )
 
+
+def _build_access_context(token: str, claims: dict[str, object], settings: Settings) -> AccessContext:
     sub = claims.get("sub")
     if not isinstance(sub, str) or not sub:
         raise TokenError("Missing subject")
@@ -115,13 +169,49 @@ async def get_access_context(
     if isinstance(fallback_roles, list):
         roles.update(role.lower() for role in fallback_roles if isinstance(role, str))
 
-    context = AccessContext(
+    return AccessContext(
         sub=sub,
         tenant_id=tenant_id,
         roles=sorted(roles),
         token=token,
         claims=claims,
     )
+
+
+async def get_access_context(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer_scheme),
+    settings: Settings = Depends(get_settings),
+) -> AccessContext:
+    """Extract the AccessContext from the Authorization header."""
+    if credentials is None or credentials.scheme.lower() != "bearer":
+        raise TokenError("Missing bearer token")
+
+    token = credentials.credentials
+    digest = _token_digest(token)
+    cached = _VERIFIED_TOKEN_CACHE.get(digest)
+    if cached is not None:
+        TOKEN_CACHE_LOOKUPS.labels(result="hit").inc()
+        request.state.access_context = cached.context
+        return cached.context
+
+    TOKEN_CACHE_LOOKUPS.labels(result="miss").inc()
+    try:
+        kid, signing_key = await _get_signing_key(token, settings)
+        claims = jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=["RS256"],
+            audience=settings.kc_audience,
+            issuer=settings.kc_issuer,
+            leeway=settings.jwt_leeway_seconds,
+            options={"require": ["exp", "iat", "nbf"]},
+        )
+    except jwt.PyJWTError as exc:
+        raise TokenError("Invalid access token") from exc
+
+    context = _build_access_context(token, claims, settings)
+    _remember_verified_token(digest, context, kid, settings)
     request.state.access_context = context
     return context
 
@@ -154,13 +244,9 @@ async def ensure_authorized(
 ) -> None:
     """Check authorization via Casbin using both the user id and their roles."""
     domain = tenant_id or context.tenant_id or "*"
-    if await authorize(context.sub, domain, obj, act):
+    if await authorize_any([context.sub, *context.roles], domain, obj, act):
         return
 
-    for role in context.roles:
-        if await authorize(role, domain, obj, act):
-            return
-
     raise HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
         detail="Not authorised to perform this action",
@@ -23,6 +23,12 @@ class Settings(BaseSettings):
     )
 
     database_url: str = Field(..., alias="DATABASE_URL")
+    database_replica_url: str | None = Field(default=None, alias="DATABASE_REPLICA_URL")
+    read_your_writes_seconds: float = Field(5, alias="READ_YOUR_WRITES_SECONDS")
+    db_pool_size: int = Field(5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(30, alias="DB_POOL_TIMEOUT_SECONDS")
+    db_pool_recycle_seconds: int = Field(1800, alias="DB_POOL_RECYCLE_SECONDS")
     casbin_db_url: str = Field(..., alias="CASBIN_DB_URL")
     kc_url: str = Field(..., alias="KC_URL")
     kc_realm: str = Field(..., alias="KC_REALM")
@@ -31,9 +37,23 @@ class Settings(BaseSettings):
     kc_admin_client_id: str | None = Field(default=None, alias="KC_ADMIN_CLIENT_ID")
     kc_admin_client_secret: str | None = Field(default=None, alias="KC_ADMIN_CLIENT_SECRET")
     jwt_leeway_seconds: int = Field(30, alias="JWT_LEEWAY_SECONDS")
+    jwks_cache_ttl_seconds: int = Field(3600, alias="JWKS_CACHE_TTL_SECONDS")
+    jwks_refresh_ahead_seconds: int = Field(300, alias="JWKS_REFRESH_AHEAD_SECONDS")
+    jwks_min_refetch_interval_seconds: int = Field(30, alias="JWKS_MIN_REFETCH_INTERVAL_SECONDS")
     service_name: str = Field("keur-doctor-backend", alias="SERVICE_NAME")
     allow_origins: list[str] | str = Field(default="*", alias="ALLOW_ORIGINS")
     rate_limit_queries_per_min: int = Field(30, alias="RATE_LIMIT_QUERIES_PER_MIN")
+    availability_page_size_max: int = Field(500, alias="AVAILABILITY_PAGE_SIZE_MAX")
+    availability_cache_max_rows: int = Field(100_000, alias="AVAILABILITY_CACHE_MAX_ROWS")
+    availability_cache_ttl_seconds: float = Field(30, alias="AVAILABILITY_CACHE_TTL_SECONDS")
+    virtual_slots: bool = Field(False, alias="VIRTUAL_SLOTS")
+    slot_index_max_rows: int = Field(0, alias="SLOT_INDEX_MAX_ROWS")
+    slot_index_horizon_days: int = Field(92, alias="SLOT_INDEX_HORIZON_DAYS")
+    slot_index_ttl_seconds: float = Field(600, alias="SLOT_INDEX_TTL_SECONDS")
+    idempotency_key_ttl_seconds: float = Field(86_400, alias="IDEMPOTENCY_KEY_TTL_SECONDS")
+    # Expired keys of the tenant deleted by each claim of a new key (0: never purged).
+    idempotency_purge_batch: int = Field(100, alias="IDEMPOTENCY_PURGE_BATCH")
+    patient_grant_cache_size: int = Field(100_000, alias="PATIENT_GRANT_CACHE_SIZE")
     otel_exporter_otlp_endpoint: str | None = Field(
         default=None, alias="OTEL_EXPORTER_OTLP_ENDPOINT"
     )
@@ -43,6 +63,12 @@ class Settings(BaseSettings):
     port: int = Field(8000, alias="PORT")
     casbin_model_path: str = Field("casbin/model.conf", alias="CASBIN_MODEL_PATH")
     casbin_policy_path: str = Field("casbin/seed_policy.csv", alias="CASBIN_POLICY_PATH")
+    casbin_decision_cache_size: int = Field(10_000, alias="CASBIN_DECISION_CACHE_SIZE")
+    casbin_compiled_matcher: bool = Field(True, alias="CASBIN_COMPILED_MATCHER")
+    casbin_watcher_enabled: bool = Field(True, alias="CASBIN_WATCHER_ENABLED")
+    casbin_watcher_channel: str = Field("casbin_policy", alias="CASBIN_WATCHER_CHANNEL")
+    casbin_lazy_domains: bool = Field(True, alias="CASBIN_LAZY_DOMAINS")
+    casbin_domain_idle_seconds: float = Field(900, alias="CASBIN_DOMAIN_IDLE_SECONDS")
     metrics_namespace: str = Field("keur_doctor", alias="METRICS_NAMESPACE")
     pro_invite_secret: str = Field(..., alias="PRO_INVITE_SECRET")
     pro_invite_audience: str = Field("keur-doctor/pro-invite", alias="PRO_INVITE_AUDIENCE")
@@ -82,6 +108,18 @@ class Settings(BaseSettings):
             return self.casbin_db_url.replace("+asyncpg", "+psycopg")
         return self.casbin_db_url
 
+    @property
+    def casbin_dsn(self) -> str:
+        """Return the Casbin database URL without SQLAlchemy driver (for psycopg/asyncpg)."""
+        scheme, separator, rest = self.casbin_db_url.partition("://")
+        return f"{scheme.split('+', 1)[0]}{separator}{rest}"
+
+    @property
+    def database_dsn(self) -> str:
+        """Return the primary database URL without SQLAlchemy driver (for asyncpg)."""
+        scheme, separator, rest = self.database_url.partition("://")
+        return f"{scheme.split('+', 1)[0]}{separator}{rest}"
+
     def resolve_path(self, relative_path: str) -> Path:
         """Resolve a path relative to the project base directory."""
         candidate = Path(relative_path)
@@ -0,0 +1,89 @@
+"""Coalescing of identical concurrent calls ("single flight")."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable, Coroutine, Generic, Hashable, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_COALESCED = Counter(
+    "single_flight_coalesced_total",
+    "Callers that joined an identical call already in flight instead of running their own",
+    ["flight"],
+)
+SINGLE_FLIGHT_IN_FLIGHT = Gauge(
+    "single_flight_in_flight",
+    "Distinct calls currently in flight",
+    ["flight"],
+)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """Run one call per key at a time and hand its result (or error) to every caller.
+
+    The call runs in a task created by the first caller, the leader, and
+    usually uses the leader's resources (a database session, for instance).
+    A cancelled follower simply stops waiting. A cancelled leader waits for
+    the call to finish when followers still need the result, or cancels it and
+    waits for it to unwind otherwise, so the call never outlives its
+    resources; the leader's cancellation is raised afterwards.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._flights: dict[Hashable, _Flight] = {}
+        SINGLE_FLIGHT_IN_FLIGHT.labels(flight=name).set_function(lambda: len(self._flights))
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: Hashable, call: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        flight = self._flights.get(key)
+        leader = flight is None
+        if flight is None:
+            flight = _Flight(asyncio.create_task(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _task: self._forget(key, flight))
+        else:
+            SINGLE_FLIGHT_COALESCED.labels(flight=self.name).inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not leader or flight.task.done():
+                raise
+            if flight.waiters == 1:
+                # Nobody else is waiting: stop the call, and let no one join it while it unwinds.
+                self._forget(key, flight)
+                flight.task.cancel()
+            await _wait_out(flight.task)
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+async def _wait_out(task: asyncio.Task) -> None:
+    """Wait for ``task`` to finish, whatever it raises and however often we are cancelled."""
+    while not task.done():
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            continue
+    if not task.cancelled():
+        task.exception()  # retrieved: do not log "exception was never retrieved"
@@ -0,0 +1,136 @@
+"""Per-day cache of open slots, invalidated by booking events.
+
+Availability windows are served from day buckets keyed by
+``(tenant, practitioner, mode, day)``, where practitioner and mode are the
+filters of the query (None when absent) and day is the UTC date slots start
+on. A window spanning several days assembles the buckets it covers, so
+overlapping windows share their days. ``AppointmentBooked`` drops every bucket
+the booked slot could appear in and slot generation drops all the buckets of
+the tenant; a TTL bounds staleness for changes made by other workers, and the
+total number of cached slots is bounded by LRU eviction.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Callable, Optional, Sequence
+
+from cachetools import TTLCache
+from prometheus_client import Counter, Gauge
+from sqlalchemy import Row
+
+from src.core.settings import Settings, get_settings
+from ..domain.events import AppointmentBooked
+from ..domain.value_objects import SlotMode
+
+BucketKey = tuple[str, Optional[str], Optional[SlotMode], date]
+
+AVAILABILITY_CACHE_LOOKUPS = Counter(
+    "availability_cache_lookups_total",
+    "Availability day buckets looked up in the cache",
+    ["result"],
+)
+AVAILABILITY_CACHE_INVALIDATIONS = Counter(
+    "availability_cache_invalidations_total",
+    "Booking events and slot generations that invalidated availability day buckets",
+)
+
+
+class AvailabilityCache:
+    """LRU/TTL cache of availability rows per (tenant, practitioner, mode, day)."""
+
+    def __init__(
+        self, max_rows: int, ttl_seconds: float, timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        # A bucket weighs its rows plus one, so empty days count against the bound too.
+        self._buckets: TTLCache = TTLCache(
+            maxsize=max_rows, ttl=ttl_seconds, timer=timer, getsizeof=lambda rows: len(rows) + 1
+        )
+        self._generations: dict[str, int] = defaultdict(int)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._buckets.maxsize > 0
+
+    def generation(self, tenant_id: str) -> int:
+        """Token to pass to ``put``: fills started before an invalidation are dropped."""
+        return self._generations[tenant_id]
+
+    def get(self, key: BucketKey) -> Sequence[Row] | None:
+        rows = self._buckets.get(key)
+        if rows is None:
+            self.misses += 1
+            AVAILABILITY_CACHE_LOOKUPS.labels(result="miss").inc()
+        else:
+            self.hits += 1
+            AVAILABILITY_CACHE_LOOKUPS.labels(result="hit").inc()
+        return rows
+
+    def put(self, key: BucketKey, rows: Sequence[Row], generation: int) -> None:
+        # Rows read while a booking committed may already be stale.
+        if generation != self._generations[key[0]]:
+            return
+        if len(rows) + 1 <= self._buckets.maxsize:
+            self._buckets[key] = tuple(rows)
+
+    def invalidate(self, event: AppointmentBooked) -> None:
+        """Drop the buckets the booked slot belongs to: with and without each filter."""
+        tenant_id = event.tenant_id
+        day = bucket_day(event.slot_starts_at)
+        self._generations[tenant_id] += 1
+        for practitioner_id in (None, event.practitioner_id):
+            for mode in (None, event.slot_mode):
+                self._buckets.pop((tenant_id, practitioner_id, mode, day), None)
+        AVAILABILITY_CACHE_INVALIDATIONS.inc()
+
+    def invalidate_tenant(self, tenant_id: str) -> None:
+        """Drop every bucket of ``tenant_id``, for changes that are not a single slot."""
+        self._generations[tenant_id] += 1
+        for key in [key for key in self._buckets if key[0] == tenant_id]:
+            self._buckets.pop(key, None)
+        AVAILABILITY_CACHE_INVALIDATIONS.inc()
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def rows(self) -> int:
+        return int(self._buckets.currsize)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def bucket_day(moment: datetime) -> date:
+    return moment.astimezone(timezone.utc).date()
+
+
+_cache: AvailabilityCache | None = None
+
+
+def get_availability_cache(settings: Settings | None = None) -> AvailabilityCache:
+    """Process-wide availability cache, sized from the settings on first use."""
+    global _cache
+    if _cache is None:
+        settings = settings or get_settings()
+        _cache = AvailabilityCache(
+            max_rows=settings.availability_cache_max_rows,
+            ttl_seconds=settings.availability_cache_ttl_seconds,
+        )
+    return _cache
+
+
+Gauge(
+    "availability_cache_hit_ratio",
+    "Share of availability day buckets served from the cache",
+).set_function(lambda: _cache.hit_ratio if _cache else 0.0)
+Gauge(
+    "availability_cache_rows",
+    "Slots held in the availability cache",
+).set_function(lambda: _cache.rows if _cache else 0)
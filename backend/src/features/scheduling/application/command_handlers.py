@@ -5,8 +5,15 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 from ..domain.events import AppointmentBooked
-from .commands import BookAppointmentCommand
+from .commands import (
+    BookAppointmentCommand,
+    BookAppointmentSeriesCommand,
+    CreateScheduleTemplateCommand,
+    GenerateSlotsCommand,
+)
 from ..domain.entities import Appointment as DomainAppointment
+from ..domain.entities import ScheduleTemplate as DomainScheduleTemplate
+from ..domain.entities import Slot as DomainSlot
 from ..domain.value_objects import SlotMode
 from ..infra.repositories import SchedulingRepository, SlotNotAvailableError
 
@@ -16,17 +23,76 @@ class BookAppointmentHandler:
     repository: SchedulingRepository
 
     async def handle(self, command: BookAppointmentCommand) -> tuple[DomainAppointment, AppointmentBooked]:
-        appointment = await self.repository.create_appointment(
+        appointment, slot = await self.repository.create_appointment(
             tenant_id=command.tenant_id,
             slot_id=command.slot_id,
             patient_id=command.patient_id,
             reason=command.reason,
             mode=command.mode or SlotMode.ONSITE,
         )
-        event = AppointmentBooked(
-            appointment_id=appointment.id,
-            slot_id=appointment.slot_id,
-            tenant_id=appointment.tenant_id,
-            occurred_at=appointment.created_at,
+        return appointment, _booked(appointment, slot)
+
+
+@dataclass
+class BookAppointmentSeriesHandler:
+    repository: SchedulingRepository
+
+    async def handle(
+        self, command: BookAppointmentSeriesCommand
+    ) -> list[tuple[DomainAppointment, AppointmentBooked]]:
+        """Book every slot of the series or none; one booking per slot, in order."""
+        bookings = await self.repository.create_appointment_series(
+            tenant_id=command.tenant_id,
+            slot_ids=command.slot_ids,
+            patient_id=command.patient_id,
+            reason=command.reason,
+            mode=command.mode or SlotMode.ONSITE,
+        )
+        return [(appointment, _booked(appointment, slot)) for appointment, slot in bookings]
+
+
+def _booked(appointment: DomainAppointment, slot: DomainSlot) -> AppointmentBooked:
+    return AppointmentBooked(
+        appointment_id=appointment.id,
+        slot_id=appointment.slot_id,
+        tenant_id=appointment.tenant_id,
+        occurred_at=appointment.created_at,
+        practitioner_id=slot.practitioner_id,
+        slot_starts_at=slot.starts_at,
+        slot_mode=slot.mode,
+        slot_status=slot.status,
+    )
+
+
+@dataclass
+class CreateScheduleTemplateHandler:
+    repository: SchedulingRepository
+
+    async def handle(self, command: CreateScheduleTemplateCommand) -> DomainScheduleTemplate:
+        return await self.repository.create_schedule_template(
+            tenant_id=command.tenant_id,
+            calendar_id=command.calendar_id,
+            weekdays=command.weekdays,
+            start_time=command.start_time,
+            end_time=command.end_time,
+            slot_minutes=command.slot_minutes,
+            mode=command.mode,
+            timezone=command.timezone,
+            valid_from=command.valid_from,
+            valid_until=command.valid_until,
+            capacity=command.capacity,
+        )
+
+
+@dataclass
+class GenerateSlotsHandler:
+    repository: SchedulingRepository
+
+    async def handle(self, command: GenerateSlotsCommand) -> int:
+        """Materialise the template slots of the window; return how many were added."""
+        return await self.repository.generate_slots(
+            tenant_id=command.tenant_id,
+            starts_on=command.starts_on,
+            ends_on=command.ends_on,
+            calendar_id=command.calendar_id,
         )
-        return appointment, event
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from datetime import date, time
+
 from pydantic import BaseModel, Field
 
 from ..domain.value_objects import SlotMode
@@ -14,3 +16,35 @@ class BookAppointmentCommand(BaseModel):
     reason: str | None = None
     mode: SlotMode | None = Field(default=None)
     requested_by: str
+
+
+class BookAppointmentSeriesCommand(BaseModel):
+    tenant_id: str
+    slot_ids: list[str]
+    patient_id: str
+    reason: str | None = None
+    mode: SlotMode | None = Field(default=None)
+    requested_by: str
+
+
+class CreateScheduleTemplateCommand(BaseModel):
+    tenant_id: str
+    calendar_id: str
+    weekdays: list[int]
+    start_time: time
+    end_time: time
+    slot_minutes: int
+    mode: SlotMode
+    timezone: str
+    valid_from: date
+    valid_until: date | None = None
+    capacity: int = 1
+    requested_by: str
+
+
+class GenerateSlotsCommand(BaseModel):
+    tenant_id: str
+    starts_on: date
+    ends_on: date
+    calendar_id: str | None = None
+    requested_by: str
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 
 from pydantic import BaseModel, Field
 
@@ -15,3 +15,24 @@ class FetchAvailabilitiesQuery(BaseModel):
     ends_at: datetime
     practitioner_id: str | None = None
     mode: SlotMode | None = Field(default=None)
+    # Keyset pagination: resume after this (starts_at, id) and return at most ``limit`` slots.
+    after: tuple[datetime, str] | None = None
+    limit: int | None = None
+
+
+class FetchNextAvailabilitiesQuery(BaseModel):
+    tenant_id: str
+    starts_from: datetime
+    practitioner_id: str | None = None
+    mode: SlotMode | None = Field(default=None)
+    # The first ``limit`` slots of the tenant, or of each practitioner with ``per_practitioner``.
+    limit: int = 1
+    per_practitioner: bool = False
+
+
+class FetchAvailabilitySummaryQuery(BaseModel):
+    tenant_id: str
+    starts_on: date
+    ends_on: date
+    practitioner_id: str | None = None
+    mode: SlotMode | None = Field(default=None)
@@ -3,16 +3,40 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, List, Sequence
 
+from sqlalchemy import Row
+
+from src.core.single_flight import SingleFlight
+from ..domain.entities import DailyAvailability
 from ..domain.entities import Slot as DomainSlot
 from ..infra.repositories import SchedulingRepository
-from .queries import FetchAvailabilitiesQuery
+from .availability_cache import AvailabilityCache, bucket_day
+from .slot_index import IndexedSlot, SlotIndex
+from .queries import (
+    FetchAvailabilitiesQuery,
+    FetchAvailabilitySummaryQuery,
+    FetchNextAvailabilitiesQuery,
+)
+
+
+# Longer windows bypass the availability cache and go to the database directly.
+MAX_CACHED_DAYS = 31
+
+# Identical availability queries in flight at the same time share one execution.
+availability_flights: SingleFlight[Sequence[Row]] = SingleFlight("availabilities")
 
 
 @dataclass
 class FetchAvailabilitiesHandler:
     repository: SchedulingRepository
+    cache: AvailabilityCache | None = None
+    flights: SingleFlight[Sequence[Row]] | None = None
+    index: SlotIndex | None = None
+    # Replica rows may predate the bookings that invalidated a bucket: only reads of the
+    # primary fill the cache, reads of a replica are served from it or go past it.
+    fill_cache: bool = True
 
     async def handle(self, query: FetchAvailabilitiesQuery) -> List[DomainSlot]:
         return await self.repository.list_availabilities(
@@ -21,5 +45,142 @@ class FetchAvailabilitiesHandler:
             ends_at=query.ends_at,
             practitioner_id=query.practitioner_id,
             mode=query.mode,
+            after=query.after,
+            limit=query.limit,
+        )
+
+    async def handle_rows(
+        self, query: FetchAvailabilitiesQuery
+    ) -> Sequence[Row] | Sequence[IndexedSlot]:
+        """Matching slots as ``AVAILABILITY_COLUMNS`` rows, for serialising without the ORM.
+
+        With ``flights``, concurrent identical queries on the same database get
+        the rows of a single execution; the shared sequence must not be mutated.
+        A query never joins an execution started before the last booking that
+        invalidated the cache of its tenant on this worker.
+        With ``index``, the queries it covers do not reach the database at all.
+        """
+        if self.index is not None:
+            rows = self.index.lookup(query)
+            if rows is not None:
+                return rows
+        if self.flights is None:
+            return await self._rows(query)
+        key = (
+            self.repository.session.bind,
+            query.tenant_id,
+            query.starts_at,
+            query.ends_at,
+            query.practitioner_id,
+            query.mode,
+            query.after,
+            query.limit,
+            self.cache.generation(query.tenant_id) if self.cache is not None else None,
+        )
+        return await self.flights.run(key, lambda: self._rows(query))
+
+    async def _rows(self, query: FetchAvailabilitiesQuery) -> Sequence[Row]:
+        if self._cacheable(query):
+            return await self._cached_rows(query)
+        return await self.repository.list_availability_rows(
+            tenant_id=query.tenant_id,
+            starts_at=query.starts_at,
+            ends_at=query.ends_at,
+            practitioner_id=query.practitioner_id,
+            mode=query.mode,
+            after=query.after,
+            limit=query.limit,
+        )
+
+    def stream_rows(self, query: FetchAvailabilitiesQuery) -> AsyncIterator[Row]:
+        """Yield every matching row without holding the whole window in memory."""
+        return self.repository.stream_availability_rows(
+            tenant_id=query.tenant_id,
+            starts_at=query.starts_at,
+            ends_at=query.ends_at,
+            practitioner_id=query.practitioner_id,
+            mode=query.mode,
+            after=query.after,
+        )
+
+    def _cacheable(self, query: FetchAvailabilitiesQuery) -> bool:
+        if self.cache is None or not self.cache.enabled:
+            return False
+        if query.starts_at.tzinfo is None or query.ends_at.tzinfo is None:
+            return False  # bucket days are UTC dates; naive bounds depend on the DB time zone
+        days = (bucket_day(query.ends_at) - bucket_day(query.starts_at)).days + 1
+        return 0 < days <= MAX_CACHED_DAYS
+
+    async def _cached_rows(self, query: FetchAvailabilitiesQuery) -> list[Row]:
+        cache = self.cache
+        assert cache is not None  # checked by ``_cacheable``
+        first_day = bucket_day(query.starts_at)
+        days = [
+            first_day + timedelta(days=offset)
+            for offset in range((bucket_day(query.ends_at) - first_day).days + 1)
+        ]
+        keys = {day: (query.tenant_id, query.practitioner_id, query.mode, day) for day in days}
+        buckets = {day: cache.get(key) for day, key in keys.items()}
+
+        missing = [day for day, rows in buckets.items() if rows is None]
+        if missing:
+            # One query from the first to the last missing day; days in between are refreshed.
+            generation = cache.generation(query.tenant_id)
+            fetched: dict[date, list[Row]] = {
+                day: [] for day in days if missing[0] <= day <= missing[-1]
+            }
+            for row in await self.repository.list_availability_rows_starting(
+                tenant_id=query.tenant_id,
+                starts_from=_day_start(missing[0]),
+                starts_before=_day_start(missing[-1] + timedelta(days=1)),
+                practitioner_id=query.practitioner_id,
+                mode=query.mode,
+            ):
+                fetched[bucket_day(row.starts_at)].append(row)
+            for day, rows in fetched.items():
+                buckets[day] = rows
+                if self.fill_cache:
+                    cache.put(keys[day], rows, generation)
+
+        rows = [
+            row
+            for day in days
+            for row in buckets[day] or ()  # every day is filled by now
+            if row.starts_at >= query.starts_at
+            and row.ends_at <= query.ends_at
+            and (query.after is None or (row.starts_at, row.id) > query.after)
+        ]
+        return rows[: query.limit] if query.limit is not None else rows
+
+
+@dataclass
+class FetchNextAvailabilitiesHandler:
+    repository: SchedulingRepository
+
+    async def handle_rows(self, query: FetchNextAvailabilitiesQuery) -> Sequence[Row]:
+        return await self.repository.list_next_availability_rows(
+            tenant_id=query.tenant_id,
+            starts_from=query.starts_from,
+            practitioner_id=query.practitioner_id,
+            mode=query.mode,
+            limit=query.limit,
+            per_practitioner=query.per_practitioner,
         )
 
+
+@dataclass
+class FetchAvailabilitySummaryHandler:
+    repository: SchedulingRepository
+
+    async def handle(self, query: FetchAvailabilitySummaryQuery) -> List[DailyAvailability]:
+        return await self.repository.availability_summary(
+            tenant_id=query.tenant_id,
+            starts_on=query.starts_on,
+            ends_on=query.ends_on,
+            practitioner_id=query.practitioner_id,
+            mode=query.mode,
+        )
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
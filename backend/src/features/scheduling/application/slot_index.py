@@ -0,0 +1,379 @@
+"""In-process interval index of open slots, kept fresh by slot change notifications.
+
+The open slots of a tenant over ``[today, today + horizon)`` are loaded on the
+first availability query that fits in that window, in the background: until
+then, and for windows the index does not cover, queries go to the database. Per
+tenant, slots are kept in lists sorted by ``(starts_at, id)``, one for the
+tenant and one per practitioner, so a lookup is a bisection and a short scan.
+
+Every change of ``slots`` or ``schedule_templates`` is notified on the
+``slot_changes`` channel (see the ``202610171300`` migration) and applied by
+``SlotChangeListener``: changed slots are patched in, larger changes and
+deletions drop the tenant until its next load. Bookings made by this worker are
+applied right after their commit. Loaded tenants are also dropped after a TTL,
+which bounds the staleness left by missed notifications. The number of indexed
+slots is bounded by LRU eviction of whole tenants.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable, NamedTuple, Optional, Sequence
+
+import structlog
+from prometheus_client import Counter, Gauge
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.core.db import tenant_session
+from src.core.settings import Settings, get_settings
+from ..domain.events import AppointmentBooked
+from ..domain.value_objects import SlotStatus
+from ..infra.repositories import SchedulingRepository
+from ..infra.slot_changes import SlotChangeListener
+from .queries import FetchAvailabilitiesQuery
+
+logger = structlog.get_logger(__name__)
+
+SLOT_INDEX_LOOKUPS = Counter(
+    "slot_index_lookups_total",
+    "Availability queries answered by the slot index (hit) or by the database (cold, bypass)",
+    ["result"],
+)
+SLOT_INDEX_CHANGES = Counter(
+    "slot_index_changes_total",
+    "Slot changes applied to the slot index, patched in place or by dropping the tenant",
+    ["action"],
+)
+
+
+class IndexedSlot(NamedTuple):
+    """An open slot, shaped like the ``AVAILABILITY_COLUMNS`` rows of the repository."""
+
+    id: str
+    starts_at: datetime
+    ends_at: datetime
+    practitioner_id: str
+    mode: str
+    status: str
+
+
+# Slot change published on ``slot_changes``: the tenant and its changed slots, or None
+# when the tenant must be read again.
+SlotChange = tuple[str, Optional[list[IndexedSlot]]]
+# Reads the open slots of a tenant starting in [starts_from, starts_before).
+FetchSlots = Callable[[str, datetime, datetime], Awaitable[Sequence[Sequence]]]
+
+
+def _key(slot: IndexedSlot) -> tuple[datetime, str]:
+    return slot.starts_at, slot.id
+
+
+class TenantSlots:
+    """Open slots of one tenant starting in [starts_from, starts_before)."""
+
+    def __init__(
+        self,
+        starts_from: datetime,
+        starts_before: datetime,
+        slots: Iterable[IndexedSlot],
+        loaded_at: float,
+    ) -> None:
+        self.starts_from = starts_from
+        self.starts_before = starts_before
+        self.loaded_at = loaded_at
+        self._by_id: dict[str, IndexedSlot] = {}
+        # None holds every slot of the tenant, the other keys the slots of one practitioner.
+        self._sorted: dict[str | None, list[IndexedSlot]] = {None: []}
+        for slot in sorted(slots, key=_key):
+            self._by_id[slot.id] = slot
+            self._sorted[None].append(slot)
+            self._sorted.setdefault(slot.practitioner_id, []).append(slot)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, slot_id: str) -> bool:
+        return slot_id in self._by_id
+
+    def covers(self, query: FetchAvailabilitiesQuery) -> bool:
+        # Slots end after they start: those ending by ends_at start before starts_before.
+        return query.starts_at >= self.starts_from and query.ends_at <= self.starts_before
+
+    def find(self, query: FetchAvailabilitiesQuery) -> list[IndexedSlot]:
+        """Slots of the query, in the order and page ``list_availability_rows`` returns."""
+        slots = self._sorted.get(query.practitioner_id, ())
+        if query.after is not None and query.after >= (query.starts_at, ""):
+            first = bisect_right(slots, query.after, key=_key)
+        else:
+            first = bisect_left(slots, (query.starts_at, ""), key=_key)
+        mode = query.mode.value if query.mode is not None else None
+        found: list[IndexedSlot] = []
+        for position in range(first, len(slots)):
+            slot = slots[position]
+            if slot.starts_at >= query.ends_at or len(found) == query.limit:
+                break
+            if slot.ends_at <= query.ends_at and (mode is None or slot.mode == mode):
+                found.append(slot)
+        return found
+
+    def put(self, slot: IndexedSlot) -> int:
+        """Store the new state of ``slot``; return the change in the number of slots."""
+        removed = self.remove(slot.id)
+        if slot.status != SlotStatus.OPEN.value or not (
+            self.starts_from <= slot.starts_at < self.starts_before
+        ):
+            return removed
+        self._by_id[slot.id] = slot
+        insort(self._sorted[None], slot, key=_key)
+        insort(self._sorted.setdefault(slot.practitioner_id, []), slot, key=_key)
+        return removed + 1
+
+    def remove(self, slot_id: str) -> int:
+        slot = self._by_id.pop(slot_id, None)
+        if slot is None:
+            return 0
+        for slots in (self._sorted[None], self._sorted[slot.practitioner_id]):
+            del slots[bisect_left(slots, _key(slot), key=_key)]
+        return -1
+
+
+class SlotIndex:
+    """Open slots of the most recently queried tenants, at most ``max_rows`` in all."""
+
+    def __init__(
+        self,
+        max_rows: int,
+        horizon_days: int,
+        ttl_seconds: float,
+        fetch: FetchSlots,
+        virtual_slots: bool = False,
+        timer: Callable[[], float] = time.monotonic,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        self.max_rows = max_rows
+        self._horizon = timedelta(days=horizon_days)
+        self._ttl = ttl_seconds
+        self._fetch = fetch
+        # Virtual slots have no row: a change to a slot the index does not know may
+        # hide a virtual one, so it drops the tenant.
+        self._virtual_slots = virtual_slots
+        self._timer = timer
+        self._now = now
+        self._tenants: OrderedDict[str, TenantSlots] = OrderedDict()
+        self._loads: dict[str, asyncio.Task[bool]] = {}
+        self._generations: dict[str, int] = defaultdict(int)
+        self.rows = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_rows > 0
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def lookup(self, query: FetchAvailabilitiesQuery) -> list[IndexedSlot] | None:
+        """Slots of the query from the index, or None when the database must answer it.
+
+        A query the index could answer for a tenant it has not loaded starts the load.
+        """
+        if query.starts_at.tzinfo is None or query.ends_at.tzinfo is None:
+            SLOT_INDEX_LOOKUPS.labels(result="bypass").inc()
+            return None
+        tenant = self._tenants.get(query.tenant_id)
+        if tenant is not None and self._timer() - tenant.loaded_at >= self._ttl:
+            self.drop_tenant(query.tenant_id)
+            tenant = None
+        if tenant is None:
+            starts_from, starts_before = self._window()
+            if query.starts_at >= starts_from and query.ends_at <= starts_before:
+                SLOT_INDEX_LOOKUPS.labels(result="cold").inc()
+                self._start_load(query.tenant_id)
+            else:
+                SLOT_INDEX_LOOKUPS.labels(result="bypass").inc()
+            return None
+        if not tenant.covers(query):
+            SLOT_INDEX_LOOKUPS.labels(result="bypass").inc()
+            return None
+        self._tenants.move_to_end(query.tenant_id)
+        SLOT_INDEX_LOOKUPS.labels(result="hit").inc()
+        return tenant.find(query)
+
+    async def load(self, tenant_id: str) -> bool:
+        """Read the open slots of ``tenant_id`` into the index; False when they were not
+        stored: too many, changed while they were read, or unreadable."""
+        generation = self._generations[tenant_id]
+        starts_from, starts_before = self._window()
+        try:
+            rows = await self._fetch(tenant_id, starts_from, starts_before)
+        except (SQLAlchemyError, OSError) as exc:  # pragma: no cover - the database answers
+            logger.warning("slot_index_load_failed", tenant_id=tenant_id, error=str(exc))
+            return False
+        if generation != self._generations[tenant_id] or len(rows) > self.max_rows:
+            return False
+        self.drop_tenant(tenant_id)
+        self._tenants[tenant_id] = TenantSlots(
+            starts_from, starts_before, (IndexedSlot(*row) for row in rows), self._timer()
+        )
+        self.rows += len(rows)
+        self._evict()
+        return True
+
+    def apply(self, change: SlotChange) -> None:
+        """Apply a change notified on ``slot_changes``."""
+        tenant_id, slots = change
+        # A load in flight may have read the slots before this change.
+        self._generations[tenant_id] += 1
+        tenant = self._tenants.get(tenant_id)
+        if tenant is None:
+            return
+        if slots is None or (self._virtual_slots and any(slot.id not in tenant for slot in slots)):
+            self.drop_tenant(tenant_id)
+            SLOT_INDEX_CHANGES.labels(action="reload").inc()
+            return
+        for slot in slots:
+            self.rows += tenant.put(slot)
+        self._evict()
+        SLOT_INDEX_CHANGES.labels(action="patch").inc()
+
+    def apply_booking(self, event: AppointmentBooked) -> None:
+        """Remove the booked slot once full, without waiting for its notification."""
+        tenant = self._tenants.get(event.tenant_id)
+        if tenant is not None and event.slot_status != SlotStatus.OPEN:
+            self._generations[event.tenant_id] += 1
+            self.rows += tenant.remove(event.slot_id)
+
+    def drop_tenant(self, tenant_id: str) -> None:
+        tenant = self._tenants.pop(tenant_id, None)
+        if tenant is not None:
+            self.rows -= len(tenant)
+
+    def clear(self) -> None:
+        """Forget every tenant, e.g. after notifications may have been missed."""
+        for tenant_id in list(self._tenants):
+            self._generations[tenant_id] += 1
+            self.drop_tenant(tenant_id)
+
+    @property
+    def approximate_bytes(self) -> int:
+        return self.rows * SLOT_BYTES
+
+    def _window(self) -> tuple[datetime, datetime]:
+        starts_from = _day_start(self._now().date())
+        return starts_from, starts_from + self._horizon
+
+    def _start_load(self, tenant_id: str) -> None:
+        if tenant_id in self._loads:
+            return
+        task = asyncio.get_running_loop().create_task(self.load(tenant_id))
+        self._loads[tenant_id] = task
+        task.add_done_callback(lambda _task: self._loads.pop(tenant_id, None))
+
+    def _evict(self) -> None:
+        while self.rows > self.max_rows and self._tenants:
+            self.drop_tenant(next(iter(self._tenants)))
+
+
+def parse_slot_change(payload: str) -> SlotChange:
+    """Read a ``slot_changes`` notification (see the ``202610171300`` migration)."""
+    change = json.loads(payload)
+    if change.get("reload"):
+        return change["tenant_id"], None
+    return change["tenant_id"], [
+        IndexedSlot(
+            slot_id,
+            datetime.fromisoformat(starts_at).astimezone(timezone.utc),
+            datetime.fromisoformat(ends_at).astimezone(timezone.utc),
+            practitioner_id,
+            mode,
+            status,
+        )
+        for slot_id, starts_at, ends_at, practitioner_id, mode, status in change["slots"]
+    ]
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def _slot_bytes() -> int:
+    """Approximate memory of one indexed slot: the tuple, its own strings and datetimes,
+    and its entries in the id map and the two sorted lists."""
+    moment = datetime.now(timezone.utc)
+    slot = IndexedSlot("0" * 36, moment, moment, "0" * 36, "onsite", "open")
+    own = sum(
+        sys.getsizeof(value) for value in (slot, slot.id, moment, moment, slot.practitioner_id)
+    )
+    # Dict entries cost about three words, list entries one (open addressing and slack aside).
+    return own + 8 * 3 + 8 * 2
+
+
+SLOT_BYTES = _slot_bytes()
+
+_index: SlotIndex | None = None
+_listener: SlotChangeListener | None = None
+
+
+def get_slot_index(settings: Settings | None = None) -> SlotIndex:
+    """Process-wide slot index, sized from the settings on first use."""
+    global _index
+    if _index is None:
+        settings = settings or get_settings()
+
+        async def fetch(tenant_id: str, starts_from: datetime, starts_before: datetime):
+            async with tenant_session(tenant_id) as session:
+                repository = SchedulingRepository(session, virtual_slots=settings.virtual_slots)
+                return await repository.list_availability_rows_starting(
+                    tenant_id, starts_from, starts_before, None, None
+                )
+
+        _index = SlotIndex(
+            max_rows=settings.slot_index_max_rows,
+            horizon_days=settings.slot_index_horizon_days,
+            ttl_seconds=settings.slot_index_ttl_seconds,
+            fetch=fetch,
+            virtual_slots=settings.virtual_slots,
+        )
+    return _index
+
+
+async def start_slot_index(settings: Settings | None = None) -> None:
+    """Listen to slot changes when the slot index is enabled (application startup)."""
+    global _listener
+    settings = settings or get_settings()
+    index = get_slot_index(settings)
+    if index.enabled and _listener is None:
+        _listener = SlotChangeListener(
+            settings.database_dsn,
+            on_change=lambda payload: index.apply(parse_slot_change(payload)),
+            on_reconnect=index.clear,
+        )
+        await _listener.start()
+
+
+async def close_slot_index() -> None:
+    """Stop listening and drop the index (application shutdown)."""
+    global _index, _listener
+    if _listener is not None:
+        await _listener.stop()
+    _listener = None
+    _index = None
+
+
+Gauge(
+    "slot_index_rows",
+    "Open slots held in the slot index",
+).set_function(lambda: _index.rows if _index else 0)
+Gauge(
+    "slot_index_tenants",
+    "Tenants loaded in the slot index",
+).set_function(lambda: len(_index) if _index else 0)
+Gauge(
+    "slot_index_bytes",
+    "Approximate memory held by the slot index",
+).set_function(lambda: _index.approximate_bytes if _index else 0)
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime, time
 from typing import Optional
 
 from .value_objects import AppointmentStatus, SlotMode, SlotStatus
@@ -32,6 +32,33 @@ class Slot:
         return self.status == SlotStatus.OPEN
 
 
+@dataclass(slots=True)
+class ScheduleTemplate:
+    """Weekly opening hours of a calendar: one slot every ``slot_minutes`` from
+    ``start_time`` to ``end_time`` (local times in ``timezone``) on ``weekdays``."""
+
+    id: str
+    tenant_id: str
+    calendar_id: str
+    weekdays: list[int]
+    start_time: time
+    end_time: time
+    slot_minutes: int
+    mode: SlotMode
+    timezone: str
+    valid_from: date
+    valid_until: Optional[date] = None
+    capacity: int = 1
+
+
+@dataclass(slots=True)
+class DailyAvailability:
+    day: date
+    practitioner_id: str
+    mode: SlotMode
+    open_slots: int
+
+
 @dataclass(slots=True)
 class Appointment:
     id: str
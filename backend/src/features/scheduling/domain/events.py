@@ -5,6 +5,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime
 
+from .value_objects import SlotMode, SlotStatus
+
 
 @dataclass(slots=True)
 class AppointmentBooked:
@@ -12,4 +14,9 @@ class AppointmentBooked:
     slot_id: str
     tenant_id: str
     occurred_at: datetime
+    # The booked slot, so that read models can invalidate exactly what it affects.
+    practitioner_id: str
+    slot_starts_at: datetime
+    slot_mode: SlotMode
+    slot_status: SlotStatus
 
@@ -0,0 +1,115 @@
+"""Idempotency keys of the scheduling commands."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple
+
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import IdempotencyKeyDB
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    body: Any
+
+
+class IdempotencyKeyReusedError(Exception):
+    """Raised when a key comes back with another request than the one it was used for."""
+
+
+def request_hash(*parts: str) -> str:
+    """Fingerprint of a request, from the subject, command and payload that make it."""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IdempotencyStore:
+    """Keys live in ``idempotency_keys`` and are written in the transaction of the command
+    they protect: the response is stored if, and only if, the command commits.
+    """
+
+    session: AsyncSession
+
+    async def claim(
+        self, tenant_id: str, key: str, fingerprint: str, ttl: timedelta, purge: int = 0
+    ) -> StoredResponse | None:
+        """Reserve ``key`` for the current transaction (None), or return its stored response.
+
+        A key another transaction is using is unique-index locked by it, so the INSERT
+        waits for that transaction: a concurrent duplicate replays the response of the
+        first attempt once it commits, or takes the key over if it rolls back. Expired
+        keys are taken over as well, and the same statement deletes up to ``purge``
+        other expired keys of the tenant: each claim removes more keys than it adds, so
+        the table holds about a TTL worth of keys.
+        """
+        now = datetime.now(timezone.utc)
+        insert_stmt = pg_insert(IdempotencyKeyDB).values(
+            tenant_id=tenant_id,
+            key=key,
+            request_hash=fingerprint,
+            created_at=now,
+            expires_at=now + ttl,
+        )
+        claim = insert_stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKeyDB.tenant_id, IdempotencyKeyDB.key],
+            set_={
+                "request_hash": insert_stmt.excluded.request_hash,
+                "status_code": None,
+                "response": None,
+                "created_at": insert_stmt.excluded.created_at,
+                "expires_at": insert_stmt.excluded.expires_at,
+            },
+            where=IdempotencyKeyDB.expires_at <= now,
+        ).returning(IdempotencyKeyDB.key)
+        if purge > 0:
+            claim = claim.add_cte(_purge_statement(tenant_id, key, now, purge).cte("purged"))
+        if await self.session.scalar(claim) is not None:
+            return None
+
+        stored = (
+            await self.session.execute(
+                select(
+                    IdempotencyKeyDB.request_hash,
+                    IdempotencyKeyDB.status_code,
+                    IdempotencyKeyDB.response,
+                ).where(IdempotencyKeyDB.tenant_id == tenant_id, IdempotencyKeyDB.key == key)
+            )
+        ).one()
+        if stored.request_hash != fingerprint:
+            raise IdempotencyKeyReusedError("Idempotency-Key was used for another request")
+        return StoredResponse(stored.status_code, stored.response)
+
+    async def store(self, tenant_id: str, key: str, response: StoredResponse) -> None:
+        """Record the response of the command that claimed ``key``."""
+        await self.session.execute(
+            update(IdempotencyKeyDB)
+            .where(IdempotencyKeyDB.tenant_id == tenant_id, IdempotencyKeyDB.key == key)
+            .values(status_code=response.status_code, response=response.body)
+        )
+
+
+def _purge_statement(tenant_id: str, key: str, now: datetime, limit: int):
+    """DELETE of up to ``limit`` expired keys of the tenant but ``key``, oldest first.
+
+    Keys locked by another purge are skipped rather than waited for.
+    """
+    expired = (
+        select(IdempotencyKeyDB.tenant_id, IdempotencyKeyDB.key)
+        .where(
+            IdempotencyKeyDB.tenant_id == tenant_id,
+            IdempotencyKeyDB.key != key,
+            IdempotencyKeyDB.expires_at <= now,
+        )
+        .order_by(IdempotencyKeyDB.expires_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return delete(IdempotencyKeyDB).where(
+        tuple_(IdempotencyKeyDB.tenant_id, IdempotencyKeyDB.key).in_(expired)
+    )
@@ -5,9 +5,11 @@ from __future__ import annotations
 import uuid
 
 from ..domain.entities import Appointment as DomainAppointment
+from ..domain.entities import DailyAvailability
+from ..domain.entities import ScheduleTemplate as DomainScheduleTemplate
 from ..domain.entities import Slot as DomainSlot
 from ..domain.value_objects import AppointmentStatus, SlotMode, SlotStatus
-from .models import AppointmentDB, SlotDB
+from .models import AppointmentDB, ScheduleTemplateDB, SlotDB
 
 
 def generate_id() -> str:
@@ -28,6 +30,21 @@ def map_slot(model: SlotDB) -> DomainSlot:
     )
 
 
+def map_slot_row(row) -> DomainSlot:
+    """Slot from a ``SLOT_COLUMNS`` row of the repository."""
+    return DomainSlot(
+        id=row.id,
+        tenant_id=row.tenant_id,
+        calendar_id=row.calendar_id,
+        practitioner_id=row.practitioner_id,
+        starts_at=row.starts_at,
+        ends_at=row.ends_at,
+        mode=SlotMode(row.mode),
+        status=SlotStatus(row.status),
+        capacity=row.capacity,
+    )
+
+
 def map_appointment(model: AppointmentDB) -> DomainAppointment:
     return DomainAppointment(
         id=model.id,
@@ -39,3 +56,56 @@ def map_appointment(model: AppointmentDB) -> DomainAppointment:
         mode=SlotMode(model.mode),
         created_at=model.created_at,
     )
+
+
+def map_booking_row(row) -> tuple[DomainAppointment, DomainSlot]:
+    """Appointment and slot from a row of the repository's booking statement."""
+    appointment = DomainAppointment(
+        id=row.appointment_id,
+        tenant_id=row.tenant_id,
+        slot_id=row.slot_id,
+        patient_id=row.patient_id,
+        status=AppointmentStatus(row.appointment_status),
+        reason=row.reason,
+        mode=SlotMode(row.appointment_mode),
+        created_at=row.created_at,
+    )
+    slot = DomainSlot(
+        id=row.slot_id,
+        tenant_id=row.tenant_id,
+        calendar_id=row.calendar_id,
+        practitioner_id=row.practitioner_id,
+        starts_at=row.starts_at,
+        ends_at=row.ends_at,
+        mode=SlotMode(row.mode),
+        status=SlotStatus(row.status),
+        capacity=row.capacity,
+    )
+    return appointment, slot
+
+
+def map_daily_availability(row) -> DailyAvailability:
+    """Day from a row of the repository's availability summary."""
+    return DailyAvailability(
+        day=row.day,
+        practitioner_id=row.practitioner_id,
+        mode=SlotMode(row.mode),
+        open_slots=row.open_slots,
+    )
+
+
+def map_schedule_template(model: ScheduleTemplateDB) -> DomainScheduleTemplate:
+    return DomainScheduleTemplate(
+        id=model.id,
+        tenant_id=model.tenant_id,
+        calendar_id=model.calendar_id,
+        weekdays=list(model.weekdays),
+        start_time=model.start_time,
+        end_time=model.end_time,
+        slot_minutes=model.slot_minutes,
+        mode=SlotMode(model.mode),
+        timezone=model.timezone,
+        valid_from=model.valid_from,
+        valid_until=model.valid_until,
+        capacity=model.capacity,
+    )
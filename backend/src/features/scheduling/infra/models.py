@@ -2,17 +2,49 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Integer, String, Text, UniqueConstraint, func
+from datetime import date, datetime, time, timezone
+from enum import Enum as PyEnum
+from typing import Any
+
+from sqlalchemy import (
+    Boolean,
+    CheckConstraint,
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    Time,
+    UniqueConstraint,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.db import Base
 from ..domain.value_objects import AppointmentStatus, SlotMode, SlotStatus
 
 
+def _enum_values(enum: type[PyEnum]) -> list[str]:
+    # The PostgreSQL enum types created by the migrations hold the lowercase values.
+    return [member.value for member in enum]
+
+
 class CalendarDB(Base):
     __tablename__ = "calendars"
+    __table_args__ = (
+        Index(
+            "ix_calendars_tenant_practitioner",
+            "tenant_id",
+            "practitioner_id",
+            postgresql_include=["id"],
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     tenant_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
@@ -25,35 +57,133 @@ class SlotDB(Base):
     __tablename__ = "slots"
     __table_args__ = (
         UniqueConstraint("calendar_id", "starts_at", name="uq_slot_calendar_starts"),
+        Index(
+            "ix_slots_open_tenant_starts",
+            "tenant_id",
+            "starts_at",
+            "id",
+            postgresql_include=["ends_at", "calendar_id", "mode", "status"],
+            postgresql_where=text("status = 'open'"),
+        ),
+        Index(
+            "ix_slots_open_calendar_starts",
+            "calendar_id",
+            "starts_at",
+            "id",
+            postgresql_include=["tenant_id", "ends_at", "mode", "status"],
+            postgresql_where=text("status = 'open'"),
+        ),
+        Index(
+            "ix_slots_not_open_tenant_starts",
+            "tenant_id",
+            "starts_at",
+            postgresql_include=["calendar_id", "mode"],
+            postgresql_where=text("status <> 'open'"),
+        ),
+        CheckConstraint(
+            "booked_count >= 0 AND booked_count <= capacity", name="ck_slots_booked_count"
+        ),
+        # ex_slots_calendar_no_overlap (tstzrange exclusion) exists where btree_gist does.
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     tenant_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
     calendar_id: Mapped[str] = mapped_column(ForeignKey("calendars.id", ondelete="CASCADE"), nullable=False)
-    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
-    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     capacity: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
-    mode: Mapped[SlotMode] = mapped_column(Enum(SlotMode, name="slot_mode"), nullable=False)
-    status: Mapped[SlotStatus] = mapped_column(Enum(SlotStatus, name="slot_status"), nullable=False, index=True)
+    # Booked appointments of the slot, maintained by the booking statement.
+    booked_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    mode: Mapped[SlotMode] = mapped_column(
+        Enum(SlotMode, name="slot_mode", values_callable=_enum_values), nullable=False
+    )
+    status: Mapped[SlotStatus] = mapped_column(
+        Enum(SlotStatus, name="slot_status", values_callable=_enum_values), nullable=False
+    )
 
     calendar: Mapped["CalendarDB"] = relationship(back_populates="slots")
     appointments: Mapped[list["AppointmentDB"]] = relationship(back_populates="slot", cascade="all, delete-orphan")
 
 
+class ScheduleTemplateDB(Base):
+    """Weekly opening hours of a calendar, expanded into slots by the slot generator."""
+
+    __tablename__ = "schedule_templates"
+    __table_args__ = (
+        CheckConstraint("slot_minutes > 0", name="ck_schedule_templates_slot_minutes"),
+        CheckConstraint("start_time < end_time", name="ck_schedule_templates_times"),
+        CheckConstraint("capacity > 0", name="ck_schedule_templates_capacity"),
+        Index("ix_schedule_templates_tenant_calendar", "tenant_id", "calendar_id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    calendar_id: Mapped[str] = mapped_column(
+        ForeignKey("calendars.id", ondelete="CASCADE"), nullable=False
+    )
+    # ISO days of the week, 1 (Monday) to 7 (Sunday).
+    weekdays: Mapped[list[int]] = mapped_column(ARRAY(SmallInteger), nullable=False)
+    # Local wall-clock times in ``timezone``; the last slot ends at or before ``end_time``.
+    start_time: Mapped[time] = mapped_column(Time, nullable=False)
+    end_time: Mapped[time] = mapped_column(Time, nullable=False)
+    slot_minutes: Mapped[int] = mapped_column(Integer, nullable=False)
+    capacity: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    mode: Mapped[SlotMode] = mapped_column(
+        Enum(SlotMode, name="slot_mode", values_callable=_enum_values), nullable=False
+    )
+    timezone: Mapped[str] = mapped_column(String(64), nullable=False)
+    valid_from: Mapped[date] = mapped_column(Date, nullable=False)
+    valid_until: Mapped[date | None] = mapped_column(Date, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
+
+
+class SlotDailyRollupDB(Base):
+    """Slots of any status per (tenant, practitioner, mode, UTC day), kept up to date by
+    triggers on ``slots`` (see the ``slot_daily_rollups`` migrations)."""
+
+    __tablename__ = "slot_daily_rollups"
+    __table_args__ = (Index("ix_slot_daily_rollups_tenant_day", "tenant_id", "day"),)
+
+    tenant_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    practitioner_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    mode: Mapped[SlotMode] = mapped_column(
+        Enum(SlotMode, name="slot_mode", values_callable=_enum_values), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    slot_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
 class AppointmentDB(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index(
+            "ix_appointments_slot_booked",
+            "slot_id",
+            "tenant_id",
+            postgresql_include=["id"],
+            postgresql_where=text("status = 'booked'"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     tenant_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
     slot_id: Mapped[str] = mapped_column(ForeignKey("slots.id", ondelete="CASCADE"), nullable=False, index=True)
     patient_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
     status: Mapped[AppointmentStatus] = mapped_column(
-        Enum(AppointmentStatus, name="appointment_status"),
+        Enum(AppointmentStatus, name="appointment_status", values_callable=_enum_values),
         nullable=False,
         default=AppointmentStatus.BOOKED,
     )
     reason: Mapped[str | None] = mapped_column(Text, nullable=True)
-    mode: Mapped[SlotMode] = mapped_column(Enum(SlotMode, name="appointment_mode"), nullable=False)
+    mode: Mapped[SlotMode] = mapped_column(
+        Enum(SlotMode, name="appointment_mode", values_callable=_enum_values), nullable=False
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
@@ -89,3 +219,21 @@ class PatientTenantGrantDB(Base):
         nullable=False,
         server_default=func.now(),
     )
+
+
+class IdempotencyKeyDB(Base):
+    """``Idempotency-Key`` of a scheduling command and the response it produced; see
+    ``IdempotencyStore``."""
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (Index("ix_idempotency_keys_expires_at", "expires_at"),)
+
+    tenant_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # SHA-256 of the subject, command and payload the key was first used with.
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Set in the transaction of the command, so committed keys always have them.
+    status_code: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    response: Mapped[Any | None] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,106 @@
+"""Per-worker cache of the (patient, tenant) grants known to be stored.
+
+Bookings write a ``patient_tenant_grants`` row before reserving the slot; once a
+pair is known to be committed, the next bookings of that patient in that tenant
+skip the statement. Pairs enter the cache when the transaction that wrote them
+commits, so a rolled back booking leaves no entry behind. Grants are never
+deleted, hence no TTL; the number of pairs is bounded by LRU eviction.
+"""
+
+from __future__ import annotations
+
+from cachetools import LRUCache
+from prometheus_client import Counter, Gauge
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.core.settings import Settings, get_settings
+
+GrantKey = tuple[str, str]
+
+PATIENT_GRANT_CACHE_LOOKUPS = Counter(
+    "patient_grant_cache_lookups_total",
+    "(patient, tenant) grants looked up in the cache before a booking",
+    ["result"],
+)
+
+_PENDING = "patient_grants_pending"
+
+
+class PatientGrantCache:
+    """LRU set of (patient_id, tenant_id) pairs with a committed grant."""
+
+    def __init__(self, maxsize: int) -> None:
+        self._grants: LRUCache = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._grants.maxsize > 0
+
+    def __contains__(self, key: GrantKey) -> bool:
+        if self._grants.get(key) is None:
+            self.misses += 1
+            PATIENT_GRANT_CACHE_LOOKUPS.labels(result="miss").inc()
+            return False
+        self.hits += 1
+        PATIENT_GRANT_CACHE_LOOKUPS.labels(result="hit").inc()
+        return True
+
+    def add(self, key: GrantKey) -> None:
+        if self.enabled:
+            self._grants[key] = True
+
+    def add_on_commit(self, session: AsyncSession, key: GrantKey) -> None:
+        """Add ``key`` once the transaction of ``session`` commits."""
+        pending: set[GrantKey] | None = session.info.get(_PENDING)
+        if pending is None:
+            pending = session.info[_PENDING] = set()
+            sync_session = session.sync_session
+
+            @event.listens_for(sync_session, "after_commit")
+            def _committed(_session: Session) -> None:
+                for committed in pending:
+                    self.add(committed)
+                pending.clear()
+
+            @event.listens_for(sync_session, "after_rollback")
+            def _rolled_back(_session: Session) -> None:
+                pending.clear()
+
+        pending.add(key)
+
+    def clear(self) -> None:
+        self._grants.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._grants)
+
+
+_cache: PatientGrantCache | None = None
+
+
+def get_patient_grant_cache(settings: Settings | None = None) -> PatientGrantCache:
+    """Process-wide grant cache, sized from the settings on first use."""
+    global _cache
+    if _cache is None:
+        settings = settings or get_settings()
+        _cache = PatientGrantCache(maxsize=settings.patient_grant_cache_size)
+    return _cache
+
+
+Gauge(
+    "patient_grant_cache_hit_ratio",
+    "Share of bookings whose patient grant was known without a database round trip",
+).set_function(lambda: _cache.hit_ratio if _cache else 0.0)
+Gauge(
+    "patient_grant_cache_entries",
+    "(patient, tenant) grants held in the patient grant cache",
+).set_function(lambda: len(_cache) if _cache else 0)
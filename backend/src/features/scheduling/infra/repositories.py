@@ -2,20 +2,100 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Sequence
+import typing
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from typing import AsyncIterator, Sequence
 
-from sqlalchemy import Select, func, select
+from sqlalchemy import (
+    BigInteger,
+    CompoundSelect,
+    Date,
+    DateTime,
+    Integer,
+    Interval,
+    Row,
+    Select,
+    String,
+    case,
+    cast,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    tuple_,
+    type_coerce,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import UUID, distinct_on
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import CursorResult
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from ..domain.entities import Appointment as DomainAppointment
+from ..domain.entities import DailyAvailability
+from ..domain.entities import ScheduleTemplate as DomainScheduleTemplate
 from ..domain.entities import Slot as DomainSlot
 from ..domain.value_objects import AppointmentStatus, SlotMode, SlotStatus
 from . import mappers
-from .models import AppointmentDB, SlotDB, PatientTenantGrantDB
+from .models import (
+    AppointmentDB,
+    CalendarDB,
+    PatientTenantGrantDB,
+    ScheduleTemplateDB,
+    SlotDB,
+    SlotDailyRollupDB,
+)
+from .patient_grants import PatientGrantCache
+
+
+# Rows fetched per round trip when streaming availabilities.
+STREAM_BATCH_SIZE = 500
+# Columns of the availability read path, named and ordered like ``AvailabilityDTO``.
+# Enums are read as their raw string values: the JSON encoder needs nothing else.
+AVAILABILITY_COLUMNS = (
+    SlotDB.id,
+    SlotDB.starts_at,
+    SlotDB.ends_at,
+    CalendarDB.practitioner_id,
+    type_coerce(SlotDB.mode, String).label("mode"),
+    type_coerce(SlotDB.status, String).label("status"),
+)
+
+# Columns of the availability rows of virtual slot mode, named like ``Slot``'s fields.
+SLOT_COLUMNS = (
+    "id",
+    "tenant_id",
+    "calendar_id",
+    "practitioner_id",
+    "starts_at",
+    "ends_at",
+    "mode",
+    "status",
+    "capacity",
+)
+
+# With virtual slots, how far the next availabilities are searched: templates have no
+# index to stop at the first slots, so the expansion needs a bound.
+NEXT_AVAILABLE_VIRTUAL_DAYS = 28
+
+# Calendars whose templates are expanded by one INSERT of the slot generator.
+GENERATION_BATCH_CALENDARS = 100
+GENERATED_SLOT_COLUMNS = (
+    "id",
+    "tenant_id",
+    "calendar_id",
+    "starts_at",
+    "ends_at",
+    "capacity",
+    "mode",
+    "status",
+)
 
 
 class SlotNotAvailableError(Exception):
@@ -25,6 +105,196 @@ class SlotNotAvailableError(Exception):
 @dataclass
 class SchedulingRepository:
     session: AsyncSession
+    # Virtual slots: open slots are expanded from the schedule templates at query time and
+    # rows of ``slots`` (bookings, closures, manual slots) take precedence over them.
+    virtual_slots: bool = False
+    # Grants known to be stored, shared by the repositories of the worker.
+    grants: PatientGrantCache | None = None
+
+    def _availabilities_statement(
+        self,
+        tenant_id: str,
+        starts_at: datetime,
+        ends_at: datetime | None,
+        practitioner_id: str | None,
+        mode: SlotMode | None,
+        after: tuple[datetime, str] | None = None,
+        limit: int | None = None,
+        rows: bool = False,
+        starts_before: datetime | None = None,
+    ) -> Select:
+        if self.virtual_slots:
+            return self._virtual_availabilities_statement(
+                tenant_id,
+                starts_at,
+                ends_at,
+                practitioner_id,
+                mode,
+                after,
+                limit,
+                rows,
+                starts_before,
+            )
+        if rows:
+            stmt: Select = select(*AVAILABILITY_COLUMNS).join(SlotDB.calendar)
+            if practitioner_id:
+                stmt = stmt.where(CalendarDB.practitioner_id == practitioner_id)
+        else:
+            stmt = select(SlotDB).options(joinedload(SlotDB.calendar))
+            if practitioner_id:
+                stmt = stmt.where(SlotDB.calendar.has(practitioner_id=practitioner_id))
+
+        stmt = stmt.where(
+            SlotDB.tenant_id == tenant_id,
+            SlotDB.status == SlotStatus.OPEN,
+            SlotDB.starts_at >= starts_at,
+        ).order_by(SlotDB.starts_at, SlotDB.id)
+
+        if ends_at is not None:
+            stmt = stmt.where(SlotDB.ends_at <= ends_at)
+
+        if starts_before is not None:
+            stmt = stmt.where(SlotDB.starts_at < starts_before)
+
+        if mode:
+            stmt = stmt.where(SlotDB.mode == mode)
+
+        if after is not None:
+            # Keyset pagination: resume strictly after the last (starts_at, id) returned.
+            stmt = stmt.where(tuple_(SlotDB.starts_at, SlotDB.id) > tuple_(*after))
+
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        return stmt
+
+    def _virtual_availabilities_statement(
+        self,
+        tenant_id: str,
+        starts_at: datetime,
+        ends_at: datetime | None,
+        practitioner_id: str | None,
+        mode: SlotMode | None,
+        after: tuple[datetime, str] | None,
+        limit: int | None,
+        rows: bool,
+        starts_before: datetime | None,
+    ) -> Select:
+        """``_availabilities_statement`` over the open rows of ``slots`` plus virtual slots.
+
+        Rows are ``AVAILABILITY_COLUMNS`` with ``rows``, ``SLOT_COLUMNS`` otherwise.
+        """
+        stored = select(
+            SlotDB.id,
+            SlotDB.tenant_id,
+            SlotDB.calendar_id,
+            CalendarDB.practitioner_id,
+            SlotDB.starts_at,
+            SlotDB.ends_at,
+            SlotDB.mode,
+            SlotDB.status,
+            SlotDB.capacity,
+        ).join(SlotDB.calendar)
+        stored = stored.where(
+            SlotDB.tenant_id == tenant_id,
+            SlotDB.status == SlotStatus.OPEN,
+            SlotDB.starts_at >= starts_at,
+        )
+        if ends_at is not None:
+            stored = stored.where(SlotDB.ends_at <= ends_at)
+        if starts_before is not None:
+            stored = stored.where(SlotDB.starts_at < starts_before)
+        if practitioner_id:
+            stored = stored.where(CalendarDB.practitioner_id == practitioner_id)
+        if mode:
+            stored = stored.where(SlotDB.mode == mode)
+
+        virtual = self._virtual_slots_statement(
+            tenant_id, starts_at, starts_before, ends_at, practitioner_id, mode
+        )
+        slots = stored.union_all(virtual).subquery("availabilities")
+        if rows:
+            stmt = select(*_availability_columns(slots))
+        else:
+            stmt = select(*(slots.c[name] for name in SLOT_COLUMNS))
+        stmt = stmt.order_by(slots.c.starts_at, slots.c.id)
+        if after is not None:
+            stmt = stmt.where(tuple_(slots.c.starts_at, slots.c.id) > tuple_(*after))
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    def _virtual_slots_statement(
+        self,
+        tenant_id: str,
+        starts_from: datetime,
+        starts_before: datetime | None,
+        ends_at: datetime | None,
+        practitioner_id: str | None,
+        mode: SlotMode | None,
+    ) -> Select:
+        """``SLOT_COLUMNS`` of the template slots starting in the window that no row of
+        ``slots`` replaces (same calendar and start), exactly as the generator would have
+        written them: where templates share a start, the lowest template id wins.
+        """
+        window_end = starts_before if starts_before is not None else ends_at
+        if window_end is None:
+            raise ValueError("Virtual slots need starts_before or ends_at")
+        criteria = []
+        if practitioner_id:
+            criteria.append(
+                ScheduleTemplateDB.calendar_id.in_(
+                    select(CalendarDB.id).where(
+                        CalendarDB.tenant_id == tenant_id,
+                        CalendarDB.practitioner_id == practitioner_id,
+                    )
+                )
+            )
+        # Local days may start up to 14 hours away from UTC midnight.
+        expansion = self._template_expansion(
+            tenant_id,
+            (starts_from - timedelta(days=1)).date(),
+            (window_end + timedelta(days=1)).date(),
+            *criteria,
+        ).subquery("expansion")
+        template_slots = (
+            select(expansion)
+            .ext(distinct_on(expansion.c.calendar_id, expansion.c.starts_at))
+            .order_by(expansion.c.calendar_id, expansion.c.starts_at, expansion.c.template_id)
+            .subquery("template_slots")
+        )
+        stmt = (
+            select(
+                _template_slot_id(template_slots.c.calendar_id, template_slots.c.starts_at).label(
+                    "id"
+                ),
+                template_slots.c.tenant_id,
+                template_slots.c.calendar_id,
+                CalendarDB.practitioner_id,
+                template_slots.c.starts_at,
+                template_slots.c.ends_at,
+                template_slots.c.mode,
+                literal(SlotStatus.OPEN, SlotDB.status.type).label("status"),
+                template_slots.c.capacity,
+            )
+            .join(CalendarDB, CalendarDB.id == template_slots.c.calendar_id)
+            .where(
+                template_slots.c.starts_at >= starts_from,
+                ~select(SlotDB.id)
+                .where(
+                    SlotDB.calendar_id == template_slots.c.calendar_id,
+                    SlotDB.starts_at == template_slots.c.starts_at,
+                )
+                .exists(),
+            )
+        )
+        if starts_before is not None:
+            stmt = stmt.where(template_slots.c.starts_at < starts_before)
+        if ends_at is not None:
+            stmt = stmt.where(template_slots.c.ends_at <= ends_at)
+        if mode:
+            stmt = stmt.where(template_slots.c.mode == mode)
+        return stmt
 
     async def list_availabilities(
         self,
@@ -33,28 +303,423 @@ class SchedulingRepository:
         ends_at: datetime,
         practitioner_id: str | None,
         mode: SlotMode | None,
+        after: tuple[datetime, str] | None = None,
+        limit: int | None = None,
     ) -> list[DomainSlot]:
-        stmt: Select = (
-            select(SlotDB)
-            .options(joinedload(SlotDB.calendar))
+        stmt = self._availabilities_statement(
+            tenant_id, starts_at, ends_at, practitioner_id, mode, after=after, limit=limit
+        )
+        result = await self.session.execute(stmt)
+        if self.virtual_slots:
+            return [mappers.map_slot_row(row) for row in result]
+        slots: Sequence[SlotDB] = result.scalars().all()
+        return [mappers.map_slot(slot) for slot in slots]
+
+    async def list_availability_rows(
+        self,
+        tenant_id: str,
+        starts_at: datetime,
+        ends_at: datetime,
+        practitioner_id: str | None,
+        mode: SlotMode | None,
+        after: tuple[datetime, str] | None = None,
+        limit: int | None = None,
+    ) -> Sequence[Row]:
+        """Same slots as ``list_availabilities``, as plain ``AVAILABILITY_COLUMNS`` rows."""
+        stmt = self._availabilities_statement(
+            tenant_id,
+            starts_at,
+            ends_at,
+            practitioner_id,
+            mode,
+            after=after,
+            limit=limit,
+            rows=True,
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def list_availability_rows_starting(
+        self,
+        tenant_id: str,
+        starts_from: datetime,
+        starts_before: datetime,
+        practitioner_id: str | None,
+        mode: SlotMode | None,
+    ) -> Sequence[Row]:
+        """Rows of the open slots starting in [starts_from, starts_before), wherever they end."""
+        stmt = self._availabilities_statement(
+            tenant_id,
+            starts_from,
+            None,
+            practitioner_id,
+            mode,
+            rows=True,
+            starts_before=starts_before,
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def stream_availability_rows(
+        self,
+        tenant_id: str,
+        starts_at: datetime,
+        ends_at: datetime,
+        practitioner_id: str | None,
+        mode: SlotMode | None,
+        after: tuple[datetime, str] | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> AsyncIterator[Row]:
+        """Yield availability rows read through a server-side cursor, ``batch_size`` at a time."""
+        stmt = self._availabilities_statement(
+            tenant_id, starts_at, ends_at, practitioner_id, mode, after=after, rows=True
+        ).execution_options(yield_per=batch_size)
+        result = await self.session.stream(stmt)
+        async for row in result:
+            yield row
+
+    async def list_next_availability_rows(
+        self,
+        tenant_id: str,
+        starts_from: datetime,
+        practitioner_id: str | None,
+        mode: SlotMode | None,
+        limit: int,
+        per_practitioner: bool = False,
+    ) -> Sequence[Row]:
+        """``AVAILABILITY_COLUMNS`` rows of the first ``limit`` open slots starting from
+        ``starts_from``, across the tenant or, with ``per_practitioner``, of each practitioner,
+        ordered by (starts_at, id)."""
+        stmt = self._next_availabilities_statement(
+            tenant_id, starts_from, practitioner_id, mode, limit, per_practitioner
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    def _next_availabilities_statement(
+        self,
+        tenant_id: str,
+        starts_from: datetime,
+        practitioner_id: str | None,
+        mode: SlotMode | None,
+        limit: int,
+        per_practitioner: bool,
+    ) -> Select:
+        """Each calendar contributes its own first ``limit`` slots through a LATERAL subquery
+        that reads ``ix_slots_open_calendar_starts`` from ``starts_from`` and stops there, so
+        the cost follows the number of calendars, not how far ahead the slots are.
+
+        With virtual slots the search stops ``NEXT_AVAILABLE_VIRTUAL_DAYS`` after
+        ``starts_from``, for the stored slots too, so that both are searched alike.
+        """
+        starts_before = None
+        if self.virtual_slots:
+            starts_before = starts_from + timedelta(days=NEXT_AVAILABLE_VIRTUAL_DAYS)
+
+        first_slots = (
+            select(SlotDB.id, SlotDB.starts_at, SlotDB.ends_at, SlotDB.mode, SlotDB.status)
             .where(
+                SlotDB.calendar_id == CalendarDB.id,
                 SlotDB.tenant_id == tenant_id,
                 SlotDB.status == SlotStatus.OPEN,
-                SlotDB.starts_at >= starts_at,
-                SlotDB.ends_at <= ends_at,
+                SlotDB.starts_at >= starts_from,
             )
-            .order_by(SlotDB.starts_at)
+            .order_by(SlotDB.starts_at, SlotDB.id)
+            .limit(limit)
         )
+        if starts_before is not None:
+            first_slots = first_slots.where(SlotDB.starts_at < starts_before)
+        if mode:
+            first_slots = first_slots.where(SlotDB.mode == mode)
+        lateral = first_slots.lateral("first_slots")
 
+        stored = (
+            select(
+                lateral.c.id,
+                lateral.c.starts_at,
+                lateral.c.ends_at,
+                CalendarDB.practitioner_id,
+                lateral.c.mode,
+                lateral.c.status,
+            )
+            .select_from(CalendarDB)
+            .join(lateral, literal(True))
+            .where(CalendarDB.tenant_id == tenant_id)
+        )
         if practitioner_id:
-            stmt = stmt.where(SlotDB.calendar.has(practitioner_id=practitioner_id))
+            stored = stored.where(CalendarDB.practitioner_id == practitioner_id)
+        stmt: Select | CompoundSelect = stored
+        if self.virtual_slots:
+            virtual = self._virtual_slots_statement(
+                tenant_id, starts_from, starts_before, None, practitioner_id, mode
+            ).subquery("virtual_slots")
+            stmt = stored.union_all(
+                select(
+                    virtual.c.id,
+                    virtual.c.starts_at,
+                    virtual.c.ends_at,
+                    virtual.c.practitioner_id,
+                    virtual.c.mode,
+                    virtual.c.status,
+                )
+            )
+        slots = stmt.subquery("next_slots")
 
-        if mode:
-            stmt = stmt.where(SlotDB.mode == mode)
+        if per_practitioner:
+            rank = func.row_number().over(
+                partition_by=slots.c.practitioner_id, order_by=(slots.c.starts_at, slots.c.id)
+            )
+            ranked = select(slots, rank.label("rank")).subquery("ranked")
+            return (
+                select(*_availability_columns(ranked))
+                .where(ranked.c.rank <= limit)
+                .order_by(ranked.c.starts_at, ranked.c.id)
+            )
+        return (
+            select(*_availability_columns(slots))
+            .order_by(slots.c.starts_at, slots.c.id)
+            .limit(limit)
+        )
+
+    async def availability_summary(
+        self,
+        tenant_id: str,
+        starts_on: date,
+        ends_on: date,
+        practitioner_id: str | None,
+        mode: SlotMode | None,
+    ) -> list[DailyAvailability]:
+        """Open slots per UTC day in [starts_on, ends_on]: the slots counted by
+        ``slot_daily_rollups``, less those that are not open, plus the virtual slots.
 
+        Bookings only change the status of a slot, which leaves the rollups alone: the
+        closed slots of the window are counted here instead, from a partial index.
+        """
+        starts_from = datetime.combine(starts_on, time(), dt_timezone.utc)
+        starts_before = starts_from + timedelta(days=(ends_on - starts_on).days + 1)
+        rollups = select(
+            SlotDailyRollupDB.day,
+            SlotDailyRollupDB.practitioner_id,
+            SlotDailyRollupDB.mode,
+            SlotDailyRollupDB.slot_count.label("open_slots"),
+        ).where(
+            SlotDailyRollupDB.tenant_id == tenant_id,
+            SlotDailyRollupDB.day >= starts_on,
+            SlotDailyRollupDB.day <= ends_on,
+        )
+        if practitioner_id:
+            rollups = rollups.where(SlotDailyRollupDB.practitioner_id == practitioner_id)
+        if mode:
+            rollups = rollups.where(SlotDailyRollupDB.mode == mode)
+        slot_day = cast(func.timezone("UTC", SlotDB.starts_at), Date)
+        not_open = (
+            select(
+                slot_day.label("day"),
+                CalendarDB.practitioner_id,
+                SlotDB.mode,
+                (-func.count()).label("open_slots"),
+            )
+            .join(SlotDB.calendar)
+            .where(
+                SlotDB.tenant_id == tenant_id,
+                SlotDB.status != SlotStatus.OPEN,
+                SlotDB.starts_at >= starts_from,
+                SlotDB.starts_at < starts_before,
+            )
+            .group_by(slot_day, CalendarDB.practitioner_id, SlotDB.mode)
+        )
+        if practitioner_id:
+            not_open = not_open.where(CalendarDB.practitioner_id == practitioner_id)
+        if mode:
+            not_open = not_open.where(SlotDB.mode == mode)
+        parts = [rollups, not_open]
+        if self.virtual_slots:
+            virtual = self._virtual_slots_statement(
+                tenant_id, starts_from, starts_before, None, practitioner_id, mode
+            ).subquery("virtual_slots")
+            virtual_day = cast(func.timezone("UTC", virtual.c.starts_at), Date)
+            parts.append(
+                select(
+                    virtual_day.label("day"),
+                    virtual.c.practitioner_id,
+                    virtual.c.mode,
+                    func.count().label("open_slots"),
+                ).group_by(virtual_day, virtual.c.practitioner_id, virtual.c.mode)
+            )
+        counts = union_all(*parts).subquery("counts")
+        open_slots = cast(func.sum(counts.c.open_slots), Integer)
+        stmt = (
+            select(
+                counts.c.day,
+                counts.c.practitioner_id,
+                counts.c.mode,
+                open_slots.label("open_slots"),
+            )
+            .group_by(counts.c.day, counts.c.practitioner_id, counts.c.mode)
+            # Days whose slots are all booked or removed add up to zero.
+            .having(open_slots > 0)
+            .order_by(counts.c.day, counts.c.practitioner_id, counts.c.mode)
+        )
         result = await self.session.execute(stmt)
-        slots: Sequence[SlotDB] = result.scalars().all()
-        return [mappers.map_slot(slot) for slot in slots]
+        return [mappers.map_daily_availability(row) for row in result]
+
+    async def create_schedule_template(
+        self,
+        tenant_id: str,
+        calendar_id: str,
+        weekdays: list[int],
+        start_time: time,
+        end_time: time,
+        slot_minutes: int,
+        mode: SlotMode,
+        timezone: str,
+        valid_from: date,
+        valid_until: date | None,
+        capacity: int,
+    ) -> DomainScheduleTemplate:
+        # Foreign keys ignore row-level security: make sure the calendar is the tenant's.
+        calendar = await self.session.scalar(
+            select(CalendarDB.id).where(
+                CalendarDB.id == calendar_id, CalendarDB.tenant_id == tenant_id
+            )
+        )
+        if calendar is None:
+            raise NoResultFound("Calendar not found")
+
+        template_model = ScheduleTemplateDB(
+            id=mappers.generate_id(),
+            tenant_id=tenant_id,
+            calendar_id=calendar_id,
+            weekdays=sorted(set(weekdays)),
+            start_time=start_time,
+            end_time=end_time,
+            slot_minutes=slot_minutes,
+            capacity=capacity,
+            mode=mode,
+            timezone=timezone,
+            valid_from=valid_from,
+            valid_until=valid_until,
+        )
+        self.session.add(template_model)
+        await self.session.flush()
+        return mappers.map_schedule_template(template_model)
+
+    def _template_expansion(
+        self, tenant_id: str, starts_on: date, ends_on: date, *criteria
+    ) -> Select:
+        """Every slot the templates of ``tenant_id`` matching ``criteria`` define on
+        [starts_on, ends_on], days being local to each template, with its ``template_id``.
+
+        Everything is expanded by PostgreSQL (days, then slots within a day) so that
+        no slot travels to Python; wall-clock times become instants in the template
+        time zone, daylight saving time included.
+        """
+        template = ScheduleTemplateDB
+        slot_length = template.slot_minutes * literal_column("interval '1 minute'", Interval)
+        days = (
+            func.generate_series(
+                cast(func.greatest(template.valid_from, starts_on), DateTime),
+                cast(func.least(func.coalesce(template.valid_until, ends_on), ends_on), DateTime),
+                literal_column("interval '1 day'", Interval),
+            )
+            .table_valued("day")
+            .render_derived(name="days")
+        )
+        day = cast(days.c.day, Date)
+        local_starts = (
+            func.generate_series(
+                day + template.start_time, day + template.end_time - slot_length, slot_length
+            )
+            .table_valued("local_start")
+            .render_derived(name="local_starts")
+        )
+        starts_at = func.timezone(
+            template.timezone, local_starts.c.local_start, type_=DateTime(timezone=True)
+        )
+        return (
+            select(
+                template.id.label("template_id"),
+                template.tenant_id,
+                template.calendar_id,
+                starts_at.label("starts_at"),
+                (starts_at + slot_length).label("ends_at"),
+                template.capacity,
+                template.mode,
+            )
+            .select_from(template)
+            .join(days, literal(True))
+            .join(local_starts, literal(True))
+            .where(
+                template.tenant_id == tenant_id,
+                func.extract("isodow", days.c.day) == func.any(template.weekdays),
+                *criteria,
+            )
+        )
+
+    def _template_slots_statement(
+        self, tenant_id: str, starts_on: date, ends_on: date, calendar_ids: Sequence[str]
+    ) -> Select:
+        """``GENERATED_SLOT_COLUMNS`` of the template slots of ``calendar_ids`` on
+        [starts_on, ends_on], in the order the generator inserts them."""
+        expansion = self._template_expansion(
+            tenant_id, starts_on, ends_on, ScheduleTemplateDB.calendar_id.in_(calendar_ids)
+        )
+        # The ORDER BY keeps PostgreSQL from inlining the subquery, so each start is converted
+        # once, and feeds the indexes in key order, which is much faster than random order.
+        # Where templates share a start, the lowest template id is inserted first and wins.
+        expanded = expansion.order_by(
+            literal_column("starts_at"), ScheduleTemplateDB.calendar_id, ScheduleTemplateDB.id
+        ).subquery("expanded")
+        return select(
+            _template_slot_id(expanded.c.calendar_id, expanded.c.starts_at),
+            expanded.c.tenant_id,
+            expanded.c.calendar_id,
+            expanded.c.starts_at,
+            expanded.c.ends_at,
+            expanded.c.capacity,
+            expanded.c.mode,
+            literal(SlotStatus.OPEN, SlotDB.status.type),
+        )
+
+    async def generate_slots(
+        self,
+        tenant_id: str,
+        starts_on: date,
+        ends_on: date,
+        calendar_id: str | None = None,
+        batch_calendars: int = GENERATION_BATCH_CALENDARS,
+    ) -> int:
+        """Materialise the template slots of [starts_on, ends_on]; return how many were added.
+
+        Slots that already exist for a calendar and start time (``uq_slot_calendar_starts``)
+        or that would overlap one where ``ex_slots_calendar_no_overlap`` exists are skipped,
+        so the generator can run again over the same days. Slot ids derive from the
+        calendar and the start time: the same slot gets the same id on every run.
+        """
+        stmt = (
+            select(ScheduleTemplateDB.calendar_id)
+            .where(ScheduleTemplateDB.tenant_id == tenant_id)
+            .distinct()
+            .order_by(ScheduleTemplateDB.calendar_id)
+        )
+        if calendar_id:
+            stmt = stmt.where(ScheduleTemplateDB.calendar_id == calendar_id)
+        calendar_ids = list((await self.session.scalars(stmt)).all())
+
+        generated = 0
+        for index in range(0, len(calendar_ids), batch_calendars):
+            slots = self._template_slots_statement(
+                tenant_id, starts_on, ends_on, calendar_ids[index : index + batch_calendars]
+            )
+            # No conflict target: unique and exclusion constraint violations are both skipped.
+            insert_stmt = (
+                pg_insert(SlotDB)
+                .from_select(GENERATED_SLOT_COLUMNS, slots)
+                .on_conflict_do_nothing()
+            )
+            result = typing.cast(CursorResult, await self.session.execute(insert_stmt))
+            generated += result.rowcount
+        return generated
 
     async def create_appointment(
         self,
@@ -63,59 +728,315 @@ class SchedulingRepository:
         patient_id: str,
         reason: str | None,
         mode: SlotMode | None,
-    ) -> DomainAppointment:
-        stmt = select(SlotDB).where(SlotDB.id == slot_id, SlotDB.tenant_id == tenant_id).with_for_update()
-        result = await self.session.execute(stmt)
-        slot: SlotDB | None = result.scalars().first()
-        if slot is None:
-            raise NoResultFound("Slot not found")
+    ) -> tuple[DomainAppointment, DomainSlot]:
+        """Book ``slot_id``; return the appointment and the slot as it was booked.
 
-        if slot.status != SlotStatus.OPEN:
-            raise SlotNotAvailableError("Slot not available")
+        One statement reserves a place (``booked_count``) and inserts the appointment, so
+        the slot row stays locked from that statement to the commit only: concurrent
+        bookings of a popular slot queue for no longer. The patient grant is written first,
+        before the lock is taken.
+        """
+        await self._ensure_patient_grant(patient_id=patient_id, tenant_id=tenant_id)
+
+        stmt = self._booking_statement(tenant_id, slot_id, patient_id, reason, mode)
+        booked = (await self.session.execute(stmt)).first()
+        if (
+            booked is None
+            and self.virtual_slots
+            and await self._materialize_slot(tenant_id, slot_id)
+        ):
+            booked = (await self.session.execute(stmt)).first()
+        if booked is None:
+            raise await self._booking_error(tenant_id, slot_id)
+        return mappers.map_booking_row(booked)
 
-        appointment_count = await self.session.scalar(
-            select(func.count(AppointmentDB.id)).where(
-                AppointmentDB.slot_id == slot_id,
-                AppointmentDB.tenant_id == tenant_id,
-                AppointmentDB.status == AppointmentStatus.BOOKED,
+    def _booking_statement(
+        self,
+        tenant_id: str,
+        slot_id: str,
+        patient_id: str,
+        reason: str | None,
+        mode: SlotMode | None,
+    ) -> Select:
+        """UPDATE of the slot when it has room left, INSERT of the appointment from the
+        updated row, and the ``map_booking_row`` columns of both; no row when the slot
+        cannot be booked."""
+        reserved = (
+            update(SlotDB)
+            .where(
+                SlotDB.id == slot_id,
+                SlotDB.tenant_id == tenant_id,
+                SlotDB.status == SlotStatus.OPEN,
+                SlotDB.booked_count < SlotDB.capacity,
+            )
+            .values(
+                booked_count=SlotDB.booked_count + 1,
+                status=case(
+                    (
+                        SlotDB.booked_count + 1 >= SlotDB.capacity,
+                        literal(SlotStatus.CLOSED, SlotDB.status.type),
+                    ),
+                    else_=SlotDB.status,
+                ),
+            )
+            .returning(
+                SlotDB.id,
+                SlotDB.tenant_id,
+                SlotDB.calendar_id,
+                SlotDB.starts_at,
+                SlotDB.ends_at,
+                SlotDB.capacity,
+                SlotDB.mode,
+                SlotDB.status,
             )
+            .cte("reserved")
         )
-        if appointment_count is None:
-            appointment_count = 0
-        if appointment_count >= slot.capacity:
-            raise SlotNotAvailableError("Slot capacity reached")
-
-        appointment_model = AppointmentDB(
-            id=mappers.generate_id(),
-            tenant_id=tenant_id,
-            slot_id=slot_id,
-            patient_id=patient_id,
-            status=AppointmentStatus.BOOKED,
-            reason=reason,
-            mode=mode or slot.mode,
+        appointment_mode = (
+            literal(mode, AppointmentDB.mode.type)
+            if mode is not None
+            # Slots and appointments have an enum type each.
+            else cast(cast(reserved.c.mode, String), AppointmentDB.mode.type)
+        )
+        appointment = (
+            insert(AppointmentDB)
+            .from_select(
+                [
+                    "id",
+                    "tenant_id",
+                    "slot_id",
+                    "patient_id",
+                    "status",
+                    "reason",
+                    "mode",
+                    "created_at",
+                ],
+                select(
+                    literal(mappers.generate_id()),
+                    reserved.c.tenant_id,
+                    reserved.c.id,
+                    literal(patient_id),
+                    literal(AppointmentStatus.BOOKED, AppointmentDB.status.type),
+                    literal(reason, AppointmentDB.reason.type),
+                    appointment_mode,
+                    literal(datetime.now(dt_timezone.utc), AppointmentDB.created_at.type),
+                ),
+            )
+            .returning(
+                AppointmentDB.id,
+                AppointmentDB.patient_id,
+                AppointmentDB.status,
+                AppointmentDB.reason,
+                AppointmentDB.mode,
+                AppointmentDB.created_at,
+            )
+            .cte("appointment")
+        )
+        return (
+            select(
+                appointment.c.id.label("appointment_id"),
+                appointment.c.patient_id,
+                appointment.c.status.label("appointment_status"),
+                appointment.c.reason,
+                appointment.c.mode.label("appointment_mode"),
+                appointment.c.created_at,
+                reserved.c.id.label("slot_id"),
+                reserved.c.tenant_id,
+                reserved.c.calendar_id,
+                CalendarDB.practitioner_id,
+                reserved.c.starts_at,
+                reserved.c.ends_at,
+                reserved.c.capacity,
+                reserved.c.mode,
+                reserved.c.status,
+            )
+            .select_from(reserved)
+            .join(appointment, literal(True))
+            .join(CalendarDB, CalendarDB.id == reserved.c.calendar_id)
         )
 
-        slot.status = SlotStatus.CLOSED if appointment_count + 1 >= slot.capacity else slot.status
+    async def _booking_error(self, tenant_id: str, slot_id: str) -> Exception:
+        """Why ``slot_id`` could not be booked, read after the booking statement failed."""
+        slot = (
+            await self.session.execute(
+                select(SlotDB.status, SlotDB.booked_count, SlotDB.capacity).where(
+                    SlotDB.id == slot_id, SlotDB.tenant_id == tenant_id
+                )
+            )
+        ).first()
+        if slot is None:
+            return NoResultFound("Slot not found")
+        if slot.status == SlotStatus.OPEN and slot.booked_count >= slot.capacity:
+            return SlotNotAvailableError("Slot capacity reached")
+        return SlotNotAvailableError("Slot not available")
 
-        self.session.add(appointment_model)
-        await self.session.flush()
+    async def create_appointment_series(
+        self,
+        tenant_id: str,
+        slot_ids: Sequence[str],
+        patient_id: str,
+        reason: str | None,
+        mode: SlotMode | None,
+    ) -> list[tuple[DomainAppointment, DomainSlot]]:
+        """Book every slot of ``slot_ids`` or none of them; return the bookings in the order
+        of ``slot_ids``, which must be distinct.
 
+        The slots are locked by one SELECT ... FOR UPDATE in id order, so that series sharing
+        slots wait for one another instead of deadlocking. Their ``booked_count`` tells the
+        room left; one UPDATE then reserves a place in each and one multi-row INSERT adds
+        the appointments.
+        """
         await self._ensure_patient_grant(patient_id=patient_id, tenant_id=tenant_id)
-        return mappers.map_appointment(appointment_model)
 
-    async def _ensure_patient_grant(self, patient_id: str, tenant_id: str) -> None:
-        exists = await self.session.scalar(
-            select(PatientTenantGrantDB.patient_user_id).where(
-                PatientTenantGrantDB.patient_user_id == patient_id,
-                PatientTenantGrantDB.tenant_id == tenant_id,
+        slots = await self._lock_slots(tenant_id, slot_ids)
+        missing = [slot_id for slot_id in slot_ids if slot_id not in slots]
+        if missing and self.virtual_slots:
+            for slot_id in missing:
+                await self._materialize_slot(tenant_id, slot_id)
+            slots = await self._lock_slots(tenant_id, slot_ids)
+            missing = [slot_id for slot_id in slot_ids if slot_id not in slots]
+        if missing:
+            raise NoResultFound(f"Slots not found: {', '.join(missing)}")
+        full = [
+            slot_id
+            for slot_id in slot_ids
+            if slots[slot_id].status != SlotStatus.OPEN
+            or slots[slot_id].booked_count >= slots[slot_id].capacity
+        ]
+        if full:
+            raise SlotNotAvailableError(f"Slots not available: {', '.join(full)}")
+
+        reserved = await self.session.execute(
+            update(SlotDB)
+            .where(SlotDB.id.in_(slot_ids), SlotDB.tenant_id == tenant_id)
+            .values(
+                booked_count=SlotDB.booked_count + 1,
+                status=case(
+                    (
+                        SlotDB.booked_count + 1 >= SlotDB.capacity,
+                        literal(SlotStatus.CLOSED, SlotDB.status.type),
+                    ),
+                    else_=SlotDB.status,
+                ),
             )
+            .returning(SlotDB.id, SlotDB.status)
+            .execution_options(synchronize_session=False)
         )
-        if exists:
-            return
+        statuses = dict(reserved.all())
 
-        grant = PatientTenantGrantDB(
-            patient_user_id=patient_id,
-            tenant_id=tenant_id,
-            scope="appointments",
+        created_at = datetime.now(dt_timezone.utc)
+        appointments = [
+            DomainAppointment(
+                id=mappers.generate_id(),
+                tenant_id=tenant_id,
+                slot_id=slot_id,
+                patient_id=patient_id,
+                status=AppointmentStatus.BOOKED,
+                reason=reason,
+                mode=mode or slots[slot_id].mode,
+                created_at=created_at,
+            )
+            for slot_id in slot_ids
+        ]
+        await self.session.execute(
+            insert(AppointmentDB), [asdict(appointment) for appointment in appointments]
+        )
+        bookings = []
+        for appointment in appointments:
+            slot = mappers.map_slot_row(slots[appointment.slot_id])
+            slot.status = SlotStatus(statuses[slot.id])
+            bookings.append((appointment, slot))
+        return bookings
+
+    async def _lock_slots(self, tenant_id: str, slot_ids: Sequence[str]) -> dict[str, Row]:
+        """``SLOT_COLUMNS`` and ``booked_count`` of the slots of ``slot_ids``, by id, locked
+        in id order."""
+        stmt = (
+            select(
+                SlotDB.id,
+                SlotDB.tenant_id,
+                SlotDB.calendar_id,
+                CalendarDB.practitioner_id,
+                SlotDB.starts_at,
+                SlotDB.ends_at,
+                SlotDB.mode,
+                SlotDB.status,
+                SlotDB.capacity,
+                SlotDB.booked_count,
+            )
+            .join(SlotDB.calendar)
+            .where(SlotDB.id.in_(slot_ids), SlotDB.tenant_id == tenant_id)
+            .order_by(SlotDB.id)
+            .with_for_update(of=SlotDB)
         )
-        self.session.add(grant)
+        result = await self.session.execute(stmt)
+        return {row.id: row for row in result}
+
+    async def _materialize_slot(self, tenant_id: str, slot_id: str) -> bool:
+        """Write the virtual slot ``slot_id``, if any, to ``slots`` as the generator would
+        have; False when ``slot_id`` cannot be a virtual slot id.
+
+        Concurrent bookings of the same virtual slot insert it once: the others wait for
+        that insert and then lock the row like any stored slot.
+        """
+        try:
+            minutes = int(slot_id[:8], 16)
+        except ValueError:
+            return False
+        starts_at = datetime.fromtimestamp(minutes * 60, dt_timezone.utc)
+        virtual = self._virtual_slots_statement(
+            tenant_id, starts_at, starts_at + timedelta(minutes=1), None, None, None
+        ).subquery("virtual_slots")
+        slot = select(
+            virtual.c.id,
+            virtual.c.tenant_id,
+            virtual.c.calendar_id,
+            virtual.c.starts_at,
+            virtual.c.ends_at,
+            virtual.c.capacity,
+            virtual.c.mode,
+            virtual.c.status,
+        ).where(virtual.c.id == slot_id)
+        insert_stmt = (
+            pg_insert(SlotDB).from_select(GENERATED_SLOT_COLUMNS, slot).on_conflict_do_nothing()
+        )
+        await self.session.execute(insert_stmt)
+        return True
+
+    async def _ensure_patient_grant(self, patient_id: str, tenant_id: str) -> None:
+        """Store the grant of ``patient_id`` in ``tenant_id`` unless it exists already.
+
+        Pairs known to ``grants`` skip the statement; the others are added to it when
+        the booking commits.
+        """
+        key = (patient_id, tenant_id)
+        if self.grants is not None and key in self.grants:
+            return
+        await self.session.execute(
+            pg_insert(PatientTenantGrantDB)
+            .values(patient_user_id=patient_id, tenant_id=tenant_id, scope="appointments")
+            .on_conflict_do_nothing()
+        )
+        if self.grants is not None:
+            self.grants.add_on_commit(self.session, key)
+
+
+def _availability_columns(slots):
+    """``AVAILABILITY_COLUMNS`` of a subquery with the slot, practitioner, mode and status."""
+    return (
+        slots.c.id,
+        slots.c.starts_at,
+        slots.c.ends_at,
+        slots.c.practitioner_id,
+        type_coerce(slots.c.mode, String).label("mode"),
+        type_coerce(slots.c.status, String).label("status"),
+    )
+
+
+def _template_slot_id(calendar_id, starts_at):
+    """Deterministic, UUID-shaped slot id: minutes since the epoch in hex, then the tail of
+    a digest of the calendar and that minute."""
+    minutes = func.lpad(
+        func.to_hex(cast(func.extract("epoch", starts_at), BigInteger) // 60), 8, "0"
+    )
+    digest = cast(func.md5(calendar_id.concat("/").concat(minutes)), UUID)
+    return minutes.concat(func.substr(cast(digest, String), 9))
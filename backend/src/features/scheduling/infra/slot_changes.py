@@ -0,0 +1,81 @@
+"""Listener of the ``slot_changes`` notifications sent by the slot triggers."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+import asyncpg
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+SLOT_CHANGES_CHANNEL = "slot_changes"
+
+
+class SlotChangeListener:
+    """Hand every ``slot_changes`` payload to ``on_change``, on the event loop.
+
+    After a lost connection ``on_reconnect`` is called once listening again, since
+    notifications sent in the meantime are gone.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        on_change: Callable[[str], None],
+        on_reconnect: Callable[[], None],
+        reconnect_delay: float = 1.0,
+    ) -> None:
+        self._dsn = dsn
+        self._on_change = on_change
+        self._on_reconnect = on_reconnect
+        self._reconnect_delay = reconnect_delay
+        self._listen_task: asyncio.Task[None] | None = None
+        self.listening = asyncio.Event()
+
+    async def start(self) -> None:
+        if self._listen_task is None:
+            self._listen_task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+            self._listen_task = None
+
+    def _on_notification(self, payload: str) -> None:
+        # Log any error of ``on_change``, whatever its type, and keep listening: what an
+        # asyncpg listener callback raises only reaches the loop's exception handler.
+        try:
+            self._on_change(payload)
+        except Exception:  # pragma: no cover - defensive, keep listening
+            logger.exception("slot_change_failed", payload=payload)
+
+    async def _listen_forever(self) -> None:
+        connected_before = False
+        while True:
+            connection: asyncpg.Connection | None = None
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _conn, lost=lost: lost.set())
+                await connection.add_listener(
+                    SLOT_CHANGES_CHANNEL,
+                    lambda _conn, _pid, _channel, payload: self._on_notification(payload),
+                )
+                if connected_before:
+                    self._on_reconnect()
+                connected_before = True
+                self.listening.set()
+                await lost.wait()
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("slot_change_listener_disconnected", error=str(exc))
+            finally:
+                self.listening.clear()
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self._reconnect_delay)
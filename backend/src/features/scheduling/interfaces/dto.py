@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+import base64
+import binascii
+import json
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from datetime import date, datetime, time
+from typing import Any, Iterable, Optional, Sequence
 
-from pydantic import BaseModel, Field
+import pydantic_core
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 from ..domain.entities import Appointment as DomainAppointment
+from ..domain.entities import DailyAvailability
+from ..domain.entities import ScheduleTemplate as DomainScheduleTemplate
 from ..domain.entities import Slot as DomainSlot
 from ..domain.value_objects import AppointmentStatus, SlotMode, SlotStatus
 
@@ -17,6 +24,29 @@ class AvailabilityQueryParams(BaseModel):
     ends_at: datetime
     practitioner_id: Optional[str] = None
     mode: Optional[SlotMode] = Field(default=None)
+    limit: Optional[int] = Field(default=None, ge=1, description="Page size (capped server-side)")
+    cursor: Optional[str] = Field(default=None, description="X-Next-Cursor of the previous page")
+
+
+def encode_cursor(starts_at: datetime, slot_id: str) -> str:
+    """Opaque keyset cursor pointing after the slot (starts_at, slot_id)."""
+    raw = json.dumps([starts_at.isoformat(), slot_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Return the (starts_at, id) encoded by ``encode_cursor``; ValueError if malformed.
+
+    Slots start at aware datetimes, so a cursor without a time zone is malformed too.
+    """
+    try:
+        starts_at, slot_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        after = datetime.fromisoformat(starts_at)
+    except (TypeError, ValueError, binascii.Error) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+    if after.tzinfo is None:
+        raise ValueError("Invalid pagination cursor")
+    return after, str(slot_id)
 
 
 class AvailabilityDTO(BaseModel):
@@ -39,6 +69,69 @@ class AvailabilityDTO(BaseModel):
         )
 
 
+AVAILABILITY_FIELDS = tuple(AvailabilityDTO.model_fields)
+
+
+def availability_rows_json(rows: Iterable[Sequence[Any]]) -> bytes:
+    """JSON array of availability rows, byte-identical to ``list[AvailabilityDTO]``.
+
+    Rows are ``AVAILABILITY_COLUMNS`` tuples from ``SchedulingRepository`` and go
+    through pydantic-core's encoder without ORM entities, domain slots or DTO
+    validation.
+    """
+    return pydantic_core.to_json([dict(zip(AVAILABILITY_FIELDS, row)) for row in rows])
+
+
+def availability_row_json(row: Sequence[Any]) -> bytes:
+    """One availability row, as ``AvailabilityDTO.model_dump_json()`` would encode it."""
+    return pydantic_core.to_json(dict(zip(AVAILABILITY_FIELDS, row)))
+
+
+class NextAvailabilityQueryParams(BaseModel):
+    starts_from: Optional[datetime] = Field(default=None, description="Now when absent")
+    practitioner_id: Optional[str] = None
+    mode: Optional[SlotMode] = Field(default=None)
+    limit: int = Field(default=1, ge=1, description="Slots returned (capped server-side)")
+    per_practitioner: bool = Field(
+        default=False, description="The first `limit` slots of each practitioner"
+    )
+
+
+# Widest window of the availability summary: a month view plus the overlapping weeks.
+SUMMARY_MAX_DAYS = 62
+
+
+class AvailabilitySummaryQueryParams(BaseModel):
+    starts_on: date = Field(description="First UTC day of the window")
+    ends_on: date = Field(description="Last UTC day of the window (inclusive)")
+    practitioner_id: Optional[str] = None
+    mode: Optional[SlotMode] = Field(default=None)
+
+    def window_error(self) -> str | None:
+        """Why the window is not acceptable, or None."""
+        if self.ends_on < self.starts_on:
+            return "ends_on must not be before starts_on"
+        if (self.ends_on - self.starts_on).days >= SUMMARY_MAX_DAYS:
+            return f"The window spans at most {SUMMARY_MAX_DAYS} days"
+        return None
+
+
+class DailyAvailabilityDTO(BaseModel):
+    day: date
+    practitioner_id: str
+    mode: SlotMode
+    open_slots: int
+
+    @classmethod
+    def from_domain(cls, availability: DailyAvailability) -> "DailyAvailabilityDTO":
+        return cls(
+            day=availability.day,
+            practitioner_id=availability.practitioner_id,
+            mode=availability.mode,
+            open_slots=availability.open_slots,
+        )
+
+
 class CreateAppointmentRequest(BaseModel):
     slot_id: str
     patient_id: str
@@ -54,3 +147,115 @@ class CreateAppointmentResponse(BaseModel):
     @classmethod
     def from_domain(cls, appointment: DomainAppointment) -> "CreateAppointmentResponse":
         return cls(appointment_id=appointment.id, status=appointment.status)
+
+
+# Most slots one series booking may take, e.g. a course of thirty sessions.
+SERIES_MAX_SLOTS = 50
+
+
+class CreateAppointmentSeriesRequest(BaseModel):
+    slot_ids: list[str] = Field(min_length=1, max_length=SERIES_MAX_SLOTS)
+    patient_id: str
+    reason: Optional[str] = None
+    mode: Optional[SlotMode] = None
+    tenant_id: Optional[str] = None
+
+    @field_validator("slot_ids")
+    @classmethod
+    def _check_slot_ids(cls, slot_ids: list[str]) -> list[str]:
+        if len(set(slot_ids)) != len(slot_ids):
+            raise ValueError("slot_ids must not repeat a slot")
+        return slot_ids
+
+
+class CreateAppointmentSeriesResponse(BaseModel):
+    appointments: list[CreateAppointmentResponse]
+
+
+# Widest window materialised by one slot generation.
+GENERATION_MAX_DAYS = 366
+
+
+class CreateScheduleTemplateRequest(BaseModel):
+    calendar_id: str
+    weekdays: list[int] = Field(min_length=1, description="ISO days of the week, 1 = Monday")
+    start_time: time = Field(description="Local time of the first slot")
+    end_time: time = Field(description="Local time the last slot ends by")
+    slot_minutes: int = Field(ge=5, le=480)
+    mode: SlotMode = SlotMode.ONSITE
+    timezone: str = Field(description="IANA time zone of the times, e.g. Africa/Dakar")
+    valid_from: date
+    valid_until: Optional[date] = None
+    capacity: int = Field(default=1, ge=1)
+
+    @field_validator("weekdays")
+    @classmethod
+    def _check_weekdays(cls, weekdays: list[int]) -> list[int]:
+        if any(day < 1 or day > 7 for day in weekdays):
+            raise ValueError("weekdays are ISO days of the week, from 1 to 7")
+        return sorted(set(weekdays))
+
+    @field_validator("timezone")
+    @classmethod
+    def _check_timezone(cls, timezone: str) -> str:
+        try:
+            ZoneInfo(timezone)
+        except (ZoneInfoNotFoundError, ValueError) as exc:
+            raise ValueError(f"Unknown time zone {timezone!r}") from exc
+        return timezone
+
+    @model_validator(mode="after")
+    def _check_ranges(self) -> "CreateScheduleTemplateRequest":
+        if self.start_time >= self.end_time:
+            raise ValueError("start_time must be before end_time")
+        if self.valid_until is not None and self.valid_until < self.valid_from:
+            raise ValueError("valid_until must not be before valid_from")
+        return self
+
+
+class ScheduleTemplateResponse(BaseModel):
+    id: str
+    calendar_id: str
+    weekdays: list[int]
+    start_time: time
+    end_time: time
+    slot_minutes: int
+    mode: SlotMode
+    timezone: str
+    valid_from: date
+    valid_until: Optional[date]
+    capacity: int
+
+    @classmethod
+    def from_domain(cls, template: DomainScheduleTemplate) -> "ScheduleTemplateResponse":
+        return cls(
+            id=template.id,
+            calendar_id=template.calendar_id,
+            weekdays=template.weekdays,
+            start_time=template.start_time,
+            end_time=template.end_time,
+            slot_minutes=template.slot_minutes,
+            mode=template.mode,
+            timezone=template.timezone,
+            valid_from=template.valid_from,
+            valid_until=template.valid_until,
+            capacity=template.capacity,
+        )
+
+
+class GenerateSlotsRequest(BaseModel):
+    starts_on: date = Field(description="First local day to materialise")
+    ends_on: date = Field(description="Last local day to materialise (inclusive)")
+    calendar_id: Optional[str] = Field(default=None, description="Every calendar when absent")
+
+    @model_validator(mode="after")
+    def _check_window(self) -> "GenerateSlotsRequest":
+        if self.ends_on < self.starts_on:
+            raise ValueError("ends_on must not be before starts_on")
+        if (self.ends_on - self.starts_on).days >= GENERATION_MAX_DAYS:
+            raise ValueError(f"A generation spans at most {GENERATION_MAX_DAYS} days")
+        return self
+
+
+class GenerateSlotsResponse(BaseModel):
+    generated: int = Field(description="Slots added; existing or overlapping ones are skipped")
@@ -2,32 +2,116 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import timedelta
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 from sqlalchemy.exc import NoResultFound
 
-from src.core.db import get_session_factory, tenant_session
+from src.core.db import get_session_factory, pin_reads_to_primary, tenant_session
+from src.core.http import set_read_primary_cookie
 from src.core.security import AccessContext, ensure_authorized, require_any_role
-from ..application.command_handlers import BookAppointmentHandler
-from ..application.commands import BookAppointmentCommand
+from src.core.settings import get_settings
+from ..application.availability_cache import get_availability_cache
+from ..application.slot_index import get_slot_index
+from ..application.command_handlers import (
+    BookAppointmentHandler,
+    BookAppointmentSeriesHandler,
+    CreateScheduleTemplateHandler,
+    GenerateSlotsHandler,
+)
+from ..application.commands import (
+    BookAppointmentCommand,
+    BookAppointmentSeriesCommand,
+    CreateScheduleTemplateCommand,
+    GenerateSlotsCommand,
+)
+from ..domain.events import AppointmentBooked
+from ..infra.idempotency import (
+    IdempotencyKeyReusedError,
+    IdempotencyStore,
+    StoredResponse,
+    request_hash,
+)
+from ..infra.patient_grants import get_patient_grant_cache
 from ..infra.repositories import SchedulingRepository, SlotNotAvailableError
-from .dto import CreateAppointmentRequest, CreateAppointmentResponse
+from .dto import (
+    CreateAppointmentRequest,
+    CreateAppointmentResponse,
+    CreateAppointmentSeriesRequest,
+    CreateAppointmentSeriesResponse,
+    CreateScheduleTemplateRequest,
+    GenerateSlotsRequest,
+    GenerateSlotsResponse,
+    ScheduleTemplateResponse,
+)
 
 router = APIRouter(prefix="/commands/scheduling", tags=["scheduling:commands"])
 
 ALLOWED_ROLES = ["patient", "doctor", "secretary", "clinic_admin"]
+SCHEDULE_ROLES = ["clinic_admin"]
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
 
+def _repository(session) -> SchedulingRepository:
+    return SchedulingRepository(
+        session, virtual_slots=get_settings().virtual_slots, grants=get_patient_grant_cache()
+    )
 
-@router.post(
-    "/appointments",
-    status_code=status.HTTP_201_CREATED,
-    response_model=CreateAppointmentResponse,
-    summary="Book an appointment for a slot",
+
+IdempotencyKey = Header(
+    default=None,
+    alias=IDEMPOTENCY_KEY_HEADER,
+    min_length=1,
+    max_length=255,
+    description="Retries with the same key get the response of the first attempt",
 )
-async def create_appointment(
-    payload: CreateAppointmentRequest,
-    context: AccessContext = Depends(require_any_role(ALLOWED_ROLES)),
-):
-    target_tenant = context.tenant_id or payload.tenant_id
+
+
+async def _replay(
+    session,
+    tenant_id: str,
+    key: str | None,
+    context: AccessContext,
+    command: str,
+    payload: BaseModel,
+) -> JSONResponse | None:
+    """Claim ``key`` in the command's transaction, or the response it already produced.
+
+    A concurrent attempt with the same key waits here for the first one to finish.
+    """
+    if key is None:
+        return None
+    fingerprint = request_hash(context.sub, command, payload.model_dump_json())
+    settings = get_settings()
+    ttl = timedelta(seconds=settings.idempotency_key_ttl_seconds)
+    try:
+        stored = await IdempotencyStore(session).claim(
+            tenant_id, key, fingerprint, ttl, purge=settings.idempotency_purge_batch
+        )
+    except IdempotencyKeyReusedError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)
+        ) from exc
+    if stored is None:
+        return None
+    return JSONResponse(
+        stored.body, status_code=stored.status_code, headers={REPLAYED_HEADER: "true"}
+    )
+
+
+async def _remember(
+    session, tenant_id: str, key: str | None, status_code: int, response: BaseModel
+) -> None:
+    """Store the response of the command before its transaction commits."""
+    if key is not None:
+        stored = StoredResponse(status_code, response.model_dump(mode="json"))
+        await IdempotencyStore(session).store(tenant_id, key, stored)
+
+
+async def _booking_tenant(context: AccessContext, tenant_id: str | None, resource: str) -> str:
+    target_tenant = context.tenant_id or tenant_id
     if target_tenant is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,23 +120,63 @@ async def create_appointment(
 
     await ensure_authorized(
         context,
-        obj="/commands/scheduling/appointments",
+        obj=f"/commands/scheduling/{resource}",
         act="POST",
         tenant_id=target_tenant,
     )
+    return target_tenant
 
-    patient_id = payload.patient_id
+
+def _booking_patient(context: AccessContext, patient_id: str) -> str:
     if "patient" in context.roles and not any(role in {"doctor", "nurse", "secretary", "clinic_admin"} for role in context.roles):
-        patient_id = context.sub
+        return context.sub
+    return patient_id
+
 
+def _booking_session(context: AccessContext, target_tenant: str):
     if context.tenant_id:
-        session_context = tenant_session(target_tenant)
-    else:
-        session_factory = get_session_factory()
-        session_context = session_factory()
+        return tenant_session(target_tenant)
+    session_factory = get_session_factory()
+    return session_factory()
+
 
-    async with session_context as session:
-        repository = SchedulingRepository(session)
+def _after_booking(
+    context: AccessContext, response: Response, *events: AppointmentBooked
+) -> None:
+    for booked in events:
+        get_availability_cache().invalidate(booked)
+        get_slot_index().apply_booking(booked)
+    # The booked slots must not reappear as available from a lagging replica: the pin
+    # covers this worker, the cookie the next reads of the client on the others.
+    if pin_reads_to_primary(context.sub):
+        settings = get_settings()
+        set_read_primary_cookie(
+            response, context.sub, settings.read_your_writes_seconds, settings.pro_invite_secret
+        )
+
+
+@router.post(
+    "/appointments",
+    status_code=status.HTTP_201_CREATED,
+    response_model=CreateAppointmentResponse,
+    summary="Book an appointment for a slot",
+)
+async def create_appointment(
+    http_response: Response,
+    payload: CreateAppointmentRequest,
+    context: AccessContext = Depends(require_any_role(ALLOWED_ROLES)),
+    idempotency_key: str | None = IdempotencyKey,
+):
+    target_tenant = await _booking_tenant(context, payload.tenant_id, "appointments")
+    patient_id = _booking_patient(context, payload.patient_id)
+
+    async with _booking_session(context, target_tenant) as session:
+        replayed = await _replay(
+            session, target_tenant, idempotency_key, context, "appointments", payload
+        )
+        if replayed is not None:
+            return replayed
+        repository = _repository(session)
         handler = BookAppointmentHandler(repository)
         command = BookAppointmentCommand(
             tenant_id=target_tenant,
@@ -64,7 +188,11 @@ async def create_appointment(
         )
 
         try:
-            appointment, _ = await handler.handle(command)
+            appointment, booked = await handler.handle(command)
+            response = CreateAppointmentResponse.from_domain(appointment)
+            await _remember(
+                session, target_tenant, idempotency_key, status.HTTP_201_CREATED, response
+            )
             await session.commit()
         except SlotNotAvailableError as exc:
             await session.rollback()
@@ -78,5 +206,174 @@ async def create_appointment(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to book appointment",
             ) from exc
+    _after_booking(context, http_response, booked)
+
+    return response
+
+
+@router.post(
+    "/appointment-series",
+    status_code=status.HTTP_201_CREATED,
+    response_model=CreateAppointmentSeriesResponse,
+    summary="Book a series of slots at once",
+    description=(
+        "Books every slot of `slot_ids` for the patient, or none of them: a slot that is "
+        "missing answers 404 and a slot that is full or closed answers 409. Appointments "
+        "are returned in the order of `slot_ids`."
+    ),
+)
+async def create_appointment_series(
+    http_response: Response,
+    payload: CreateAppointmentSeriesRequest,
+    context: AccessContext = Depends(require_any_role(ALLOWED_ROLES)),
+    idempotency_key: str | None = IdempotencyKey,
+):
+    target_tenant = await _booking_tenant(context, payload.tenant_id, "appointment-series")
+    patient_id = _booking_patient(context, payload.patient_id)
+
+    async with _booking_session(context, target_tenant) as session:
+        replayed = await _replay(
+            session, target_tenant, idempotency_key, context, "appointment-series", payload
+        )
+        if replayed is not None:
+            return replayed
+        handler = BookAppointmentSeriesHandler(_repository(session))
+        command = BookAppointmentSeriesCommand(
+            tenant_id=target_tenant,
+            slot_ids=payload.slot_ids,
+            patient_id=patient_id,
+            reason=payload.reason,
+            mode=payload.mode,
+            requested_by=context.sub,
+        )
+
+        try:
+            bookings = await handler.handle(command)
+            response = CreateAppointmentSeriesResponse(
+                appointments=[
+                    CreateAppointmentResponse.from_domain(appointment)
+                    for appointment, _ in bookings
+                ]
+            )
+            await _remember(
+                session, target_tenant, idempotency_key, status.HTTP_201_CREATED, response
+            )
+            await session.commit()
+        except SlotNotAvailableError as exc:
+            await session.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+        except NoResultFound as exc:
+            await session.rollback()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+        except Exception as exc:  # pragma: no cover - defensive
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to book appointments",
+            ) from exc
+    _after_booking(context, http_response, *(booked for _, booked in bookings))
+
+    return response
+
+
+def _clinic_tenant(context: AccessContext) -> str:
+    if not context.tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Schedules are managed from a clinic tenant",
+        )
+    return context.tenant_id
+
+
+@router.post(
+    "/schedule-templates",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ScheduleTemplateResponse,
+    summary="Add weekly opening hours to a calendar",
+)
+async def create_schedule_template(
+    payload: CreateScheduleTemplateRequest,
+    context: AccessContext = Depends(require_any_role(SCHEDULE_ROLES)),
+    idempotency_key: str | None = IdempotencyKey,
+):
+    tenant_id = _clinic_tenant(context)
+    await ensure_authorized(
+        context,
+        obj="/commands/scheduling/schedule-templates",
+        act="POST",
+        tenant_id=tenant_id,
+    )
+
+    async with tenant_session(tenant_id) as session:
+        replayed = await _replay(
+            session, tenant_id, idempotency_key, context, "schedule-templates", payload
+        )
+        if replayed is not None:
+            return replayed
+        handler = CreateScheduleTemplateHandler(_repository(session))
+        command = CreateScheduleTemplateCommand(
+            tenant_id=tenant_id,
+            requested_by=context.sub,
+            **payload.model_dump(),
+        )
+        try:
+            template = await handler.handle(command)
+            response = ScheduleTemplateResponse.from_domain(template)
+            await _remember(session, tenant_id, idempotency_key, status.HTTP_201_CREATED, response)
+            await session.commit()
+        except NoResultFound as exc:
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Calendar not found"
+            ) from exc
+    # Virtual slots: the template opens new slots right away.
+    get_availability_cache().invalidate_tenant(tenant_id)
+    get_slot_index().drop_tenant(tenant_id)
+
+    return response
+
+
+@router.post(
+    "/slot-generations",
+    response_model=GenerateSlotsResponse,
+    summary="Materialise the slots of the schedule templates",
+    description=(
+        "Expands the templates of the tenant (or of one calendar) into open slots over "
+        "the given local days. Slots that already exist are kept, so windows may overlap "
+        "previous generations."
+    ),
+)
+async def generate_slots(
+    payload: GenerateSlotsRequest,
+    context: AccessContext = Depends(require_any_role(SCHEDULE_ROLES)),
+    idempotency_key: str | None = IdempotencyKey,
+):
+    tenant_id = _clinic_tenant(context)
+    await ensure_authorized(
+        context,
+        obj="/commands/scheduling/slot-generations",
+        act="POST",
+        tenant_id=tenant_id,
+    )
+
+    async with tenant_session(tenant_id) as session:
+        replayed = await _replay(
+            session, tenant_id, idempotency_key, context, "slot-generations", payload
+        )
+        if replayed is not None:
+            return replayed
+        handler = GenerateSlotsHandler(_repository(session))
+        command = GenerateSlotsCommand(
+            tenant_id=tenant_id,
+            starts_on=payload.starts_on,
+            ends_on=payload.ends_on,
+            calendar_id=payload.calendar_id,
+            requested_by=context.sub,
+        )
+        response = GenerateSlotsResponse(generated=await handler.handle(command))
+        await _remember(session, tenant_id, idempotency_key, status.HTTP_200_OK, response)
+        await session.commit()
+    get_availability_cache().invalidate_tenant(tenant_id)
+    get_slot_index().drop_tenant(tenant_id)
 
-    return CreateAppointmentResponse.from_domain(appointment)
+    return response
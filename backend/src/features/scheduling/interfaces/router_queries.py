@@ -1,26 +1,101 @@
 """Query endpoints for scheduling."""
 
-from fastapi import APIRouter, Depends, Request
-from typing import Annotated
+from datetime import datetime, timezone
 
-from src.core.db import get_session_factory, tenant_session
-from src.core.http import limiter
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Annotated, AsyncIterator
+
+from src.core.db import get_read_session_factory, reads_primary, tenant_session
+from src.core.http import limiter, reads_pinned_to_primary
 from src.core.security import AccessContext, ensure_authorized, get_access_context
 from src.core.settings import get_settings
-from ..application.query_handlers import FetchAvailabilitiesHandler
-from ..application.queries import FetchAvailabilitiesQuery
+from ..application.availability_cache import get_availability_cache
+from ..application.slot_index import SlotIndex, get_slot_index
+from ..application.query_handlers import (
+    FetchAvailabilitiesHandler,
+    FetchAvailabilitySummaryHandler,
+    FetchNextAvailabilitiesHandler,
+    availability_flights,
+)
+from ..application.queries import (
+    FetchAvailabilitiesQuery,
+    FetchAvailabilitySummaryQuery,
+    FetchNextAvailabilitiesQuery,
+)
 from ..infra.repositories import SchedulingRepository
-from .dto import AvailabilityDTO, AvailabilityQueryParams
+from .dto import (
+    AvailabilityDTO,
+    AvailabilityQueryParams,
+    AvailabilitySummaryQueryParams,
+    DailyAvailabilityDTO,
+    NextAvailabilityQueryParams,
+    availability_row_json,
+    availability_rows_json,
+    decode_cursor,
+    encode_cursor,
+)
 
 router = APIRouter(prefix="/queries/scheduling", tags=["scheduling:queries"])
 
 RATE_LIMIT = f"{get_settings().rate_limit_queries_per_min}/minute"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Slots serialised per chunk written to a streamed response.
+STREAM_CHUNK_ROWS = 100
+# Most slots the next availabilities return, per practitioner with `per_practitioner`.
+NEXT_AVAILABLE_LIMIT_MAX = 20
+
+
+def _reads_primary(request: Request, context: AccessContext) -> bool:
+    """The subject booked on another worker moments ago (read-your-writes)."""
+    settings = get_settings()
+    return reads_pinned_to_primary(
+        request, context.sub, settings.read_your_writes_seconds, settings.pro_invite_secret
+    )
+
+
+def _read_session(context: AccessContext, primary: bool = False):
+    if context.tenant_id:
+        return tenant_session(
+            context.tenant_id, read_only=True, subject=context.sub, primary=primary
+        )
+    return get_read_session_factory(context.sub, primary=primary)()
+
+
+def _repository(session) -> SchedulingRepository:
+    return SchedulingRepository(session, virtual_slots=get_settings().virtual_slots)
+
+
+def _slot_index(context: AccessContext) -> SlotIndex | None:
+    index = get_slot_index()
+    return index if index.enabled and context.tenant_id else None
+
+
+async def _stream_availabilities(
+    context: AccessContext, query: FetchAvailabilitiesQuery, primary: bool
+) -> AsyncIterator[bytes]:
+    async with _read_session(context, primary) as session:
+        handler = FetchAvailabilitiesHandler(_repository(session))
+        lines: list[bytes] = []
+        async for row in handler.stream_rows(query):
+            lines.append(availability_row_json(row) + b"\n")
+            if len(lines) >= STREAM_CHUNK_ROWS:
+                yield b"".join(lines)
+                lines.clear()
+        if lines:
+            yield b"".join(lines)
 
 
 @router.get(
     "/availabilities",
     response_model=list[AvailabilityDTO],
     summary="List available slots for booking",
+    description=(
+        "Slots are ordered by (starts_at, id). With `limit` or `cursor` the response is a "
+        f"page and `{NEXT_CURSOR_HEADER}` carries the cursor of the next one. With "
+        f"`Accept: {NDJSON_MEDIA_TYPE}` the whole window is streamed, one slot per line."
+    ),
 )
 @limiter.limit(RATE_LIMIT)
 async def list_availabilities(
@@ -35,30 +110,123 @@ async def list_availabilities(
         tenant_id=context.tenant_id,
     )
 
-    if context.tenant_id:
-        async with tenant_session(context.tenant_id) as session:
-            repository = SchedulingRepository(session)
-            handler = FetchAvailabilitiesHandler(repository)
-            query = FetchAvailabilitiesQuery(
-                tenant_id=context.tenant_id,
-                starts_at=params.starts_at,
-                ends_at=params.ends_at,
-                practitioner_id=params.practitioner_id,
-                mode=params.mode,
-            )
-            slots = await handler.handle(query)
-            return [AvailabilityDTO.from_domain(slot) for slot in slots]
-
-    session_factory = get_session_factory()
-    async with session_factory() as session:
-        repository = SchedulingRepository(session)
-        handler = FetchAvailabilitiesHandler(repository)
-        query = FetchAvailabilitiesQuery(
-            tenant_id=context.tenant_id or "*",
-            starts_at=params.starts_at,
-            ends_at=params.ends_at,
-            practitioner_id=params.practitioner_id,
-            mode=params.mode,
+    try:
+        after = decode_cursor(params.cursor) if params.cursor else None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    page_size: int | None = None
+    if params.limit is not None or after is not None:
+        page_size_max = get_settings().availability_page_size_max
+        page_size = min(params.limit or page_size_max, page_size_max)
+
+    query = FetchAvailabilitiesQuery(
+        tenant_id=context.tenant_id or "*",
+        starts_at=params.starts_at,
+        ends_at=params.ends_at,
+        practitioner_id=params.practitioner_id,
+        mode=params.mode,
+        after=after,
+        # One extra row tells whether there is a next page.
+        limit=page_size + 1 if page_size is not None else None,
+    )
+
+    primary = _reads_primary(request, context)
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _stream_availabilities(context, query, primary),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    async with _read_session(context, primary) as session:
+        handler = FetchAvailabilitiesHandler(
+            _repository(session),
+            cache=get_availability_cache(),
+            # A pin taken on another worker: an execution in flight here may have started
+            # before that booking committed.
+            flights=None if primary else availability_flights,
+            index=_slot_index(context),
+            fill_cache=reads_primary(session),
         )
-        slots = await handler.handle(query)
-        return [AvailabilityDTO.from_domain(slot) for slot in slots]
+        rows = await handler.handle_rows(query)
+
+    headers = {}
+    if page_size is not None and len(rows) > page_size:
+        rows = rows[:page_size]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].starts_at, rows[-1].id)
+    # Rows are encoded directly; the bytes match what response_model would produce.
+    return Response(availability_rows_json(rows), media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/next-availabilities",
+    response_model=list[AvailabilityDTO],
+    summary="First open slots from an instant",
+    description=(
+        "The first `limit` open slots starting from `starts_from` (now when absent), across "
+        "the tenant or, with `per_practitioner`, of each practitioner, ordered by "
+        "(starts_at, id). No end of window is needed: the search stops at the first slots."
+    ),
+)
+@limiter.limit(RATE_LIMIT)
+async def next_availabilities(
+    request: Request,
+    params: Annotated[NextAvailabilityQueryParams, Depends()],
+    context: AccessContext = Depends(get_access_context),
+):
+    await ensure_authorized(
+        context,
+        obj="/queries/scheduling/next-availabilities",
+        act="GET",
+        tenant_id=context.tenant_id,
+    )
+
+    query = FetchNextAvailabilitiesQuery(
+        tenant_id=context.tenant_id or "*",
+        starts_from=params.starts_from or datetime.now(timezone.utc),
+        practitioner_id=params.practitioner_id,
+        mode=params.mode,
+        limit=min(params.limit, NEXT_AVAILABLE_LIMIT_MAX),
+        per_practitioner=params.per_practitioner,
+    )
+    async with _read_session(context, _reads_primary(request, context)) as session:
+        rows = await FetchNextAvailabilitiesHandler(_repository(session)).handle_rows(query)
+    return Response(availability_rows_json(rows), media_type="application/json")
+
+
+@router.get(
+    "/availability-summary",
+    response_model=list[DailyAvailabilityDTO],
+    summary="Count open slots per day, practitioner and mode",
+    description=(
+        "Days are UTC dates and both bounds are inclusive. Groups without open slots are "
+        "left out, so a missing day has nothing to book."
+    ),
+)
+@limiter.limit(RATE_LIMIT)
+async def availability_summary(
+    request: Request,
+    params: Annotated[AvailabilitySummaryQueryParams, Depends()],
+    context: AccessContext = Depends(get_access_context),
+):
+    await ensure_authorized(
+        context,
+        obj="/queries/scheduling/availability-summary",
+        act="GET",
+        tenant_id=context.tenant_id,
+    )
+    window_error = params.window_error()
+    if window_error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=window_error)
+
+    query = FetchAvailabilitySummaryQuery(
+        tenant_id=context.tenant_id or "*",
+        starts_on=params.starts_on,
+        ends_on=params.ends_on,
+        practitioner_id=params.practitioner_id,
+        mode=params.mode,
+    )
+    async with _read_session(context, _reads_primary(request, context)) as session:
+        handler = FetchAvailabilitySummaryHandler(_repository(session))
+        days = await handler.handle(query)
+    return [DailyAvailabilityDTO.from_domain(day) for day in days]
@@ -0,0 +1,291 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.core import db
+from src.features.scheduling.application.availability_cache import AvailabilityCache
+from src.features.scheduling.application.command_handlers import BookAppointmentHandler
+from src.features.scheduling.application.commands import BookAppointmentCommand
+from src.features.scheduling.application.queries import FetchAvailabilitiesQuery
+from src.features.scheduling.application.query_handlers import FetchAvailabilitiesHandler
+from src.features.scheduling.domain.events import AppointmentBooked
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus
+from src.features.scheduling.infra.models import CalendarDB, SlotDB
+from src.features.scheduling.infra.repositories import SchedulingRepository
+
+TENANT = "tenant-1"
+MONDAY = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+AvailabilityRow = namedtuple("AvailabilityRow", "id starts_at ends_at practitioner_id mode status")
+
+
+class FakeRepository:
+    """Two practitioners with an onsite and a tele slot every day at 09:00 and 23:45."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[datetime, datetime]] = []
+        self.rows = sorted(
+            (
+                AvailabilityRow(
+                    f"slot-{day}-{hour}-{practitioner}",
+                    MONDAY + timedelta(days=day, hours=hour),
+                    MONDAY + timedelta(days=day, hours=hour, minutes=30),
+                    practitioner,
+                    SlotMode.TELE if hour == 9 else SlotMode.ONSITE,
+                    SlotStatus.OPEN,
+                )
+                for day in range(7)
+                for hour in (9, 23.75)
+                for practitioner in ("prac-1", "prac-2")
+            ),
+            key=lambda row: (row.starts_at, row.id),
+        )
+
+    def _matching(self, practitioner_id, mode):
+        return [
+            row
+            for row in self.rows
+            if (practitioner_id is None or row.practitioner_id == practitioner_id)
+            and (mode is None or row.mode == mode)
+        ]
+
+    async def list_availability_rows(
+        self, tenant_id, starts_at, ends_at, practitioner_id, mode, after=None, limit=None
+    ):
+        rows = [
+            row
+            for row in self._matching(practitioner_id, mode)
+            if row.starts_at >= starts_at
+            and row.ends_at <= ends_at
+            and (after is None or (row.starts_at, row.id) > after)
+        ]
+        return rows[:limit] if limit is not None else rows
+
+    async def list_availability_rows_starting(
+        self, tenant_id, starts_from, starts_before, practitioner_id, mode
+    ):
+        self.calls.append((starts_from, starts_before))
+        return [
+            row
+            for row in self._matching(practitioner_id, mode)
+            if starts_from <= row.starts_at < starts_before
+        ]
+
+
+def _query(first_day: int, last_day: int, **filters) -> FetchAvailabilitiesQuery:
+    return FetchAvailabilitiesQuery(
+        tenant_id=TENANT,
+        starts_at=MONDAY + timedelta(days=first_day, hours=8),
+        ends_at=MONDAY + timedelta(days=last_day, hours=23, minutes=59),
+        **filters,
+    )
+
+
+def _booked(practitioner_id: str, day: int, mode: SlotMode) -> AppointmentBooked:
+    return AppointmentBooked(
+        appointment_id="appointment-1",
+        slot_id="slot-1",
+        tenant_id=TENANT,
+        occurred_at=MONDAY,
+        practitioner_id=practitioner_id,
+        slot_starts_at=MONDAY + timedelta(days=day, hours=9),
+        slot_mode=mode,
+        slot_status=SlotStatus.CLOSED,
+    )
+
+
+@pytest.fixture
+def repository():
+    return FakeRepository()
+
+
+@pytest.fixture
+def cache():
+    return AvailabilityCache(max_rows=1_000, ttl_seconds=60)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        _query(0, 2),
+        _query(1, 1, practitioner_id="prac-2"),
+        _query(0, 6, mode=SlotMode.TELE),
+        _query(0, 3, after=(MONDAY + timedelta(days=1, hours=9), "slot-1-9-prac-1"), limit=3),
+    ],
+)
+async def test_cached_rows_match_the_database(repository, cache, query):
+    direct = await FetchAvailabilitiesHandler(repository).handle_rows(query)
+    handler = FetchAvailabilitiesHandler(repository, cache=cache)
+
+    assert await handler.handle_rows(query) == direct
+    assert await handler.handle_rows(query) == direct
+    assert len(repository.calls) == 1
+    assert direct
+
+
+async def test_overlapping_windows_only_fetch_missing_days(repository, cache):
+    handler = FetchAvailabilitiesHandler(repository, cache=cache)
+
+    await handler.handle_rows(_query(0, 2))
+    await handler.handle_rows(_query(1, 3))
+
+    assert repository.calls[-1] == (MONDAY + timedelta(days=3), MONDAY + timedelta(days=4))
+    assert cache.hits == 2
+    assert cache.misses == 4
+    assert cache.hit_ratio == pytest.approx(2 / 6)
+
+
+async def test_booking_invalidates_only_the_buckets_of_the_slot(repository, cache):
+    handler = FetchAvailabilitiesHandler(repository, cache=cache)
+    queries = [
+        _query(1, 1),
+        _query(1, 1, practitioner_id="prac-1"),
+        _query(1, 1, practitioner_id="prac-2"),
+        _query(1, 1, mode=SlotMode.ONSITE),
+        _query(1, 1, practitioner_id="prac-1", mode=SlotMode.TELE),
+        _query(2, 2),
+    ]
+    for query in queries:
+        await handler.handle_rows(query)
+
+    cache.invalidate(_booked("prac-1", day=1, mode=SlotMode.TELE))
+    refetched = []
+    for query in queries:
+        calls = len(repository.calls)
+        await handler.handle_rows(query)
+        refetched.append(len(repository.calls) > calls)
+
+    assert refetched == [True, True, False, False, True, False]
+
+
+async def test_slot_generation_invalidates_the_whole_tenant(repository, cache):
+    handler = FetchAvailabilitiesHandler(repository, cache=cache)
+    queries = [_query(1, 1), _query(2, 3, practitioner_id="prac-1")]
+    for query in queries:
+        await handler.handle_rows(query)
+    other_tenant = ("tenant-2", None, None, MONDAY.date())
+    cache.put(other_tenant, [], cache.generation("tenant-2"))
+
+    cache.invalidate_tenant(TENANT)
+
+    assert len(cache) == 1 and cache.get(other_tenant) == ()
+    calls = len(repository.calls)
+    for query in queries:
+        await handler.handle_rows(query)
+    assert len(repository.calls) == calls + 2
+
+
+async def test_fill_racing_a_booking_is_not_cached(repository, cache):
+    handler = FetchAvailabilitiesHandler(repository, cache=cache)
+    list_rows = repository.list_availability_rows_starting
+
+    async def booking_during_read(*args, **kwargs):
+        rows = await list_rows(*args, **kwargs)
+        cache.invalidate(_booked("prac-2", day=4, mode=SlotMode.ONSITE))
+        return rows
+
+    repository.list_availability_rows_starting = booking_during_read
+    await handler.handle_rows(_query(0, 0))
+
+    assert len(cache) == 0
+
+
+async def test_replica_reads_do_not_refill_invalidated_buckets(repository, cache):
+    primary = FetchAvailabilitiesHandler(repository, cache=cache)
+    replica = FetchAvailabilitiesHandler(repository, cache=cache, fill_cache=False)
+    await primary.handle_rows(_query(1, 2))
+
+    cache.invalidate(_booked("prac-1", day=1, mode=SlotMode.TELE))
+    # A lagging replica still shows the booked slot.
+    await replica.handle_rows(_query(1, 2))
+    await replica.handle_rows(_query(1, 2))
+
+    assert len(repository.calls) == 3
+    assert cache.get((TENANT, None, None, (MONDAY + timedelta(days=1)).date())) is None
+    assert len(cache) == 1
+    # The other day still serves the replica readers from the cache.
+    assert cache.hits == 2
+
+
+async def test_cached_rows_are_bounded(repository):
+    cache = AvailabilityCache(max_rows=20, ttl_seconds=60)
+    handler = FetchAvailabilitiesHandler(repository, cache=cache)
+
+    await handler.handle_rows(_query(0, 6))
+
+    assert cache.rows <= 20
+    assert len(cache) == 4  # the four most recent days of 4 slots (+1) each
+
+
+async def test_naive_and_long_windows_bypass_the_cache(repository, cache):
+    direct = []
+
+    async def list_availability_rows(**kwargs):
+        direct.append(kwargs)
+        return []
+
+    repository.list_availability_rows = list_availability_rows
+    handler = FetchAvailabilitiesHandler(repository, cache=cache)
+
+    await handler.handle_rows(
+        FetchAvailabilitiesQuery(
+            tenant_id=TENANT, starts_at=datetime(2025, 3, 3), ends_at=datetime(2025, 3, 4)
+        )
+    )
+    await handler.handle_rows(
+        FetchAvailabilitiesQuery(
+            tenant_id=TENANT, starts_at=MONDAY, ends_at=MONDAY + timedelta(days=90)
+        )
+    )
+
+    assert len(direct) == 2
+    assert repository.calls == []
+    assert cache.hits + cache.misses == 0
+
+
+@pytest.fixture
+async def slots(scheduling_db):
+    async with db.tenant_session(TENANT) as session:
+        session.add(CalendarDB(id="cal-1", tenant_id=TENANT, practitioner_id="prac-1"))
+        await session.flush()
+        for index in range(6):
+            starts_at = MONDAY + timedelta(hours=9 + 8 * index)
+            session.add(
+                SlotDB(
+                    id=f"slot-{index}",
+                    tenant_id=TENANT,
+                    calendar_id="cal-1",
+                    starts_at=starts_at,
+                    ends_at=starts_at + timedelta(hours=1),
+                    capacity=1,
+                    mode=SlotMode.ONSITE,
+                    status=SlotStatus.OPEN,
+                )
+            )
+        await session.commit()
+
+
+async def test_booked_slot_disappears_from_the_cache(slots):
+    cache = AvailabilityCache(max_rows=1_000, ttl_seconds=60)
+    query = FetchAvailabilitiesQuery(
+        tenant_id=TENANT, starts_at=MONDAY, ends_at=MONDAY + timedelta(days=3)
+    )
+
+    async with db.tenant_session(TENANT) as session:
+        handler = FetchAvailabilitiesHandler(SchedulingRepository(session), cache=cache)
+        before = [row.id for row in await handler.handle_rows(query)]
+        _, booked = await BookAppointmentHandler(SchedulingRepository(session)).handle(
+            BookAppointmentCommand(
+                tenant_id=TENANT, slot_id="slot-3", patient_id="patient-1", requested_by="user-1"
+            )
+        )
+        await session.commit()
+        cache.invalidate(booked)
+        after = [row.id for row in await handler.handle_rows(query)]
+
+    assert booked.practitioner_id == "prac-1"
+    assert booked.slot_starts_at == MONDAY + timedelta(hours=33)
+    assert before == [f"slot-{index}" for index in range(6)]
+    assert after == ["slot-0", "slot-1", "slot-2", "slot-4", "slot-5"]
+    assert cache.hits == 3  # the days of the window the booking did not touch
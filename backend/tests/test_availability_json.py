@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pydantic import TypeAdapter
+
+from src.core import db
+from src.features.scheduling.domain.entities import Slot
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus
+from src.features.scheduling.infra.models import CalendarDB, SlotDB
+from src.features.scheduling.infra.repositories import SchedulingRepository
+from src.features.scheduling.interfaces.dto import (
+    AvailabilityDTO,
+    availability_row_json,
+    availability_rows_json,
+)
+
+TENANT = "tenant-1"
+DTO_LIST = TypeAdapter(list[AvailabilityDTO])
+
+
+def _row(slot: Slot) -> tuple:
+    # As selected by AVAILABILITY_COLUMNS: enums come back as their raw values.
+    return (
+        slot.id,
+        slot.starts_at,
+        slot.ends_at,
+        slot.practitioner_id,
+        slot.mode.value,
+        slot.status.value,
+    )
+
+
+def _slot(index: int, starts_at: datetime) -> Slot:
+    return Slot(
+        id=f"slot-{index}",
+        tenant_id=TENANT,
+        calendar_id="cal-1",
+        practitioner_id="prac-é",
+        starts_at=starts_at,
+        ends_at=starts_at + timedelta(minutes=15),
+        mode=SlotMode.TELE if index % 2 else SlotMode.ONSITE,
+        status=SlotStatus.OPEN,
+    )
+
+
+def test_row_encoding_matches_the_response_model():
+    slots = [
+        _slot(0, datetime(2025, 3, 3, 8, tzinfo=timezone.utc)),
+        _slot(1, datetime(2025, 3, 3, 8, 0, 0, 120, tzinfo=timezone.utc)),
+        _slot(2, datetime(2025, 3, 3, 9, tzinfo=timezone(timedelta(hours=1)))),
+    ]
+    dtos = [AvailabilityDTO.from_domain(slot) for slot in slots]
+
+    assert availability_rows_json(_row(slot) for slot in slots) == DTO_LIST.dump_json(dtos)
+    assert availability_row_json(_row(slots[1])) == dtos[1].model_dump_json().encode()
+    assert availability_rows_json([]) == b"[]"
+
+
+@pytest.fixture
+async def slots(scheduling_db):
+    day = datetime(2025, 3, 3, 8, tzinfo=timezone.utc)
+    async with db.tenant_session(TENANT) as session:
+        session.add(CalendarDB(id="cal-1", tenant_id=TENANT, practitioner_id="prac-1"))
+        session.add(CalendarDB(id="cal-2", tenant_id=TENANT, practitioner_id="prac-2"))
+        await session.flush()
+        for index in range(10):
+            starts_at = day + timedelta(minutes=15 * index, microseconds=index)
+            session.add(
+                SlotDB(
+                    id=f"slot-{index}",
+                    tenant_id=TENANT,
+                    calendar_id=f"cal-{index % 2 + 1}",
+                    starts_at=starts_at,
+                    ends_at=starts_at + timedelta(minutes=15),
+                    capacity=1,
+                    mode=SlotMode.TELE if index % 3 else SlotMode.ONSITE,
+                    status=SlotStatus.CLOSED if index == 4 else SlotStatus.OPEN,
+                )
+            )
+        await session.commit()
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"practitioner_id": None, "mode": None},
+        {"practitioner_id": "prac-2", "mode": None},
+        {"practitioner_id": None, "mode": SlotMode.TELE},
+    ],
+)
+async def test_row_path_is_byte_identical_to_the_orm_path(slots, filters):
+    window = {
+        "starts_at": datetime(2025, 3, 1, tzinfo=timezone.utc),
+        "ends_at": datetime(2025, 3, 5, tzinfo=timezone.utc),
+    }
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        repository = SchedulingRepository(session)
+        domain = await repository.list_availabilities(TENANT, **window, **filters)
+        rows = await repository.list_availability_rows(TENANT, **window, **filters)
+
+    assert domain
+    expected = DTO_LIST.dump_json([AvailabilityDTO.from_domain(slot) for slot in domain])
+    assert availability_rows_json(rows) == expected
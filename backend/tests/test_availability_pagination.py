@@ -0,0 +1,150 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.core import db
+from src.core.http import limiter
+from src.core.security import AccessContext, get_access_context
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus
+from src.features.scheduling.infra.models import CalendarDB, SlotDB
+from src.features.scheduling.infra.repositories import SchedulingRepository
+from src.features.scheduling.interfaces import router_queries
+from src.features.scheduling.interfaces.dto import decode_cursor, encode_cursor
+
+TENANT = "tenant-1"
+DAY = datetime(2025, 3, 3, 8, tzinfo=timezone.utc)
+WINDOW = {"starts_at": DAY - timedelta(days=1), "ends_at": DAY + timedelta(days=1)}
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(DAY, "slot-1")) == (DAY, "slot-1")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(DAY.replace(tzinfo=None), "slot-1"))
+
+
+@pytest.fixture
+async def slots(scheduling_db):
+    """Three calendars with slots at the same start times, so ``starts_at`` alone ties."""
+    async with db.tenant_session(TENANT) as session:
+        for calendar in range(3):
+            session.add(
+                CalendarDB(id=f"cal-{calendar}", tenant_id=TENANT, practitioner_id="prac-1")
+            )
+        await session.flush()
+        for calendar in range(3):
+            for index in range(7):
+                starts_at = DAY + timedelta(minutes=15 * index)
+                session.add(
+                    SlotDB(
+                        id=f"slot-{index:02d}-{calendar}",
+                        tenant_id=TENANT,
+                        calendar_id=f"cal-{calendar}",
+                        starts_at=starts_at,
+                        ends_at=starts_at + timedelta(minutes=15),
+                        capacity=1,
+                        mode=SlotMode.ONSITE,
+                        status=SlotStatus.OPEN,
+                    )
+                )
+        await session.commit()
+    return sorted(
+        (DAY + timedelta(minutes=15 * index), f"slot-{index:02d}-{calendar}")
+        for calendar in range(3)
+        for index in range(7)
+    )
+
+
+async def test_keyset_pages_cover_the_window_once(slots):
+    seen: list[tuple[datetime, str]] = []
+    after = None
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        repository = SchedulingRepository(session)
+        while True:
+            page = await repository.list_availabilities(
+                TENANT, **WINDOW, practitioner_id=None, mode=None, after=after, limit=4
+            )
+            seen.extend((slot.starts_at, slot.id) for slot in page)
+            if len(page) < 4:
+                break
+            after = (page[-1].starts_at, page[-1].id)
+
+    assert seen == slots
+
+
+async def test_stream_yields_every_row_in_order(slots):
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        repository = SchedulingRepository(session)
+        streamed = [
+            (row.starts_at, row.id)
+            async for row in repository.stream_availability_rows(
+                TENANT, **WINDOW, practitioner_id=None, mode=None, batch_size=5
+            )
+        ]
+
+    assert streamed == slots
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    async def authorized(*_args, **_kwargs) -> None:
+        return None
+
+    monkeypatch.setattr(router_queries, "ensure_authorized", authorized)
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.include_router(router_queries.router)
+    app.dependency_overrides[get_access_context] = lambda: AccessContext(
+        sub="user-1", tenant_id=TENANT, roles=["nurse"], token="", claims={}
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def _params(**extra) -> dict[str, str]:
+    return {key: value.isoformat() for key, value in WINDOW.items()} | extra
+
+
+async def test_pages_follow_the_next_cursor_header(slots, client):
+    ids: list[str] = []
+    params = _params(limit="8")
+    while True:
+        response = await client.get("/queries/scheduling/availabilities", params=params)
+        assert response.status_code == 200
+        ids.extend(slot["id"] for slot in response.json())
+        cursor = response.headers.get(router_queries.NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+        params = _params(limit="8", cursor=cursor)
+
+    assert ids == [slot_id for _, slot_id in slots]
+
+
+@pytest.mark.parametrize(
+    "cursor", ["not-a-cursor", encode_cursor(DAY.replace(tzinfo=None), "slot-00-0")]
+)
+async def test_invalid_cursor_is_rejected(slots, client, cursor):
+    response = await client.get(
+        "/queries/scheduling/availabilities", params=_params(cursor=cursor)
+    )
+
+    assert response.status_code == 400
+
+
+async def test_ndjson_streams_one_slot_per_line(slots, client):
+    full = await client.get("/queries/scheduling/availabilities", params=_params())
+    streamed = await client.get(
+        "/queries/scheduling/availabilities",
+        params=_params(),
+        headers={"Accept": router_queries.NDJSON_MEDIA_TYPE},
+    )
+
+    assert streamed.headers["content-type"] == router_queries.NDJSON_MEDIA_TYPE
+    lines = streamed.text.splitlines()
+    assert [json.loads(line) for line in lines] == full.json()
+    assert len(lines) == len(slots)
@@ -0,0 +1,211 @@
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import delete, text, update
+
+from src.core import db
+from src.core.http import limiter
+from src.core.security import AccessContext, get_access_context
+from src.features.scheduling.application.queries import FetchAvailabilitySummaryQuery
+from src.features.scheduling.application.query_handlers import FetchAvailabilitySummaryHandler
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus
+from src.features.scheduling.infra.models import CalendarDB, SlotDB
+from src.features.scheduling.infra.repositories import SchedulingRepository
+from src.features.scheduling.interfaces import router_queries
+
+TENANT = "tenant-1"
+FIRST_DAY = date(2025, 3, 3)
+
+# Slots per (tenant, practitioner, mode, UTC day), recomputed from the slots themselves.
+EXPECTED = """
+SELECT s.tenant_id, c.practitioner_id, s.mode::text, (s.starts_at AT TIME ZONE 'UTC')::date,
+       count(*)
+FROM slots s JOIN calendars c ON c.id = s.calendar_id
+GROUP BY 1, 2, 3, 4
+"""
+ROLLUPS = """
+SELECT tenant_id, practitioner_id, mode::text, day, slot_count
+FROM slot_daily_rollups WHERE slot_count <> 0
+"""
+# Row versions of the rollups: unchanged unless a trigger wrote to them.
+ROLLUP_VERSIONS = "SELECT xmin::text FROM slot_daily_rollups ORDER BY xmin::text"
+
+
+def _slot(slot_id: str, calendar: str, starts_at: datetime, mode: SlotMode, tenant=TENANT):
+    return SlotDB(
+        id=slot_id,
+        tenant_id=tenant,
+        calendar_id=calendar,
+        starts_at=starts_at,
+        ends_at=starts_at + timedelta(minutes=30),
+        capacity=1,
+        mode=mode,
+        status=SlotStatus.OPEN,
+    )
+
+
+@pytest.fixture
+async def slots(scheduling_db):
+    """Two practitioners, three days, both modes; 23:30 UTC slots sit on their UTC day."""
+    async with db.tenant_session(TENANT) as session:
+        session.add_all(
+            [
+                CalendarDB(id="cal-a", tenant_id=TENANT, practitioner_id="prac-a"),
+                CalendarDB(id="cal-b", tenant_id=TENANT, practitioner_id="prac-b"),
+            ]
+        )
+        await session.flush()
+        for offset in range(3):
+            day = datetime.combine(FIRST_DAY, datetime.min.time(), timezone.utc)
+            day += timedelta(days=offset)
+            session.add_all(
+                [
+                    _slot(f"a-{offset}-1", "cal-a", day + timedelta(hours=9), SlotMode.ONSITE),
+                    _slot(f"a-{offset}-2", "cal-a", day + timedelta(hours=10), SlotMode.ONSITE),
+                    _slot(
+                        f"a-{offset}-3",
+                        "cal-a",
+                        day + timedelta(hours=23, minutes=30),
+                        SlotMode.TELE,
+                    ),
+                    _slot(f"b-{offset}-1", "cal-b", day + timedelta(hours=9), SlotMode.TELE),
+                ]
+            )
+        await session.commit()
+    async with db.tenant_session("tenant-2") as session:
+        session.add(CalendarDB(id="cal-other", tenant_id="tenant-2", practitioner_id="prac-a"))
+        await session.flush()
+        session.add(
+            _slot(
+                "other",
+                "cal-other",
+                datetime(2025, 3, 3, 9, tzinfo=timezone.utc),
+                SlotMode.ONSITE,
+                tenant="tenant-2",
+            )
+        )
+        await session.commit()
+    return scheduling_db
+
+
+async def _rollups_match_slots(engine) -> set[tuple]:
+    async with engine.connect() as connection:
+        expected = set((await connection.execute(text(EXPECTED))).all())
+        rollups = set((await connection.execute(text(ROLLUPS))).all())
+    assert rollups == expected
+    return rollups
+
+
+async def _summary(**filters) -> list[tuple]:
+    query = FetchAvailabilitySummaryQuery(
+        tenant_id=TENANT, starts_on=FIRST_DAY, ends_on=FIRST_DAY + timedelta(days=6), **filters
+    )
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        days = await FetchAvailabilitySummaryHandler(SchedulingRepository(session)).handle(query)
+    return [(day.day, day.practitioner_id, day.mode, day.open_slots) for day in days]
+
+
+async def test_rollups_follow_inserts_updates_and_deletes(slots):
+    assert len(await _rollups_match_slots(slots)) == 10
+
+    async with db.tenant_session(TENANT) as session:
+        # Close one slot, move another to the next day and switch a third to teleconsultation.
+        await session.execute(
+            update(SlotDB).where(SlotDB.id == "a-0-1").values(status=SlotStatus.CLOSED)
+        )
+        await session.execute(
+            update(SlotDB)
+            .where(SlotDB.id == "a-0-2")
+            .values(
+                starts_at=SlotDB.starts_at + timedelta(days=1, hours=1),
+                ends_at=SlotDB.ends_at + timedelta(days=1, hours=1),
+            )
+        )
+        await session.execute(
+            update(SlotDB).where(SlotDB.id == "b-1-1").values(mode=SlotMode.ONSITE)
+        )
+        await session.execute(delete(SlotDB).where(SlotDB.id.in_(["a-2-1", "a-2-2"])))
+        await session.commit()
+
+    await _rollups_match_slots(slots)
+
+
+async def test_bookings_leave_the_rollups_alone(slots):
+    async with slots.connect() as connection:
+        versions = (await connection.execute(text(ROLLUP_VERSIONS))).all()
+
+    async with db.tenant_session(TENANT) as session:
+        await session.execute(
+            update(SlotDB)
+            .where(SlotDB.id.in_(["a-0-1", "a-0-2", "b-0-1"]))
+            .values(status=SlotStatus.CLOSED, booked_count=1)
+        )
+        await session.commit()
+
+    async with slots.connect() as connection:
+        assert (await connection.execute(text(ROLLUP_VERSIONS))).all() == versions
+    assert (FIRST_DAY, "prac-a", SlotMode.ONSITE, 2) not in await _summary()
+
+
+async def test_summary_counts_open_slots_per_day(slots):
+    async with db.tenant_session(TENANT) as session:
+        await session.execute(
+            update(SlotDB).where(SlotDB.id.in_(["a-1-1", "a-1-2"])).values(status=SlotStatus.CLOSED)
+        )
+        await session.commit()
+
+    second_day = FIRST_DAY + timedelta(days=1)
+    assert await _summary(practitioner_id="prac-a", mode=SlotMode.ONSITE) == [
+        (FIRST_DAY, "prac-a", SlotMode.ONSITE, 2),
+        # The second day is fully booked: its zero row is left out.
+        (FIRST_DAY + timedelta(days=2), "prac-a", SlotMode.ONSITE, 2),
+    ]
+    summary = await _summary()
+    assert [(day, practitioner) for day, practitioner, _, _ in summary] == sorted(
+        (day, practitioner) for day, practitioner, _, _ in summary
+    )
+    assert (second_day, "prac-a", SlotMode.TELE, 1) in summary
+    assert sum(count for *_, count in summary) == 10
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    async def authorized(*_args, **_kwargs) -> None:
+        return None
+
+    monkeypatch.setattr(router_queries, "ensure_authorized", authorized)
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.include_router(router_queries.router)
+    app.dependency_overrides[get_access_context] = lambda: AccessContext(
+        sub="user-1", tenant_id=TENANT, roles=["patient"], token="", claims={}
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_summary_endpoint(slots, client):
+    response = await client.get(
+        "/queries/scheduling/availability-summary",
+        params={"starts_on": "2025-03-04", "ends_on": "2025-03-04", "practitioner_id": "prac-b"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"day": "2025-03-04", "practitioner_id": "prac-b", "mode": "tele", "open_slots": 1}
+    ]
+
+
+@pytest.mark.parametrize(
+    ("starts_on", "ends_on"), [("2025-03-04", "2025-03-03"), ("2025-01-01", "2025-12-31")]
+)
+async def test_summary_endpoint_rejects_bad_windows(client, starts_on, ends_on):
+    response = await client.get(
+        "/queries/scheduling/availability-summary",
+        params={"starts_on": starts_on, "ends_on": ends_on},
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,281 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.exc import NoResultFound
+
+from src.core import db
+from src.core.security import AccessContext, get_access_context
+from src.features.scheduling.domain.value_objects import AppointmentStatus, SlotMode, SlotStatus
+from src.features.scheduling.infra.models import (
+    AppointmentDB,
+    CalendarDB,
+    PatientTenantGrantDB,
+    SlotDB,
+)
+from src.features.scheduling.infra.patient_grants import PatientGrantCache
+from src.features.scheduling.infra.repositories import SchedulingRepository, SlotNotAvailableError
+from src.features.scheduling.interfaces import router_commands
+
+TENANT = "tenant-1"
+STARTS_AT = datetime(2025, 6, 2, 9, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def slots(scheduling_db):
+    async with db.tenant_session(TENANT) as session:
+        session.add(CalendarDB(id="cal-a", tenant_id=TENANT, practitioner_id="prac-a"))
+        await session.flush()
+        session.add_all(
+            SlotDB(
+                id=slot_id,
+                tenant_id=TENANT,
+                calendar_id="cal-a",
+                starts_at=STARTS_AT + timedelta(hours=hour),
+                ends_at=STARTS_AT + timedelta(hours=hour, minutes=30),
+                capacity=capacity,
+                mode=SlotMode.TELE,
+                status=status,
+            )
+            for hour, (slot_id, capacity, status) in enumerate(
+                [
+                    ("single", 1, SlotStatus.OPEN),
+                    ("group", 3, SlotStatus.OPEN),
+                    ("closed", 3, SlotStatus.CLOSED),
+                ]
+                # A course of sessions, two patients per session.
+                + [(f"course-{session}", 2, SlotStatus.OPEN) for session in range(6)]
+            )
+        )
+        await session.commit()
+    return scheduling_db
+
+
+async def _book(
+    slot_id: str,
+    patient_id: str = "patient-1",
+    mode: SlotMode | None = None,
+    grants: PatientGrantCache | None = None,
+):
+    async with db.tenant_session(TENANT) as session:
+        booked = await SchedulingRepository(session, grants=grants).create_appointment(
+            TENANT, slot_id, patient_id, "check-up", mode
+        )
+        await session.commit()
+    return booked
+
+
+async def _stored(slot_id: str) -> tuple[SlotStatus, int, int]:
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        slot = await session.get(SlotDB, slot_id)
+        appointments = await session.scalar(
+            select(func.count(AppointmentDB.id)).where(
+                AppointmentDB.slot_id == slot_id,
+                AppointmentDB.status == AppointmentStatus.BOOKED,
+            )
+        )
+    return slot.status, slot.booked_count, appointments
+
+
+async def test_booking_reserves_a_place(slots):
+    appointment, slot = await _book("group")
+
+    assert (appointment.slot_id, appointment.patient_id, appointment.reason) == (
+        "group",
+        "patient-1",
+        "check-up",
+    )
+    # Without a requested mode the appointment takes the slot's.
+    assert appointment.mode == SlotMode.TELE
+    assert appointment.status == AppointmentStatus.BOOKED
+    assert (slot.practitioner_id, slot.starts_at, slot.status) == (
+        "prac-a",
+        STARTS_AT + timedelta(hours=1),
+        SlotStatus.OPEN,
+    )
+    assert await _stored("group") == (SlotStatus.OPEN, 1, 1)
+
+    appointment, slot = await _book("single", "patient-2", SlotMode.ONSITE)
+    assert appointment.mode == SlotMode.ONSITE
+    assert slot.status == SlotStatus.CLOSED
+    assert await _stored("single") == (SlotStatus.CLOSED, 1, 1)
+
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        grants = await session.scalars(select(PatientTenantGrantDB.patient_user_id))
+        assert sorted(grants) == ["patient-1", "patient-2"]
+
+
+async def test_slots_that_cannot_be_booked(slots):
+    await _book("single")
+
+    with pytest.raises(SlotNotAvailableError, match="not available"):
+        await _book("single")
+    with pytest.raises(SlotNotAvailableError, match="not available"):
+        await _book("closed")
+    with pytest.raises(NoResultFound):
+        await _book("missing")
+    assert await _stored("single") == (SlotStatus.CLOSED, 1, 1)
+
+
+async def test_capacity_is_never_exceeded(slots):
+    outcomes = await asyncio.gather(
+        *(_book("group", f"patient-{attempt}") for attempt in range(25)),
+        return_exceptions=True,
+    )
+
+    booked = [outcome for outcome in outcomes if not isinstance(outcome, Exception)]
+    refused = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    assert len(booked) == 3
+    assert all(isinstance(error, SlotNotAvailableError) for error in refused), refused
+    # The place that filled the slot closed it.
+    assert sorted(slot.status for _, slot in booked) == [
+        SlotStatus.CLOSED,
+        SlotStatus.OPEN,
+        SlotStatus.OPEN,
+    ]
+    assert await _stored("group") == (SlotStatus.CLOSED, 3, 3)
+
+
+async def _book_series(slot_ids: list[str], patient_id: str = "patient-1"):
+    async with db.tenant_session(TENANT) as session:
+        bookings = await SchedulingRepository(session).create_appointment_series(
+            TENANT, slot_ids, patient_id, "physiotherapy", None
+        )
+        await session.commit()
+    return bookings
+
+
+async def test_series_are_booked_in_one_go(slots):
+    slot_ids = ["course-4", "course-0", "course-2", "single"]
+
+    bookings = await _book_series(slot_ids)
+
+    assert [appointment.slot_id for appointment, _ in bookings] == slot_ids
+    assert {appointment.patient_id for appointment, _ in bookings} == {"patient-1"}
+    assert [slot.status for _, slot in bookings] == [SlotStatus.OPEN] * 3 + [SlotStatus.CLOSED]
+    assert bookings[0][1].starts_at == STARTS_AT + timedelta(hours=7)
+    assert await _stored("course-0") == (SlotStatus.OPEN, 1, 1)
+    assert await _stored("single") == (SlotStatus.CLOSED, 1, 1)
+
+
+async def test_series_are_all_or_nothing(slots):
+    await _book("single")
+
+    with pytest.raises(SlotNotAvailableError, match="single, closed"):
+        await _book_series(["course-0", "single", "closed"])
+    with pytest.raises(NoResultFound, match="missing"):
+        await _book_series(["course-0", "missing"])
+
+    assert await _stored("course-0") == (SlotStatus.OPEN, 0, 0)
+
+
+async def test_overlapping_series_do_not_deadlock(slots):
+    forward = [f"course-{session}" for session in range(6)]
+    # Each series takes one place per session, whatever the order of its slots.
+    outcomes = await asyncio.gather(
+        *(
+            _book_series(forward if attempt % 2 else forward[::-1], f"patient-{attempt}")
+            for attempt in range(6)
+        ),
+        return_exceptions=True,
+    )
+
+    booked = [outcome for outcome in outcomes if not isinstance(outcome, Exception)]
+    refused = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    assert len(booked) == 2
+    assert all(isinstance(error, SlotNotAvailableError) for error in refused), refused
+    for slot_id in forward:
+        assert await _stored(slot_id) == (SlotStatus.CLOSED, 2, 2)
+
+
+class UnusedSession:
+    def __getattr__(self, name):
+        raise AssertionError(f"The database was queried ({name})")
+
+
+async def test_known_grants_skip_the_database():
+    grants = PatientGrantCache(maxsize=2)
+    grants.add(("patient-1", TENANT))
+
+    await SchedulingRepository(UnusedSession(), grants=grants)._ensure_patient_grant(
+        "patient-1", TENANT
+    )
+
+    assert (grants.hits, grants.misses) == (1, 0)
+    for patient in ("patient-2", "patient-3", "patient-4"):
+        grants.add((patient, TENANT))
+    assert len(grants) == 2
+    assert ("patient-1", TENANT) not in grants
+    assert grants.hit_ratio == 0.5
+    disabled = PatientGrantCache(maxsize=0)
+    disabled.add(("patient-1", TENANT))
+    assert len(disabled) == 0
+
+
+async def test_grants_are_cached_once_committed(slots):
+    grants = PatientGrantCache(maxsize=100)
+
+    # A refused booking rolls its grant back: it is not remembered.
+    await _book("single", "patient-2")
+    with pytest.raises(SlotNotAvailableError):
+        await _book("single", "patient-1", grants=grants)
+    assert len(grants) == 0
+
+    # The first bookings of a patient race on the grant without failing.
+    outcomes = await asyncio.gather(
+        *(_book(f"course-{session}", grants=grants) for session in range(4))
+    )
+    assert len(outcomes) == 4
+    assert ("patient-1", TENANT) in grants
+
+    misses = grants.misses
+    await _book("group", grants=grants)
+    assert grants.misses == misses
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        grants_stored = await session.scalars(select(PatientTenantGrantDB.patient_user_id))
+        assert sorted(grants_stored) == ["patient-1", "patient-2"]
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    async def authorized(*_args, **_kwargs) -> None:
+        return None
+
+    monkeypatch.setattr(router_commands, "ensure_authorized", authorized)
+    app = FastAPI()
+    app.include_router(router_commands.router)
+    app.dependency_overrides[get_access_context] = lambda: AccessContext(
+        sub="patient-9", tenant_id=TENANT, roles=["patient"], token="", claims={}
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_series_endpoint(slots, client):
+    series = {"slot_ids": ["course-1", "course-3"], "patient_id": "someone-else"}
+
+    response = await client.post("/commands/scheduling/appointment-series", json=series)
+
+    assert response.status_code == 201
+    assert [item["status"] for item in response.json()["appointments"]] == ["booked"] * 2
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        patients = await session.scalars(
+            select(AppointmentDB.patient_id).where(AppointmentDB.slot_id.like("course-%"))
+        )
+        # Patients book for themselves.
+        assert list(patients) == ["patient-9", "patient-9"]
+
+    for payload, expected in (
+        ({"slot_ids": ["course-1", "missing"]}, 404),
+        ({"slot_ids": ["closed"]}, 409),
+        ({"slot_ids": ["course-1", "course-1"]}, 422),
+        ({"slot_ids": []}, 422),
+    ):
+        response = await client.post(
+            "/commands/scheduling/appointment-series", json={"patient_id": "p"} | payload
+        )
+        assert response.status_code == expected, response.json()
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+from src.core import casbin_enforcer
+from src.core.casbin_enforcer import DecisionCache, VersionedEnforcer
+
+CASBIN_DIR = Path(__file__).resolve().parents[1] / "casbin"
+
+
+@pytest.fixture
+def enforcer(monkeypatch):
+    enforcer = VersionedEnforcer(
+        str(CASBIN_DIR / "model.conf"),
+        str(CASBIN_DIR / "seed_policy.csv"),
+        enable_log=False,
+    )
+    enforcer.enable_auto_save(False)
+    monkeypatch.setattr(casbin_enforcer, "_enforcer", enforcer)
+    monkeypatch.setattr(casbin_enforcer, "_decisions", DecisionCache(maxsize=128))
+    return enforcer
+
+
+async def test_repeated_decision_is_served_from_cache(enforcer, monkeypatch):
+    calls = 0
+    original_decide = enforcer.decide
+
+    def counting_decide(*rvals):
+        nonlocal calls
+        calls += 1
+        return original_decide(*rvals)
+
+    monkeypatch.setattr(enforcer, "decide", counting_decide)
+
+    for _ in range(3):
+        assert await casbin_enforcer.authorize("patient", "*", "/queries/scheduling/availabilities", "GET")
+
+    assert calls == 1
+    assert casbin_enforcer.decision_cache_stats()["hits"] == 2
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda e: e.add_policy("nurse", "*", "/commands/dictation/notes", "POST", "allow"),
+        lambda e: e.add_grouping_policy("nurse", "doctor", "*"),
+        lambda e: e.load_policy(),
+    ],
+)
+async def test_policy_changes_bump_version(enforcer, change):
+    version = enforcer.policy_version
+    change(enforcer)
+    assert enforcer.policy_version > version
+
+
+async def test_cached_decisions_follow_policy_changes(enforcer):
+    request = ("nurse", "tenant-1", "/commands/dictation/notes", "POST")
+    assert not await casbin_enforcer.authorize(*request)
+
+    enforcer.add_policy("nurse", "*", "/commands/dictation/notes", "POST", "allow")
+    assert await casbin_enforcer.authorize(*request)
+
+    enforcer.remove_policy("nurse", "*", "/commands/dictation/notes", "POST", "allow")
+    assert not await casbin_enforcer.authorize(*request)
+
+
+async def test_authorize_any_stops_at_first_allow(enforcer, monkeypatch):
+    checked: list[str] = []
+    original_decide = enforcer.decide
+
+    def recording_decide(sub, *rest):
+        checked.append(sub)
+        return original_decide(sub, *rest)
+
+    monkeypatch.setattr(enforcer, "decide", recording_decide)
+
+    allowed = await casbin_enforcer.authorize_any(
+        ["user-1", "doctor", "secretary"], "tenant-1", "/commands/dictation/notes", "POST"
+    )
+
+    assert allowed
+    assert checked == ["user-1", "doctor"]
@@ -0,0 +1,139 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert
+
+from src.core.casbin_domains import DomainPolicyLoader, DomainScopedAdapter
+from src.core.casbin_enforcer import VersionedEnforcer
+from src.core.casbin_watcher import PolicyChange, apply_policy_change
+
+CASBIN_DIR = Path(__file__).resolve().parents[1] / "casbin"
+
+RULES = [
+    ("p", "patient", "*", "/queries/scheduling/availabilities", "GET", "allow"),
+    ("p", "nurse", "tenant-1", "/commands/scheduling/appointments", "POST", "allow"),
+    ("p", "nurse", "tenant-2", "/commands/dictation/notes", "POST", "allow"),
+    ("g", "user-1", "nurse", "tenant-1"),
+    ("g", "user-2", "nurse", "tenant-2"),
+]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    adapter = DomainScopedAdapter(f"sqlite:///{tmp_path / 'casbin.db'}")
+    rows = [
+        {"ptype": ptype, **{f"v{i}": value for i, value in enumerate(values)}}
+        for ptype, *values in RULES
+    ]
+    with adapter._session_scope() as session:
+        for row in rows:
+            session.execute(insert(adapter._db_class.__table__), row)
+    return adapter
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def enforcer(adapter, clock):
+    enforcer = VersionedEnforcer(str(CASBIN_DIR / "model.conf"), enable_log=False)
+    enforcer.set_adapter(adapter)
+    enforcer.load_policy()
+    enforcer.domain_loader = DomainPolicyLoader(enforcer, adapter, idle_seconds=60, timer=clock)
+    return enforcer
+
+
+async def test_only_global_rules_are_loaded_at_startup(enforcer):
+    assert enforcer.get_policy() == [list(RULES[0][1:])]
+    assert enforcer.get_grouping_policy() == []
+    assert enforcer.decide("patient", "tenant-1", "/queries/scheduling/availabilities", "GET")
+
+
+async def test_tenant_rules_load_on_first_use_and_stay_scoped(enforcer):
+    await enforcer.domain_loader.ensure_loaded("tenant-1")
+
+    assert enforcer.domain_loader.loaded_domains == {"tenant-1"}
+    assert enforcer.decide("user-1", "tenant-1", "/commands/scheduling/appointments", "POST")
+    # A tenant rule held in memory must not apply to another tenant.
+    assert not enforcer.decide("nurse", "tenant-2", "/commands/scheduling/appointments", "POST")
+    assert not enforcer.decide("user-2", "tenant-2", "/commands/dictation/notes", "POST")
+
+
+async def test_concurrent_requests_share_one_read(enforcer, adapter, monkeypatch):
+    reads = 0
+    read_rules = adapter.read_rules
+
+    def counting_read(domains):
+        nonlocal reads
+        reads += 1
+        return read_rules(domains)
+
+    monkeypatch.setattr(adapter, "read_rules", counting_read)
+
+    await asyncio.gather(*(enforcer.domain_loader.ensure_loaded("tenant-2") for _ in range(5)))
+
+    assert reads == 1
+    assert enforcer.decide("user-2", "tenant-2", "/commands/dictation/notes", "POST")
+
+
+async def test_idle_domains_are_evicted(enforcer, clock):
+    loader = enforcer.domain_loader
+    await loader.ensure_loaded("tenant-1")
+    await loader.ensure_loaded("tenant-2")
+
+    clock.now = 45
+    await loader.ensure_loaded("tenant-2")
+    clock.now = 70
+
+    assert loader.evict_idle() == ["tenant-1"]
+    assert loader.loaded_domains == {"tenant-2"}
+    assert not enforcer.decide("user-1", "tenant-1", "/commands/scheduling/appointments", "POST")
+    assert enforcer.decide("user-2", "tenant-2", "/commands/dictation/notes", "POST")
+    assert len(enforcer.get_policy()) == 2
+
+    # The next request for the evicted tenant reads its rules again.
+    await loader.ensure_loaded("tenant-1")
+    assert enforcer.decide("user-1", "tenant-1", "/commands/scheduling/appointments", "POST")
+
+
+async def test_remote_changes_for_unloaded_domains_are_ignored(enforcer):
+    await enforcer.domain_loader.ensure_loaded("tenant-1")
+    change = PolicyChange(
+        op="add",
+        origin="other-worker",
+        sec="p",
+        ptype="p",
+        rules=[
+            ["doctor", "tenant-1", "/commands/dictation/notes", "POST", "allow"],
+            ["doctor", "tenant-3", "/commands/dictation/notes", "POST", "allow"],
+        ],
+    )
+
+    apply_policy_change(enforcer, change)
+
+    assert enforcer.has_policy("doctor", "tenant-1", "/commands/dictation/notes", "POST", "allow")
+    assert not enforcer.has_policy(
+        "doctor", "tenant-3", "/commands/dictation/notes", "POST", "allow"
+    )
+
+
+async def test_full_reload_keeps_loaded_domains_only(enforcer):
+    await enforcer.domain_loader.ensure_loaded("tenant-1")
+
+    enforcer.load_policy()
+
+    domains = {rule[1] for rule in enforcer.get_policy()}
+    assert domains == {"*", "tenant-1"}
+    with pytest.raises(RuntimeError):
+        enforcer.save_policy()
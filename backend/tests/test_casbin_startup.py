@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from src.core import casbin_enforcer
+from src.core.casbin_domains import DomainScopedAdapter
+
+
+@pytest.fixture
+def sqlite_adapter(tmp_path, monkeypatch):
+    adapter = DomainScopedAdapter(f"sqlite:///{tmp_path / 'casbin.db'}")
+    monkeypatch.setattr(casbin_enforcer, "DomainScopedAdapter", lambda _url, lazy: adapter)
+    return adapter
+
+
+def test_empty_store_is_seeded_with_one_insert(settings, sqlite_adapter):
+    inserts = 0
+
+    def count_inserts(_conn, _cursor, statement, _params, _context, _executemany):
+        nonlocal inserts
+        inserts += statement.lstrip().upper().startswith("INSERT")
+
+    event.listen(sqlite_adapter._engine, "before_cursor_execute", count_inserts)
+
+    enforcer = casbin_enforcer._build_enforcer(settings)
+
+    assert inserts == 1
+    assert len(enforcer.get_policy()) == 15
+    assert enforcer.has_grouping_policy("doctor", "doctor", "*")
+
+    reloaded = casbin_enforcer._build_enforcer(settings)
+    assert sorted(reloaded.get_policy()) == sorted(enforcer.get_policy())
+    assert sorted(reloaded.get_grouping_policy()) == sorted(enforcer.get_grouping_policy())
+    assert inserts == 1  # the second start only reads the policy
+
+
+async def test_enforcer_is_built_off_the_event_loop(settings, sqlite_adapter, monkeypatch):
+    monkeypatch.setattr(settings, "casbin_watcher_enabled", False)
+    monkeypatch.setattr(casbin_enforcer, "_enforcer", None)
+    build_threads = []
+    build = casbin_enforcer._build_enforcer
+
+    def recording_build(settings):
+        build_threads.append(threading.get_ident())
+        return build(settings)
+
+    monkeypatch.setattr(casbin_enforcer, "_build_enforcer", recording_build)
+
+    enforcer = await casbin_enforcer.get_enforcer(settings)
+
+    assert build_threads and build_threads[0] != threading.get_ident()
+    assert await casbin_enforcer.authorize(
+        "patient", "*", "/queries/scheduling/availabilities", "GET"
+    )
+    assert enforcer is casbin_enforcer._enforcer
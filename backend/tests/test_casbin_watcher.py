@@ -0,0 +1,144 @@
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from src.core.casbin_enforcer import VersionedEnforcer
+from src.core.casbin_watcher import PolicyChange, PostgresWatcher, apply_policy_change
+
+CASBIN_DIR = Path(__file__).resolve().parents[1] / "casbin"
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+NOTES = ("/commands/dictation/notes", "POST")
+
+
+def _memory_enforcer() -> VersionedEnforcer:
+    enforcer = VersionedEnforcer(
+        str(CASBIN_DIR / "model.conf"),
+        str(CASBIN_DIR / "seed_policy.csv"),
+        enable_log=False,
+    )
+    enforcer.enable_auto_save(False)
+    return enforcer
+
+
+def test_payload_round_trip():
+    change = PolicyChange(
+        op="add",
+        origin="worker-1",
+        sec="p",
+        ptype="p",
+        rules=[["nurse", "*", "/x", "GET", "allow"]],
+    )
+    assert PolicyChange.from_payload(change.to_payload()) == change
+
+
+def test_remote_changes_are_applied_incrementally(monkeypatch):
+    enforcer = _memory_enforcer()
+    monkeypatch.setattr(enforcer, "load_policy", lambda: pytest.fail("must not reload the policy"))
+    version = enforcer.policy_version
+
+    apply_policy_change(
+        enforcer,
+        PolicyChange(
+            op="add", origin="other", sec="g", ptype="g", rules=[["user-1", "doctor", "tenant-1"]]
+        ),
+    )
+    assert enforcer.decide("user-1", "tenant-1", *NOTES)
+    assert not enforcer.decide("user-1", "tenant-2", *NOTES)
+
+    apply_policy_change(
+        enforcer,
+        PolicyChange(
+            op="remove_filtered",
+            origin="other",
+            sec="g",
+            ptype="g",
+            field_index=0,
+            field_values=["user-1"],
+        ),
+    )
+    assert not enforcer.decide("user-1", "tenant-1", *NOTES)
+    assert enforcer.policy_version == version + 2
+
+
+def test_duplicate_changes_do_not_bump_the_version():
+    enforcer = _memory_enforcer()
+    version = enforcer.policy_version
+
+    apply_policy_change(
+        enforcer,
+        PolicyChange(
+            op="add", origin="other", sec="p", ptype="p", rules=[["doctor", "*", *NOTES, "allow"]]
+        ),
+    )
+
+    assert enforcer.policy_version == version
+
+
+async def test_remote_reloads_run_off_the_event_loop(monkeypatch):
+    import threading
+
+    enforcer = _memory_enforcer()
+    loads: list[int] = []
+    release = threading.Event()
+
+    def load_policy():
+        release.wait(5)
+        loads.append(threading.get_ident())
+
+    monkeypatch.setattr(enforcer, "load_policy", load_policy)
+    watcher = PostgresWatcher("unused", "casbin_policy_test")
+    reload = PolicyChange(op="reload", origin="other").to_payload()
+
+    for _ in range(3):
+        watcher._on_notification(enforcer, reload)
+        await asyncio.sleep(0.01)
+    assert loads == []
+    release.set()
+    await watcher._reload_task
+
+    # The reloads asked for during the first one ran as one more.
+    assert len(loads) == 2
+    assert threading.get_ident() not in loads
+
+
+@pytest.mark.skipif(
+    TEST_DATABASE_URL is None, reason="Requires TEST_DATABASE_URL pointing to PostgreSQL"
+)
+async def test_workers_converge_through_notify():
+    from casbin_sqlalchemy_adapter import Adapter
+
+    dsn = TEST_DATABASE_URL.replace("+asyncpg", "")
+    sqlalchemy_url = dsn.replace("postgresql://", "postgresql+psycopg://", 1)
+    workers = []
+    for _ in range(2):
+        enforcer = VersionedEnforcer(
+            str(CASBIN_DIR / "model.conf"), Adapter(sqlalchemy_url), enable_log=False
+        )
+        watcher = PostgresWatcher(dsn, "casbin_policy_test")
+        enforcer.set_watcher(watcher)
+        await watcher.start(enforcer)
+        workers.append((enforcer, watcher))
+    await asyncio.sleep(0.5)
+
+    (writer, _), (reader, _) = workers
+    rule = ("nurse", "*", "/commands/watcher-test", "POST", "allow")
+    try:
+        writer.add_policy(*rule)
+        for _ in range(20):
+            if reader.decide("nurse", "tenant-1", "/commands/watcher-test", "POST"):
+                break
+            await asyncio.sleep(0.05)
+        assert reader.decide("nurse", "tenant-1", "/commands/watcher-test", "POST")
+
+        writer.remove_policy(*rule)
+        for _ in range(20):
+            if not reader.decide("nurse", "tenant-1", "/commands/watcher-test", "POST"):
+                break
+            await asyncio.sleep(0.05)
+        assert not reader.decide("nurse", "tenant-1", "/commands/watcher-test", "POST")
+    finally:
+        for _, watcher in workers:
+            await watcher.stop()
@@ -0,0 +1,109 @@
+import asyncio
+import os
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.util import greenlet_spawn
+
+from src.core.db_pool import pool_options
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class FakeConnection:
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _sample(name: str, label: str) -> float:
+    return REGISTRY.get_sample_value(name, {"pool": label}) or 0.0
+
+
+@pytest.fixture
+def make_pool(settings, monkeypatch):
+    def make(label: str, **overrides):
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        options = pool_options(settings, label)
+        options.pop("pool_pre_ping")
+        return options.pop("poolclass")(
+            FakeConnection,
+            pool_size=options["pool_size"],
+            max_overflow=options["max_overflow"],
+            timeout=options["pool_timeout"],
+            recycle=options["pool_recycle"],
+        )
+
+    return make
+
+
+async def test_checkout_wait_is_observed_per_pool(make_pool):
+    pool = make_pool("test-wait", db_pool_size=2, db_max_overflow=0)
+
+    connections = [await greenlet_spawn(pool.connect) for _ in range(2)]
+
+    assert _sample("db_pool_checkout_wait_seconds_count", "test-wait") == 2
+    assert pool.checkedout() == 2
+    for connection in connections:
+        await greenlet_spawn(connection.close)
+    assert pool.checkedout() == 0
+
+
+async def test_exhausted_pool_counts_timeouts(make_pool):
+    pool = make_pool(
+        "test-timeout", db_pool_size=1, db_max_overflow=0, db_pool_timeout_seconds=0.05
+    )
+    held = await greenlet_spawn(pool.connect)
+
+    with pytest.raises(PoolTimeoutError):
+        await greenlet_spawn(pool.connect)
+
+    assert _sample("db_pool_checkout_timeouts_total", "test-timeout") == 1
+    assert _sample("db_pool_checkout_wait_seconds_sum", "test-timeout") >= 0.05
+    await greenlet_spawn(held.close)
+
+
+async def test_waiting_checkout_gets_the_released_connection(make_pool):
+    pool = make_pool("test-release", db_pool_size=1, db_max_overflow=0)
+    held = await greenlet_spawn(pool.connect)
+
+    waiter = asyncio.create_task(greenlet_spawn(pool.connect))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+    await greenlet_spawn(held.close)
+    connection = await waiter
+
+    assert _sample("db_pool_checkout_wait_seconds_sum", "test-release") >= 0.05
+    await greenlet_spawn(connection.close)
+
+
+def test_dispose_keeps_the_metrics_label(make_pool):
+    pool = make_pool("test-recreate")
+
+    assert pool.recreate().metrics_label == "test-recreate"
+
+
+@pytest.mark.skipif(
+    TEST_DATABASE_URL is None, reason="Requires TEST_DATABASE_URL pointing to PostgreSQL"
+)
+async def test_engine_pool_gauges(settings, monkeypatch):
+    from src.core import db
+
+    monkeypatch.setattr(settings, "database_url", TEST_DATABASE_URL)
+    await db.dispose_engine()
+    db.get_engine(settings)
+    ages_before = _sample("db_pool_connection_age_seconds_count", "primary")
+    try:
+        async with db.get_session_factory()() as session:
+            await session.execute(text("SELECT 1"))
+            assert _sample("db_pool_checked_out_connections", "primary") == 1
+            assert _sample("db_pool_size_connections", "primary") == settings.db_pool_size
+        assert _sample("db_pool_checked_out_connections", "primary") == 0
+        assert _sample("db_pool_connection_age_seconds_count", "primary") == ages_before + 1
+    finally:
+        await db.dispose_engine()
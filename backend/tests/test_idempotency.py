@@ -0,0 +1,182 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import func, select
+
+from src.core import db
+from src.core.security import AccessContext, get_access_context
+from src.core.settings import get_settings
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus
+from src.features.scheduling.infra.idempotency import IdempotencyStore, request_hash
+from src.features.scheduling.infra.models import AppointmentDB, CalendarDB, IdempotencyKeyDB, SlotDB
+from src.features.scheduling.interfaces import router_commands
+
+TENANT = "tenant-1"
+STARTS_AT = datetime(2025, 6, 2, 9, tzinfo=timezone.utc)
+URL = "/commands/scheduling/appointments"
+BOOKING = {"slot_id": "group", "patient_id": "patient-1", "reason": "check-up"}
+
+
+@pytest.fixture
+async def slots(scheduling_db):
+    async with db.tenant_session(TENANT) as session:
+        session.add(CalendarDB(id="cal-a", tenant_id=TENANT, practitioner_id="prac-a"))
+        await session.flush()
+        session.add_all(
+            SlotDB(
+                id=slot_id,
+                tenant_id=TENANT,
+                calendar_id="cal-a",
+                starts_at=STARTS_AT + timedelta(hours=hour),
+                ends_at=STARTS_AT + timedelta(hours=hour, minutes=30),
+                capacity=3,
+                mode=SlotMode.ONSITE,
+                status=status,
+            )
+            for hour, (slot_id, status) in enumerate(
+                [("group", SlotStatus.OPEN), ("closed", SlotStatus.CLOSED)]
+            )
+        )
+        await session.commit()
+    return scheduling_db
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    async def authorized(*_args, **_kwargs) -> None:
+        return None
+
+    monkeypatch.setattr(router_commands, "ensure_authorized", authorized)
+    app = FastAPI()
+    app.include_router(router_commands.router)
+    app.dependency_overrides[get_access_context] = lambda: AccessContext(
+        sub="secretary-1", tenant_id=TENANT, roles=["secretary"], token="", claims={}
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def _booked() -> tuple[int, int]:
+    """Appointments of the slot "group" and its booked_count."""
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        appointments = await session.scalar(
+            select(func.count(AppointmentDB.id)).where(AppointmentDB.slot_id == "group")
+        )
+        slot = await session.get(SlotDB, "group")
+    return appointments, slot.booked_count
+
+
+async def test_retries_replay_the_first_response(slots, client):
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = await client.post(URL, json=BOOKING, headers=headers)
+    retry = await client.post(URL, json=BOOKING, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert await _booked() == (1, 1)
+
+    # Another key books again; the same key with another request is refused.
+    assert (
+        await client.post(URL, json=BOOKING, headers={"Idempotency-Key": "2"})
+    ).status_code == 201
+    reused = await client.post(URL, json=BOOKING | {"reason": "other"}, headers=headers)
+    assert reused.status_code == 422
+    assert await _booked() == (2, 2)
+
+
+async def test_concurrent_duplicates_wait_for_the_first_attempt(slots, client):
+    headers = {"Idempotency-Key": "double-click"}
+
+    responses = await asyncio.gather(
+        *(client.post(URL, json=BOOKING, headers=headers) for _ in range(6))
+    )
+
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.json()["appointment_id"] for response in responses}) == 1
+    assert sum("Idempotent-Replayed" in response.headers for response in responses) == 5
+    assert await _booked() == (1, 1)
+
+
+async def test_replays_do_not_wait_for_the_slot_lock(slots, client):
+    headers = {"Idempotency-Key": "locked"}
+    assert (await client.post(URL, json=BOOKING, headers=headers)).status_code == 201
+
+    async with db.tenant_session(TENANT) as session:
+        await session.execute(select(SlotDB).where(SlotDB.id == "group").with_for_update())
+        retry = await asyncio.wait_for(client.post(URL, json=BOOKING, headers=headers), 5)
+        await session.rollback()
+
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+async def test_failures_and_expired_keys_are_not_replayed(slots, client, monkeypatch):
+    refused = {"Idempotency-Key": "refused"}
+    closed = BOOKING | {"slot_id": "closed"}
+    assert (await client.post(URL, json=closed, headers=refused)).status_code == 409
+    assert (await client.post(URL, json=closed, headers=refused)).status_code == 409
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        assert await session.scalar(select(func.count()).select_from(IdempotencyKeyDB)) == 0
+
+    monkeypatch.setattr(get_settings(), "idempotency_key_ttl_seconds", 0)
+    headers = {"Idempotency-Key": "expired"}
+    first = await client.post(URL, json=BOOKING, headers=headers)
+    again = await client.post(URL, json=BOOKING, headers=headers)
+
+    assert first.json() != again.json()
+    assert "Idempotent-Replayed" not in again.headers
+    assert await _booked() == (2, 2)
+
+
+async def test_claims_purge_expired_keys(scheduling_db):
+    now = datetime.now(timezone.utc)
+    async with db.tenant_session(TENANT) as session:
+        session.add_all(
+            IdempotencyKeyDB(
+                tenant_id=TENANT,
+                key=f"old-{index}",
+                request_hash=request_hash("old"),
+                created_at=now - timedelta(days=2),
+                expires_at=now - timedelta(days=1, minutes=index),
+            )
+            for index in range(5)
+        )
+        session.add(
+            IdempotencyKeyDB(
+                tenant_id=TENANT,
+                key="live",
+                request_hash=request_hash("live"),
+                created_at=now,
+                expires_at=now + timedelta(days=1),
+            )
+        )
+        await session.commit()
+
+    async def claim(key: str) -> list[str]:
+        async with db.tenant_session(TENANT) as session:
+            store = IdempotencyStore(session)
+            assert await store.claim(TENANT, key, request_hash(key), timedelta(days=1), 3) is None
+            await session.commit()
+            return sorted(await session.scalars(select(IdempotencyKeyDB.key)))
+
+    # The oldest expired keys go first, a few per claim.
+    assert await claim("new-1") == ["live", "new-1", "old-0", "old-1"]
+    assert await claim("old-0") == ["live", "new-1", "old-0"]
+
+
+async def test_bookings_are_not_reported_failed_after_commit(slots, client, monkeypatch):
+    def fail(*_args) -> None:
+        raise RuntimeError("cache unavailable")
+
+    monkeypatch.setattr(router_commands, "_after_booking", fail)
+
+    with pytest.raises(RuntimeError):
+        await client.post(URL, json=BOOKING, headers={"Idempotency-Key": "committed"})
+
+    assert await _booked() == (1, 1)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from src.core.jwks import JWKSError, JWKSKeyManager
+
+JWKS_URL = "http://keycloak.test/realms/test/protocol/openid-connect/certs"
+
+
+def _jwk(kid: str) -> dict:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(RSAAlgorithm.to_jwk(key.public_key()))
+    jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+    return jwk
+
+
+class FakeKeycloak:
+    def __init__(self, *kids: str) -> None:
+        self.keys = [_jwk(kid) for kid in kids]
+        self.requests = 0
+        self.down = False
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, _request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await self.release.wait()
+        if self.down:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"keys": self.keys})
+
+    def manager(self, **kwargs) -> JWKSKeyManager:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self))
+        return JWKSKeyManager(JWKS_URL, client=client, **kwargs)
+
+
+async def test_concurrent_misses_share_one_download():
+    keycloak = FakeKeycloak("kid-1")
+    keycloak.release.clear()
+    manager = keycloak.manager()
+
+    lookups = [asyncio.create_task(manager.get_signing_key("kid-1")) for _ in range(20)]
+    await asyncio.sleep(0)
+    keycloak.release.set()
+    keys = await asyncio.gather(*lookups)
+
+    assert keycloak.requests == 1
+    assert {key.key_id for key in keys} == {"kid-1"}
+
+
+async def test_unknown_kid_refetch_is_rate_limited():
+    keycloak = FakeKeycloak("kid-1")
+    manager = keycloak.manager(min_refetch_interval=60)
+    await manager.refresh()
+
+    for _ in range(5):
+        with pytest.raises(JWKSError):
+            await manager.get_signing_key("kid-unknown")
+
+    assert keycloak.requests == 1
+
+
+async def test_known_key_refreshes_in_background_before_expiry():
+    keycloak = FakeKeycloak("kid-1")
+    manager = keycloak.manager(ttl=60, refresh_ahead=60)
+    await manager.refresh()
+    keycloak.release.clear()
+
+    key = await manager.get_signing_key("kid-1")
+
+    assert key.key_id == "kid-1"
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert keycloak.requests == 2
+    keycloak.release.set()
+    await manager.refresh()
+
+
+async def test_rotation_reports_retired_kids():
+    keycloak = FakeKeycloak("kid-1", "kid-2")
+    retired: list[set[str]] = []
+    manager = keycloak.manager(on_rotate=retired.append)
+    await manager.refresh()
+
+    keycloak.keys = keycloak.keys[1:]
+    await manager.refresh()
+
+    assert retired == [{"kid-1"}]
+    assert manager.kids == {"kid-2"}
+
+
+async def test_lookups_during_a_download_wait_for_it():
+    keycloak = FakeKeycloak("kid-1")
+    manager = keycloak.manager(min_refetch_interval=60)
+    await manager.refresh()
+    keycloak.keys.append(_jwk("kid-2"))
+    keycloak.release.clear()
+
+    download = asyncio.create_task(manager.refresh())
+    await asyncio.sleep(0)
+    lookup = asyncio.create_task(manager.get_signing_key("kid-2"))
+    await asyncio.sleep(0)
+    keycloak.release.set()
+
+    assert (await lookup).key_id == "kid-2"
+    await download
+    assert keycloak.requests == 2
+
+
+async def test_failed_downloads_back_off(monkeypatch):
+    clock = [1_000.0]
+    monkeypatch.setattr("src.core.jwks.time.monotonic", lambda: clock[0])
+    keycloak = FakeKeycloak("kid-1")
+    manager = keycloak.manager(ttl=60, refresh_ahead=60, min_refetch_interval=10, max_backoff=30)
+    await manager.refresh()
+    keycloak.down = True
+
+    async def lookups() -> None:
+        await manager.get_signing_key("kid-1")  # known keys keep being served
+        for _ in range(3):
+            with pytest.raises(JWKSError):
+                await manager.get_signing_key("kid-unknown")
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    await lookups()
+    assert keycloak.requests == 2  # the background refresh, then nothing for 10 s
+    for elapsed, requests in ((9, 2), (11, 3), (30, 3), (32, 4), (61, 4), (63, 5)):
+        clock[0] = 1_000.0 + elapsed
+        await lookups()
+        assert keycloak.requests == requests, elapsed
+
+    keycloak.down = False
+    clock[0] += 30
+    await lookups()
+    assert keycloak.requests == 6
+    assert manager._failures == 0
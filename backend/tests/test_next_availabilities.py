@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.core import db
+from src.core.http import limiter
+from src.core.security import AccessContext, get_access_context
+from src.features.scheduling.application.queries import FetchNextAvailabilitiesQuery
+from src.features.scheduling.application.query_handlers import FetchNextAvailabilitiesHandler
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus
+from src.features.scheduling.infra.models import CalendarDB, SlotDB
+from src.features.scheduling.infra.repositories import SchedulingRepository
+from src.features.scheduling.interfaces import router_queries
+
+TENANT = "tenant-1"
+DAY = datetime(2025, 5, 5, tzinfo=timezone.utc)
+# prac-a works from two calendars; prac-c only has slots months ahead.
+CALENDARS = {"cal-a1": "prac-a", "cal-a2": "prac-a", "cal-b": "prac-b", "cal-c": "prac-c"}
+
+
+@pytest.fixture
+async def slots(scheduling_db):
+    async with db.tenant_session(TENANT) as session:
+        session.add_all(
+            CalendarDB(id=calendar, tenant_id=TENANT, practitioner_id=practitioner)
+            for calendar, practitioner in CALENDARS.items()
+        )
+        await session.flush()
+        for position, calendar in enumerate(("cal-a1", "cal-a2", "cal-b")):
+            session.add_all(
+                SlotDB(
+                    id=f"{calendar}-{day}-{hour}",
+                    tenant_id=TENANT,
+                    calendar_id=calendar,
+                    starts_at=DAY + timedelta(days=day, hours=hour, minutes=10 * position),
+                    ends_at=DAY + timedelta(days=day, hours=hour, minutes=10 * position + 30),
+                    capacity=1,
+                    mode=SlotMode.TELE if hour >= 14 else SlotMode.ONSITE,
+                    # The mornings of the first day are booked.
+                    status=SlotStatus.CLOSED if day == 0 and hour < 12 else SlotStatus.OPEN,
+                )
+                for day in range(10)
+                for hour in (9, 10, 14)
+            )
+        session.add(
+            SlotDB(
+                id="cal-c-late",
+                tenant_id=TENANT,
+                calendar_id="cal-c",
+                starts_at=DAY + timedelta(days=200),
+                ends_at=DAY + timedelta(days=200, minutes=30),
+                capacity=1,
+                mode=SlotMode.ONSITE,
+                status=SlotStatus.OPEN,
+            )
+        )
+        await session.commit()
+    return scheduling_db
+
+
+async def _next(**filters) -> list[tuple]:
+    query = FetchNextAvailabilitiesQuery(tenant_id=TENANT, **filters)
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        rows = await FetchNextAvailabilitiesHandler(SchedulingRepository(session)).handle_rows(
+            query
+        )
+    return [tuple(row) for row in rows]
+
+
+async def _expected(starts_from: datetime, limit: int, per_practitioner: bool, **filters):
+    """The first slots, picked out of every open slot of the tenant."""
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        rows = await SchedulingRepository(session).list_availability_rows(
+            TENANT, starts_from, DAY + timedelta(days=365), **filters
+        )
+    if not per_practitioner:
+        return [tuple(row) for row in rows[:limit]]
+    taken: dict[str, int] = {}
+    expected = []
+    for row in rows:
+        taken[row.practitioner_id] = taken.get(row.practitioner_id, 0) + 1
+        if taken[row.practitioner_id] <= limit:
+            expected.append(tuple(row))
+    return expected
+
+
+@pytest.mark.parametrize("per_practitioner", [False, True])
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"practitioner_id": None, "mode": None},
+        {"practitioner_id": "prac-a", "mode": None},
+        {"practitioner_id": None, "mode": SlotMode.TELE},
+        {"practitioner_id": "prac-c", "mode": None},
+        {"practitioner_id": "unknown", "mode": None},
+    ],
+)
+async def test_next_availabilities_are_the_first_open_slots(slots, filters, per_practitioner):
+    for starts_from, limit in ((DAY, 1), (DAY, 4), (DAY + timedelta(days=3, hours=10), 7)):
+        found = await _next(
+            starts_from=starts_from, limit=limit, per_practitioner=per_practitioner, **filters
+        )
+        assert found == await _expected(starts_from, limit, per_practitioner, **filters)
+
+    # Booked mornings are skipped; far away slots are found all the same.
+    first, *_ = await _next(starts_from=DAY)
+    assert first[0] == "cal-a1-0-14"
+    per_practitioner = await _next(starts_from=DAY, per_practitioner=True)
+    assert [row[3] for row in per_practitioner] == ["prac-a", "prac-b", "prac-c"]
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    async def authorized(*_args, **_kwargs) -> None:
+        return None
+
+    monkeypatch.setattr(router_queries, "ensure_authorized", authorized)
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.include_router(router_queries.router)
+    app.dependency_overrides[get_access_context] = lambda: AccessContext(
+        sub="user-1", tenant_id=TENANT, roles=["patient"], token="", claims={}
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_next_availabilities_endpoint(slots, client):
+    response = await client.get(
+        "/queries/scheduling/next-availabilities",
+        params={
+            "starts_from": (DAY + timedelta(days=2)).isoformat(),
+            "mode": "tele",
+            "limit": 100,
+            "per_practitioner": "true",
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    # The limit is capped: 20 slots at most per practitioner.
+    assert [slot["practitioner_id"] for slot in body].count("prac-a") == 16
+    assert [slot["practitioner_id"] for slot in body].count("prac-b") == 8
+    assert body[0] == {
+        "id": "cal-a1-2-14",
+        "starts_at": "2025-05-07T14:00:00Z",
+        "ends_at": "2025-05-07T14:30:00Z",
+        "practitioner_id": "prac-a",
+        "mode": "tele",
+        "status": "open",
+    }
+
+    # Without starts_from the search starts now, long after these slots.
+    response = await client.get("/queries/scheduling/next-availabilities")
+    assert response.status_code == 200
+    assert response.json() == []
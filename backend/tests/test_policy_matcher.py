@@ -0,0 +1,108 @@
+import itertools
+import random
+from pathlib import Path
+
+import casbin
+import pytest
+
+from src.core.policy_matcher import CompiledPolicyMatcher
+
+CASBIN_DIR = Path(__file__).resolve().parents[1] / "casbin"
+MODEL_PATH = str(CASBIN_DIR / "model.conf")
+
+SUBJECTS = ["patient", "doctor", "nurse", "secretary", "clinic_admin", "user-1", "user-2", ""]
+DOMAINS = ["*", "tenant-1", "tenant-2"]
+OBJECTS = [
+    "/queries/scheduling/availabilities",
+    "/queries/scheduling/availabilities/",
+    "/queries/scheduling/availability-summary",
+    "/queries/scheduling",
+    "/queries/schedulingX/availabilities",
+    "/commands/scheduling/appointments",
+    "/commands/scheduling/appointments/123",
+    "/commands/dictation/notes",
+    "/commands/dictation/",
+    "/commands/dictation",
+    "/commands/onboarding/pro-invitations",
+    "/commands/onboarding/pro-invitations/accept",
+    "/commands/onboarding/pro-invitations\n",
+    "/patients/42/records",
+    "/patients/42",
+    "commands/dictation/notes",
+    "/",
+    "",
+]
+ACTIONS = ["GET", "POST", "PATCH", "DELETE", "PUT", "get", "GETX", "XGET", ""]
+
+
+def _enforcer(policy_path: str) -> casbin.Enforcer:
+    return casbin.Enforcer(MODEL_PATH, policy_path, enable_log=False)
+
+
+def _assert_same_decisions(enforcer: casbin.Enforcer, requests) -> None:
+    matcher = CompiledPolicyMatcher.from_enforcer(enforcer)
+    assert matcher is not None
+    for request in requests:
+        assert matcher.enforce(*request) == enforcer.enforce(*request), request
+
+
+def test_seed_policy_decisions_match_casbin():
+    enforcer = _enforcer(str(CASBIN_DIR / "seed_policy.csv"))
+    _assert_same_decisions(enforcer, itertools.product(SUBJECTS, DOMAINS, OBJECTS, ACTIONS))
+
+
+def _unscoped_model(tmp_path) -> str:
+    model = (CASBIN_DIR / "model.conf").read_text(encoding="utf-8")
+    model_path = tmp_path / "model.conf"
+    model_path.write_text(model.replace(' && (p.dom == "*" || p.dom == r.dom)', ""), encoding="utf-8")
+    return str(model_path)
+
+
+@pytest.mark.parametrize("seed", range(2))
+@pytest.mark.parametrize("scoped", [True, False], ids=["scoped", "unscoped"])
+def test_random_policies_match_casbin(tmp_path, seed, scoped):
+    rng = random.Random(seed)
+    obj_patterns = [
+        "/queries/scheduling/.*",
+        "/queries/scheduling/availabilities",
+        "/commands/*",
+        "/commands/dictation/notes",
+        "/patients/:id/records",
+        "/patients/:id",
+        "/:resource/scheduling/appointments",
+        "*",
+        "/commands/onboarding/pro-invitations",
+    ]
+    act_patterns = ["GET", "POST", "(GET|POST)", "(GET|POST|PATCH|DELETE)", ".*", "P.*"]
+    lines = []
+    for _ in range(60):
+        lines.append(
+            ", ".join(
+                [
+                    "p",
+                    rng.choice(SUBJECTS[:-1]),
+                    rng.choice(DOMAINS),
+                    rng.choice(obj_patterns),
+                    rng.choice(act_patterns),
+                    rng.choice(["allow", "allow", "allow", "deny"]),
+                ]
+            )
+        )
+    for _ in range(12):
+        user, role = rng.sample(SUBJECTS[:-1], 2)
+        lines.append(f"g, {user}, {role}, {rng.choice(DOMAINS)}")
+    policy_path = tmp_path / "policy.csv"
+    policy_path.write_text("\n".join(lines), encoding="utf-8")
+
+    model_path = MODEL_PATH if scoped else _unscoped_model(tmp_path)
+    enforcer = casbin.Enforcer(model_path, str(policy_path), enable_log=False)
+    _assert_same_decisions(enforcer, itertools.product(SUBJECTS, DOMAINS, OBJECTS, ACTIONS))
+
+
+def test_unsupported_model_is_not_compiled(tmp_path):
+    model = (CASBIN_DIR / "model.conf").read_text(encoding="utf-8")
+    model_path = tmp_path / "model.conf"
+    model_path.write_text(model.replace("keyMatch2", "keyMatch"), encoding="utf-8")
+    enforcer = casbin.Enforcer(str(model_path), str(CASBIN_DIR / "seed_policy.csv"), enable_log=False)
+
+    assert CompiledPolicyMatcher.from_enforcer(enforcer) is None
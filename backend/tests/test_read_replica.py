@@ -0,0 +1,119 @@
+import os
+
+import psycopg
+import pytest
+from sqlalchemy import make_url, text
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.core import db
+from src.core.http import READ_PRIMARY_COOKIE, reads_pinned_to_primary, set_read_primary_cookie
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+REPLICA_DATABASE = "keur_replica_test"
+
+
+async def _database_name(session) -> str:
+    return (await session.execute(text("SELECT current_database()"))).scalar_one()
+
+
+@pytest.fixture
+async def engines(settings, monkeypatch):
+    admin_dsn = TEST_DATABASE_URL.replace("+asyncpg", "")
+    with psycopg.connect(admin_dsn, autocommit=True) as connection:
+        connection.execute(f"DROP DATABASE IF EXISTS {REPLICA_DATABASE}")
+        connection.execute(f"CREATE DATABASE {REPLICA_DATABASE}")
+    replica_url = (
+        make_url(TEST_DATABASE_URL)
+        .set(database=REPLICA_DATABASE)
+        .render_as_string(hide_password=False)
+    )
+
+    monkeypatch.setattr(settings, "database_url", TEST_DATABASE_URL)
+    monkeypatch.setattr(settings, "database_replica_url", replica_url)
+    await db.dispose_engine()
+    db.get_engine(settings)
+    yield
+    await db.dispose_engine()
+    with psycopg.connect(admin_dsn, autocommit=True) as connection:
+        connection.execute(f"DROP DATABASE IF EXISTS {REPLICA_DATABASE}")
+
+
+async def test_reads_use_the_primary_without_replica(settings):
+    await db.dispose_engine()
+    db.get_engine(settings)
+    try:
+        db.pin_reads_to_primary("user-1")  # nothing to pin without a replica
+
+        assert "user-1" not in db._primary_pins
+        assert db.get_read_session_factory("user-1") is db.get_session_factory()
+    finally:
+        await db.dispose_engine()
+
+
+@pytest.mark.skipif(
+    TEST_DATABASE_URL is None, reason="Requires TEST_DATABASE_URL pointing to PostgreSQL"
+)
+async def test_queries_read_from_replica_until_subject_writes(engines):
+    async with db.get_session_factory()() as session:
+        primary = await _database_name(session)
+
+    async with db.tenant_session("tenant-1", read_only=True, subject="user-1") as session:
+        assert await _database_name(session) == REPLICA_DATABASE
+        assert not db.reads_primary(session)
+    async with db.tenant_session("tenant-1") as session:
+        assert await _database_name(session) == primary
+        assert db.reads_primary(session)
+
+    db.pin_reads_to_primary("user-1")
+
+    async with db.tenant_session("tenant-1", read_only=True, subject="user-1") as session:
+        assert await _database_name(session) == primary
+    async with db.get_read_session_factory("user-2")() as session:
+        assert await _database_name(session) == REPLICA_DATABASE
+    # A pin taken on another worker, carried by the client.
+    async with db.tenant_session(
+        "tenant-1", read_only=True, subject="user-2", primary=True
+    ) as session:
+        assert await _database_name(session) == primary
+
+
+@pytest.mark.skipif(
+    TEST_DATABASE_URL is None, reason="Requires TEST_DATABASE_URL pointing to PostgreSQL"
+)
+async def test_pin_expires_after_the_read_your_writes_window(engines, monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(db, "_primary_pins", db.TTLCache(maxsize=10, ttl=5, timer=lambda: clock[0]))
+
+    db.pin_reads_to_primary("user-1")
+    assert db.get_read_session_factory("user-1") is db.get_session_factory()
+
+    clock[0] = 6
+    assert db.get_read_session_factory("user-1") is not db.get_session_factory()
+
+
+def _request(cookie: str | None) -> Request:
+    headers = [(b"cookie", f"{READ_PRIMARY_COOKIE}={cookie}".encode())] if cookie else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_pins_are_carried_to_other_workers_by_a_cookie():
+    response = Response()
+    set_read_primary_cookie(response, "user-1", 5, "secret")
+    cookie = response.headers["set-cookie"]
+    assert "HttpOnly" in cookie and "Max-Age=5" in cookie
+    value = cookie.split(";")[0].split("=", 1)[1]
+    until, signature = value.split(".")
+
+    assert reads_pinned_to_primary(_request(value), "user-1", 5, "secret")
+    assert not reads_pinned_to_primary(_request(None), "user-1", 5, "secret")
+    assert not reads_pinned_to_primary(_request("soon"), "user-1", 5, "secret")
+    # Pins of another subject or secret, forged, ended or longer than the window.
+    assert not reads_pinned_to_primary(_request(value), "user-2", 5, "secret")
+    assert not reads_pinned_to_primary(_request(value), "user-1", 5, "other")
+    assert not reads_pinned_to_primary(_request(f"{until}.{'0' * 64}"), "user-1", 5, "secret")
+    assert not reads_pinned_to_primary(_request(value), "user-1", 5 - 1, "secret")
+    response = Response()
+    set_read_primary_cookie(response, "user-1", 3_600, "secret")
+    long_pin = response.headers["set-cookie"].split(";")[0].split("=", 1)[1]
+    assert not reads_pinned_to_primary(_request(long_pin), "user-1", 5, "secret")
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from src.features.scheduling.domain.value_objects import AppointmentStatus, SlotMode
+from src.features.scheduling.infra.models import AppointmentDB
+from src.features.scheduling.infra.repositories import SchedulingRepository
+
+DAY = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+SEED = """
+INSERT INTO calendars (id, tenant_id, practitioner_id)
+SELECT 'cal-' || c, 'tenant-' || (c % 20), 'prac-' || c FROM generate_series(0, 199) AS c;
+
+INSERT INTO slots (id, tenant_id, calendar_id, starts_at, ends_at, capacity, mode, status)
+SELECT
+    'slot-' || c || '-' || s,
+    'tenant-' || (c % 20),
+    'cal-' || c,
+    TIMESTAMPTZ '2025-01-01 08:00+00' + s * INTERVAL '30 minutes',
+    TIMESTAMPTZ '2025-01-01 08:30+00' + s * INTERVAL '30 minutes',
+    1,
+    CASE WHEN s % 2 = 0 THEN 'onsite'::slot_mode ELSE 'tele'::slot_mode END,
+    CASE WHEN s % 3 = 0 THEN 'closed'::slot_status ELSE 'open'::slot_status END
+FROM generate_series(0, 199) AS c, generate_series(0, 299) AS s;
+
+INSERT INTO appointments (id, tenant_id, slot_id, patient_id, status, mode)
+SELECT
+    'appt-' || c || '-' || s,
+    'tenant-' || (c % 20),
+    'slot-' || c || '-' || s,
+    'patient-' || s,
+    'booked',
+    'onsite'
+FROM generate_series(0, 199) AS c, generate_series(0, 299, 3) AS s;
+"""
+
+
+@pytest.fixture
+async def seeded(scheduling_db):
+    async with scheduling_db.begin() as connection:
+        for statement in SEED.split(";"):
+            if statement.strip():
+                await connection.execute(text(statement))
+    async with scheduling_db.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        # The visibility map makes index-only scans possible right away.
+        await connection.execute(text("VACUUM ANALYZE calendars, slots, appointments"))
+    return scheduling_db
+
+
+def _scans(plan: dict) -> list[tuple[str, str | None, str | None]]:
+    """(node type, index, table) of every node of an EXPLAIN plan."""
+    scans = [(plan["Node Type"], plan.get("Index Name"), plan.get("Relation Name"))]
+    for child in plan.get("Plans", []):
+        scans.extend(_scans(child))
+    return scans
+
+
+async def _explain(engine, statement) -> list[tuple[str, str | None, str | None]]:
+    sql = statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    async with engine.connect() as connection:
+        result = await connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+        (plan,) = result.scalar_one()
+    return _scans(plan["Plan"])
+
+
+@pytest.mark.parametrize(
+    ("filters", "index"),
+    [
+        ({"practitioner_id": None, "mode": None}, "ix_slots_open_tenant_starts"),
+        ({"practitioner_id": None, "mode": SlotMode.TELE}, "ix_slots_open_tenant_starts"),
+        # One practitioner: its calendars first, then their open slots by (calendar_id, starts_at).
+        ({"practitioner_id": "prac-21", "mode": None}, "ix_slots_open_calendar_starts"),
+    ],
+)
+async def test_availability_rows_use_an_index(seeded, filters, index):
+    statement = SchedulingRepository(None)._availabilities_statement(
+        "tenant-1",
+        DAY,
+        DAY + timedelta(days=7),
+        after=(DAY + timedelta(days=1), "slot-1-0"),
+        limit=101,
+        rows=True,
+        **filters,
+    )
+
+    scans = await _explain(seeded, statement)
+
+    assert any(name == index for _node, name, _table in scans), scans
+    assert ("Seq Scan", None, "slots") not in scans, scans
+
+
+async def test_booking_count_is_an_index_only_scan(seeded):
+    statement = select(func.count(AppointmentDB.id)).where(
+        AppointmentDB.slot_id == "slot-21-3",
+        AppointmentDB.tenant_id == "tenant-1",
+        AppointmentDB.status == AppointmentStatus.BOOKED,
+    )
+
+    scans = await _explain(seeded, statement)
+
+    assert ("Index Only Scan", "ix_appointments_slot_booked", "appointments") in scans, scans
+
+
+@pytest.mark.parametrize("per_practitioner", [False, True])
+async def test_next_availabilities_read_each_calendar_by_index(seeded, per_practitioner):
+    statement = SchedulingRepository(None)._next_availabilities_statement(
+        "tenant-1", DAY + timedelta(hours=30), None, SlotMode.TELE, 5, per_practitioner
+    )
+
+    scans = await _explain(seeded, statement)
+
+    assert any(name == "ix_slots_open_calendar_starts" for _node, name, _table in scans), scans
+    assert ("Seq Scan", None, "slots") not in scans, scans
@@ -0,0 +1,119 @@
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi.security import HTTPAuthorizationCredentials
+from jwt.algorithms import RSAAlgorithm
+from prometheus_client import REGISTRY
+
+from src.core import security
+from src.core.jwks import JWKSKeyManager
+
+
+@pytest.fixture
+def private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def published_kids():
+    return {"kid-1"}
+
+
+@pytest.fixture(autouse=True)
+def key_manager(private_key, settings, published_kids):
+    def serve_jwks(_request: httpx.Request) -> httpx.Response:
+        keys = []
+        for kid in sorted(published_kids):
+            jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+            jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+            keys.append(jwk)
+        return httpx.Response(200, json={"keys": keys})
+
+    jwks_url = settings.kc_jwks_url
+    manager = JWKSKeyManager(
+        jwks_url,
+        min_refetch_interval=0,
+        client=httpx.AsyncClient(transport=httpx.MockTransport(serve_jwks)),
+        on_rotate=lambda kids: security._evict_tokens_signed_by(jwks_url, kids),
+    )
+    security._KEY_MANAGERS[jwks_url] = manager
+    security._VERIFIED_TOKEN_CACHE.clear()
+    yield manager
+    security._KEY_MANAGERS.clear()
+    security._VERIFIED_TOKEN_CACHE.clear()
+
+
+def _issue_token(private_key, settings, kid: str = "kid-1", lifetime: int = 300) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": "user-1",
+        "iss": settings.kc_issuer,
+        "aud": settings.kc_audience,
+        "iat": now,
+        "nbf": now,
+        "exp": now + lifetime,
+        "tenant_id": "tenant-1",
+        "resource_access": {settings.kc_client_id: {"roles": ["Doctor"]}},
+    }
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+async def _resolve(token: str, settings):
+    request = SimpleNamespace(state=SimpleNamespace())
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return await security.get_access_context(request, credentials, settings)
+
+
+def _lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("jwt_verified_token_cache_total", {"result": result}) or 0.0
+
+
+async def test_repeated_token_skips_verification(private_key, settings, monkeypatch):
+    token = _issue_token(private_key, settings)
+
+    decode_calls = 0
+    original_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        nonlocal decode_calls
+        decode_calls += 1
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+    hits_before = _lookups("hit")
+
+    first = await _resolve(token, settings)
+    second = await _resolve(token, settings)
+
+    assert decode_calls == 1
+    assert second is first
+    assert second.roles == ["doctor"]
+    assert second.tenant_id == "tenant-1"
+    assert _lookups("hit") == hits_before + 1
+
+
+async def test_token_within_leeway_of_expiry_is_not_cached(private_key, settings):
+    token = _issue_token(private_key, settings, lifetime=settings.jwt_leeway_seconds - 5)
+
+    await _resolve(token, settings)
+
+    assert len(security._VERIFIED_TOKEN_CACHE) == 0
+
+
+async def test_key_rotation_evicts_verified_tokens(private_key, settings, published_kids, key_manager):
+    token = _issue_token(private_key, settings)
+    await _resolve(token, settings)
+    assert len(security._VERIFIED_TOKEN_CACHE) == 1
+
+    published_kids.clear()
+    published_kids.add("kid-2")
+    await key_manager.refresh()
+
+    assert len(security._VERIFIED_TOKEN_CACHE) == 0
+    with pytest.raises(security.TokenError):
+        await _resolve(token, settings)
@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.core.single_flight import SingleFlight
+from src.features.scheduling.application.availability_cache import AvailabilityCache
+from src.features.scheduling.application.queries import FetchAvailabilitiesQuery
+from src.features.scheduling.application.query_handlers import FetchAvailabilitiesHandler
+
+
+def _coalesced(name: str) -> float:
+    return REGISTRY.get_sample_value("single_flight_coalesced_total", {"flight": name}) or 0.0
+
+
+class SlowCall:
+    def __init__(self, result="rows") -> None:
+        self.result = result
+        self.started = 0
+        self.finished = False
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        self.finished = True
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_identical_calls_share_one_execution():
+    flights = SingleFlight("test-share")
+    call = SlowCall()
+
+    waiters = [asyncio.create_task(flights.run("key", call)) for _ in range(5)]
+    other = asyncio.create_task(flights.run("other-key", SlowCall("other")))
+    await _settle()
+    call.release.set()
+
+    assert await asyncio.gather(*waiters) == ["rows"] * 5
+    assert call.started == 1
+    assert _coalesced("test-share") == 4
+    assert len(flights) == 1  # "other-key" is still running
+    other.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await other
+    assert len(flights) == 0
+
+
+async def test_errors_reach_every_waiter_and_free_the_key():
+    flights = SingleFlight("test-error")
+    call = SlowCall(result=RuntimeError("database down"))
+
+    waiters = [asyncio.create_task(flights.run("key", call)) for _ in range(3)]
+    await _settle()
+    call.release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(flights) == 0
+    retry = SlowCall()
+    retry.release.set()
+    assert await flights.run("key", retry) == "rows"
+
+
+async def test_cancelled_follower_does_not_disturb_the_others():
+    flights = SingleFlight("test-follower")
+    call = SlowCall()
+    leader = asyncio.create_task(flights.run("key", call))
+    await _settle()
+    follower = asyncio.create_task(flights.run("key", call))
+    await _settle()
+
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    call.release.set()
+
+    assert await leader == "rows"
+    assert not call.cancelled
+
+
+async def test_cancelled_leader_sees_the_call_through_for_followers():
+    flights = SingleFlight("test-leader")
+    call = SlowCall()
+    leader = asyncio.create_task(flights.run("key", call))
+    await _settle()
+    follower = asyncio.create_task(flights.run("key", call))
+    await _settle()
+
+    leader.cancel()
+    await _settle()
+    assert not leader.done()  # the call may still use the leader's session
+
+    call.release.set()
+    assert await follower == "rows"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert call.finished
+
+
+async def test_cancelled_lone_leader_stops_the_call():
+    flights = SingleFlight("test-alone")
+    call = SlowCall()
+    leader = asyncio.create_task(flights.run("key", call))
+    await _settle()
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    assert call.cancelled
+    assert len(flights) == 0
+
+
+class CountingRepository:
+    def __init__(self, bind) -> None:
+        self.session = SimpleNamespace(bind=bind)
+        self.calls = 0
+
+    async def list_availability_rows(self, **_filters):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return [("slot-1",)]
+
+
+async def test_handler_coalesces_identical_queries_on_the_same_database():
+    flights = SingleFlight("test-handler")
+    query = FetchAvailabilitiesQuery(
+        tenant_id="tenant-1",
+        starts_at=datetime(2025, 3, 3, tzinfo=timezone.utc),
+        ends_at=datetime(2025, 3, 4, tzinfo=timezone.utc),
+    )
+    primary, replica = CountingRepository("primary"), CountingRepository("replica")
+
+    results = await asyncio.gather(
+        *(
+            FetchAvailabilitiesHandler(repository, flights=flights).handle_rows(query)
+            for repository in [primary] * 10 + [replica] * 10
+        ),
+        FetchAvailabilitiesHandler(primary, flights=flights).handle_rows(
+            query.model_copy(update={"practitioner_id": "prac-1"})
+        ),
+    )
+
+    assert all(result == [("slot-1",)] for result in results)
+    assert (primary.calls, replica.calls) == (2, 1)
+    assert _coalesced("test-handler") == 18
+
+
+async def test_handler_does_not_join_a_flight_started_before_an_invalidation():
+    flights = SingleFlight("test-generation")
+    cache = AvailabilityCache(max_rows=0, ttl_seconds=30)
+    query = FetchAvailabilitiesQuery(
+        tenant_id="tenant-1",
+        starts_at=datetime(2025, 3, 3, tzinfo=timezone.utc),
+        ends_at=datetime(2025, 3, 4, tzinfo=timezone.utc),
+    )
+    primary = CountingRepository("primary")
+
+    before = asyncio.create_task(
+        FetchAvailabilitiesHandler(primary, cache=cache, flights=flights).handle_rows(query)
+    )
+    await _settle()
+    # A booking committed on this worker while the first read is in flight.
+    cache.invalidate_tenant("tenant-1")
+    after = FetchAvailabilitiesHandler(primary, cache=cache, flights=flights).handle_rows(query)
+
+    assert await asyncio.gather(before, after) == [[("slot-1",)]] * 2
+    assert primary.calls == 2
+    assert _coalesced("test-generation") == 0
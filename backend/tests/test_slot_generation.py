@@ -0,0 +1,197 @@
+from datetime import date, datetime, time, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import NoResultFound
+
+from src.core import db
+from src.core.security import AccessContext, get_access_context
+from src.features.scheduling.domain.value_objects import SlotMode
+from src.features.scheduling.infra.models import CalendarDB, SlotDailyRollupDB, SlotDB
+from src.features.scheduling.infra.repositories import SchedulingRepository
+from src.features.scheduling.interfaces import router_commands
+
+TENANT = "tenant-1"
+# Monday 2026-03-23 to Sunday 2026-04-05; Paris moves to summer time on 2026-03-29.
+WINDOW = {"starts_on": date(2026, 3, 23), "ends_on": date(2026, 4, 5)}
+MORNINGS = {
+    "weekdays": [1, 2, 3, 4, 5],
+    "start_time": time(8),
+    "end_time": time(12),
+    "slot_minutes": 20,
+    "mode": SlotMode.ONSITE,
+    "timezone": "Europe/Paris",
+    "valid_from": date(2026, 1, 1),
+    "valid_until": None,
+    "capacity": 1,
+}
+
+
+@pytest.fixture
+async def calendars(scheduling_db):
+    async with db.tenant_session(TENANT) as session:
+        session.add_all(
+            [
+                CalendarDB(id="cal-a", tenant_id=TENANT, practitioner_id="prac-a"),
+                CalendarDB(id="cal-b", tenant_id=TENANT, practitioner_id="prac-b"),
+            ]
+        )
+        await session.commit()
+    async with db.tenant_session("tenant-2") as session:
+        session.add(CalendarDB(id="cal-other", tenant_id="tenant-2", practitioner_id="prac-c"))
+        await session.commit()
+    return scheduling_db
+
+
+async def _generate(**window) -> int:
+    async with db.tenant_session(TENANT) as session:
+        generated = await SchedulingRepository(session).generate_slots(TENANT, **(window or WINDOW))
+        await session.commit()
+    return generated
+
+
+async def _starts(calendar_id: str) -> list[datetime]:
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        result = await session.scalars(
+            select(SlotDB.starts_at)
+            .where(SlotDB.calendar_id == calendar_id)
+            .order_by(SlotDB.starts_at)
+        )
+        return list(result)
+
+
+async def test_templates_expand_into_local_slots(calendars):
+    async with db.tenant_session(TENANT) as session:
+        repository = SchedulingRepository(session)
+        await repository.create_schedule_template(TENANT, "cal-a", **MORNINGS)
+        await repository.create_schedule_template(
+            TENANT,
+            "cal-b",
+            **MORNINGS | {"weekdays": [3], "mode": SlotMode.TELE, "valid_until": date(2026, 3, 31)},
+        )
+        await session.commit()
+
+    assert await _generate() == 10 * 12 + 1 * 12
+
+    starts = await _starts("cal-a")
+    assert len(starts) == 120
+    assert {start.date().isoweekday() for start in starts} == {1, 2, 3, 4, 5}
+    # 08:00 in Paris is 07:00 UTC in winter and 06:00 UTC in summer.
+    assert starts[0] == datetime(2026, 3, 23, 7, tzinfo=timezone.utc)
+    assert starts[-1] == datetime(2026, 4, 3, 9, 40, tzinfo=timezone.utc)
+    assert datetime(2026, 3, 30, 6, tzinfo=timezone.utc) in starts
+    # The Wednesday of the second week is past valid_until.
+    assert {start.date() for start in await _starts("cal-b")} == {date(2026, 3, 25)}
+
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        slot_count = await session.scalar(select(func.sum(SlotDailyRollupDB.slot_count)))
+    assert slot_count == 132
+
+
+async def test_generation_is_idempotent_and_ids_are_stable(calendars):
+    async with db.tenant_session(TENANT) as session:
+        repository = SchedulingRepository(session)
+        await repository.create_schedule_template(TENANT, "cal-a", **MORNINGS)
+        # Same hours, coarser step: every start it shares with the first template is skipped.
+        await repository.create_schedule_template(
+            TENANT, "cal-a", **MORNINGS | {"slot_minutes": 60, "weekdays": [1]}
+        )
+        await session.commit()
+
+    assert await _generate() == 120
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        first_ids = set(await session.scalars(select(SlotDB.id)))
+    assert await _generate() == 0
+
+    async with db.tenant_session(TENANT) as session:
+        await session.execute(delete(SlotDB))
+        await session.commit()
+    assert await _generate() == 120
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        assert set(await session.scalars(select(SlotDB.id))) == first_ids
+    assert all(len(slot_id) == 36 for slot_id in first_ids)
+
+
+async def test_templates_need_a_calendar_of_the_tenant(calendars):
+    async with db.tenant_session(TENANT) as session:
+        with pytest.raises(NoResultFound):
+            await SchedulingRepository(session).create_schedule_template(
+                TENANT, "cal-other", **MORNINGS
+            )
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    async def authorized(*_args, **_kwargs) -> None:
+        return None
+
+    monkeypatch.setattr(router_commands, "ensure_authorized", authorized)
+    app = FastAPI()
+    app.include_router(router_commands.router)
+    app.dependency_overrides[get_access_context] = lambda: AccessContext(
+        sub="admin-1", tenant_id=TENANT, roles=["clinic_admin"], token="", claims={}
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_endpoints_create_templates_and_generate_slots(calendars, client):
+    template = {
+        "calendar_id": "cal-b",
+        "weekdays": [2, 2, 4],
+        "start_time": "14:00",
+        "end_time": "15:00",
+        "slot_minutes": 30,
+        "timezone": "Africa/Dakar",
+        "valid_from": "2026-01-01",
+    }
+    response = await client.post("/commands/scheduling/schedule-templates", json=template)
+    assert response.status_code == 201
+    assert response.json()["weekdays"] == [2, 4]
+
+    response = await client.post(
+        "/commands/scheduling/slot-generations",
+        json={"starts_on": "2026-03-23", "ends_on": "2026-03-29", "calendar_id": "cal-b"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"generated": 4}
+    assert (await _starts("cal-b"))[0] == datetime(2026, 3, 24, 14, tzinfo=timezone.utc)
+
+    response = await client.post(
+        "/commands/scheduling/schedule-templates", json=template | {"calendar_id": "cal-other"}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    ("path", "payload"),
+    [
+        ("/commands/scheduling/schedule-templates", {"timezone": "Mars/Olympus_Mons"}),
+        ("/commands/scheduling/schedule-templates", {"weekdays": [0]}),
+        ("/commands/scheduling/schedule-templates", {"start_time": "16:00"}),
+        ("/commands/scheduling/slot-generations", {"ends_on": "2027-12-31"}),
+    ],
+)
+async def test_endpoints_reject_invalid_payloads(client, path, payload):
+    valid = {
+        "/commands/scheduling/schedule-templates": {
+            "calendar_id": "cal-a",
+            "weekdays": [1],
+            "start_time": "14:00",
+            "end_time": "15:00",
+            "slot_minutes": 30,
+            "timezone": "Africa/Dakar",
+            "valid_from": "2026-01-01",
+        },
+        "/commands/scheduling/slot-generations": {
+            "starts_on": "2026-01-01",
+            "ends_on": "2026-01-31",
+        },
+    }[path]
+
+    response = await client.post(path, json=valid | payload)
+
+    assert response.status_code == 422
@@ -0,0 +1,353 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, make_url, update
+
+from src.core import db
+from src.features.scheduling.application.queries import FetchAvailabilitiesQuery
+from src.features.scheduling.application.query_handlers import FetchAvailabilitiesHandler
+from src.features.scheduling.application.slot_index import (
+    IndexedSlot,
+    SlotIndex,
+    parse_slot_change,
+)
+from src.features.scheduling.domain.events import AppointmentBooked
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus
+from src.features.scheduling.infra.models import CalendarDB, SlotDB
+from src.features.scheduling.infra.repositories import SchedulingRepository
+from src.features.scheduling.infra.slot_changes import SlotChangeListener
+
+TENANT = "tenant-1"
+TODAY = datetime(2026, 3, 2, tzinfo=timezone.utc)
+MODES = ("onsite", "tele")
+
+
+def _slots(tenant: str = TENANT, days: int = 5) -> list[IndexedSlot]:
+    """Two practitioners, hourly slots of 45 minutes, alternating modes."""
+    return [
+        IndexedSlot(
+            f"{tenant}-{practitioner}-{day}-{hour}",
+            TODAY + timedelta(days=day, hours=hour),
+            TODAY + timedelta(days=day, hours=hour, minutes=45),
+            practitioner,
+            MODES[hour % 2],
+            "open",
+        )
+        for day in range(days)
+        for hour in range(8, 18)
+        for practitioner in ("prac-a", "prac-b")
+    ]
+
+
+def _expected(slots: list[IndexedSlot], query: FetchAvailabilitiesQuery) -> list[IndexedSlot]:
+    """What ``list_availability_rows`` returns for ``query``."""
+    found = sorted(
+        (
+            slot
+            for slot in slots
+            if slot.status == "open"
+            and slot.starts_at >= query.starts_at
+            and slot.ends_at <= query.ends_at
+            and query.practitioner_id in (None, slot.practitioner_id)
+            and (query.mode is None or slot.mode == query.mode.value)
+            and (query.after is None or (slot.starts_at, slot.id) > query.after)
+        ),
+        key=lambda slot: (slot.starts_at, slot.id),
+    )
+    return found[: query.limit] if query.limit is not None else found
+
+
+def _query(first_day: int, last_day: int, tenant: str = TENANT, **filters):
+    return FetchAvailabilitiesQuery(
+        tenant_id=tenant,
+        starts_at=TODAY + timedelta(days=first_day, hours=9),
+        ends_at=TODAY + timedelta(days=last_day, hours=12),
+        **filters,
+    )
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _index(tables: dict[str, list[IndexedSlot]], **options) -> SlotIndex:
+    async def fetch(tenant_id: str, starts_from: datetime, starts_before: datetime):
+        fetch.calls.append(tenant_id)
+        return [
+            slot
+            for slot in tables.get(tenant_id, [])
+            if slot.status == "open" and starts_from <= slot.starts_at < starts_before
+        ]
+
+    fetch.calls = []
+    options = {"max_rows": 1_000, "horizon_days": 30, "ttl_seconds": 60} | options
+    return SlotIndex(fetch=fetch, now=lambda: TODAY + timedelta(hours=7), **options)
+
+
+async def test_cold_tenants_load_in_the_background():
+    index = _index({TENANT: _slots()})
+
+    assert index.lookup(_query(0, 1)) is None
+    assert index.lookup(_query(0, 2)) is None
+    await asyncio.gather(*index._loads.values())
+
+    assert index._fetch.calls == [TENANT]
+    assert index.rows == len(_slots())
+    assert index.lookup(_query(0, 1)) == _expected(_slots(), _query(0, 1))
+    # Past the horizon and naive bounds stay with the database.
+    assert index.lookup(_query(0, 40)) is None
+    naive = _query(0, 1).model_copy(update={"starts_at": datetime(2026, 3, 2, 9)})
+    assert index.lookup(naive) is None
+    assert index._loads == {}
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"practitioner_id": "prac-b"},
+        {"mode": SlotMode.TELE},
+        {"practitioner_id": "prac-a", "mode": SlotMode.ONSITE, "limit": 4},
+        {"limit": 7, "after": (TODAY + timedelta(days=1, hours=10), f"{TENANT}-prac-a-1-10")},
+        # A cursor before the window start resumes at the window start.
+        {"after": (TODAY, "")},
+        {"practitioner_id": "unknown"},
+    ],
+)
+async def test_lookups_match_the_database(filters):
+    index = _index({TENANT: _slots()})
+    assert await index.load(TENANT)
+
+    for first_day, last_day in ((0, 0), (0, 3), (2, 4)):
+        query = _query(first_day, last_day, **filters)
+        assert index.lookup(query) == _expected(_slots(), query)
+
+
+async def test_changes_are_patched_in():
+    slots = _slots()
+    index = _index({TENANT: slots})
+    await index.load(TENANT)
+    booked, moved = slots[0], slots[5]
+    closed = booked._replace(status="closed")
+    later = moved._replace(
+        starts_at=moved.starts_at + timedelta(days=1, minutes=10),
+        ends_at=moved.ends_at + timedelta(days=1, minutes=10),
+    )
+    added = IndexedSlot(
+        "new",
+        TODAY + timedelta(hours=9, minutes=30),
+        TODAY + timedelta(hours=10),
+        "prac-c",
+        "tele",
+        "open",
+    )
+
+    index.apply((TENANT, [closed, later, added]))
+
+    current = [closed, later, added] + [slot for slot in slots if slot not in (booked, moved)]
+    assert index.rows == len(slots)
+    for query in (_query(0, 2), _query(0, 2, practitioner_id="prac-c"), _query(1, 1, limit=3)):
+        assert index.lookup(query) == _expected(current, query)
+
+
+async def test_reloads_drop_the_tenant():
+    index = _index({TENANT: _slots(), "tenant-2": _slots("tenant-2")})
+    await index.load(TENANT)
+    await index.load("tenant-2")
+
+    index.apply(("tenant-2", None))
+
+    assert len(index) == 1
+    assert index.rows == len(_slots())
+    assert index.lookup(_query(0, 1, tenant="tenant-2")) is None
+
+
+async def test_virtual_slots_reload_on_unknown_slots():
+    slots = _slots()
+    index = _index({TENANT: slots}, virtual_slots=True)
+    await index.load(TENANT)
+
+    # Booking a virtual slot writes the slot the index already holds.
+    index.apply((TENANT, [slots[0]._replace(status="closed")]))
+    assert index.rows == len(slots) - 1
+    # A row written by hand may replace a virtual slot with another id.
+    index.apply((TENANT, [slots[1]._replace(id="manual", status="closed")]))
+    assert len(index) == 0
+
+
+async def test_changes_during_a_load_discard_it():
+    index = _index({TENANT: _slots()})
+    fetch = index._fetch
+    release = asyncio.Event()
+
+    async def slow_fetch(*args):
+        await release.wait()
+        return await fetch(*args)
+
+    index._fetch = slow_fetch
+    load = asyncio.create_task(index.load(TENANT))
+    await asyncio.sleep(0)
+    index.apply((TENANT, [_slots()[0]._replace(status="closed")]))
+    release.set()
+
+    assert await load is False
+    assert len(index) == 0
+
+
+async def test_memory_is_capped_by_evicting_tenants():
+    tables = {tenant: _slots(tenant) for tenant in ("t-1", "t-2", "t-3")}
+    tables["big"] = _slots("big", days=20)
+    per_tenant = len(tables["t-1"])
+    index = _index(tables, max_rows=2 * per_tenant)
+
+    for tenant in ("t-1", "t-2"):
+        assert await index.load(tenant)
+    index.lookup(_query(0, 1, tenant="t-1"))
+    assert await index.load("t-3")
+
+    # The least recently used tenant went; a tenant above the cap is never loaded.
+    assert set(index._tenants) == {"t-1", "t-3"}
+    assert not await index.load("big")
+    assert index.rows == 2 * per_tenant
+    assert index.approximate_bytes > 0
+
+
+async def test_tenants_expire_and_bookings_apply_at_once():
+    clock = Clock()
+    slots = _slots()
+    index = _index({TENANT: slots}, timer=clock)
+    await index.load(TENANT)
+
+    booked = AppointmentBooked(
+        appointment_id="appointment-1",
+        slot_id=slots[0].id,
+        tenant_id=TENANT,
+        occurred_at=TODAY,
+        practitioner_id="prac-a",
+        slot_starts_at=slots[0].starts_at,
+        slot_mode=SlotMode.ONSITE,
+        slot_status=SlotStatus.CLOSED,
+    )
+    index.apply_booking(booked)
+    assert slots[0] not in index.lookup(_query(0, 1))
+
+    clock.now = 60
+    assert index.lookup(_query(0, 1)) is None
+    assert len(index) == 0
+
+
+class UnusedRepository:
+    def __getattr__(self, name):
+        raise AssertionError(f"The database was queried ({name})")
+
+
+async def test_handler_answers_from_a_warm_index():
+    index = _index({TENANT: _slots()})
+    await index.load(TENANT)
+    handler = FetchAvailabilitiesHandler(UnusedRepository(), index=index)
+
+    assert await handler.handle_rows(_query(0, 1)) == _expected(_slots(), _query(0, 1))
+
+
+def test_notifications_are_parsed():
+    payload = (
+        '{"tenant_id": "t", "slots": [["s", "2026-03-02T10:00:00+01:00", '
+        '"2026-03-02T10:30:00+01:00", "p", "tele", "closed"]]}'
+    )
+
+    assert parse_slot_change(payload) == (
+        "t",
+        [
+            IndexedSlot(
+                "s",
+                TODAY + timedelta(hours=9),
+                TODAY + timedelta(hours=9, minutes=30),
+                "p",
+                "tele",
+                "closed",
+            )
+        ],
+    )
+    assert parse_slot_change('{"tenant_id": "t", "reload": true}') == ("t", None)
+
+
+async def _eventually(condition) -> None:
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.05)
+    assert condition()
+
+
+async def test_slot_changes_are_notified(scheduling_db):
+    async def fetch(tenant_id, starts_from, starts_before):
+        async with db.tenant_session(tenant_id) as session:
+            return await SchedulingRepository(session).list_availability_rows_starting(
+                tenant_id, starts_from, starts_before, None, None
+            )
+
+    index = SlotIndex(
+        max_rows=1_000, horizon_days=30, ttl_seconds=60, fetch=fetch, now=lambda: TODAY
+    )
+    async with db.tenant_session(TENANT) as session:
+        session.add(CalendarDB(id="cal-a", tenant_id=TENANT, practitioner_id="prac-a"))
+        await session.flush()
+        session.add_all(
+            SlotDB(
+                id=f"slot-{hour}",
+                tenant_id=TENANT,
+                calendar_id="cal-a",
+                starts_at=TODAY + timedelta(hours=hour),
+                ends_at=TODAY + timedelta(hours=hour, minutes=30),
+                capacity=1,
+                mode=SlotMode.ONSITE,
+                status=SlotStatus.OPEN,
+            )
+            for hour in range(8, 12)
+        )
+        await session.commit()
+    assert await index.load(TENANT)
+
+    dsn = make_url(str(scheduling_db.url)).set(drivername="postgresql")
+    listener = SlotChangeListener(
+        dsn.render_as_string(hide_password=False),
+        on_change=lambda payload: index.apply(parse_slot_change(payload)),
+        on_reconnect=index.clear,
+    )
+    await listener.start()
+    try:
+        await asyncio.wait_for(listener.listening.wait(), 5)
+        async with db.tenant_session(TENANT) as session:
+            await session.execute(
+                update(SlotDB).where(SlotDB.id == "slot-8").values(status=SlotStatus.CLOSED)
+            )
+            await session.execute(
+                update(SlotDB)
+                .where(SlotDB.id == "slot-9")
+                .values(starts_at=TODAY + timedelta(hours=14), ends_at=TODAY + timedelta(hours=15))
+            )
+            await session.commit()
+
+        query = FetchAvailabilitiesQuery(
+            tenant_id=TENANT, starts_at=TODAY, ends_at=TODAY + timedelta(days=1)
+        )
+        await _eventually(
+            lambda: [slot.id for slot in index.lookup(query)] == ["slot-10", "slot-11", "slot-9"]
+        )
+        async with db.tenant_session(TENANT, read_only=True) as session:
+            rows = await SchedulingRepository(session).list_availability_rows(
+                TENANT, query.starts_at, query.ends_at, None, None
+            )
+        assert index.lookup(query) == [tuple(row) for row in rows]
+
+        async with db.tenant_session(TENANT) as session:
+            await session.execute(delete(SlotDB).where(SlotDB.id == "slot-10"))
+            await session.commit()
+        await _eventually(lambda: len(index) == 0)
+    finally:
+        await listener.stop()
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import random
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from src.core import db
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class FakeRecord:
+    def __init__(self) -> None:
+        self.info: dict = {}
+
+
+class FakeDBAPIConnection:
+    def __init__(self, fail: bool = False) -> None:
+        self.statements: list[tuple] = []
+        self.fail = fail
+
+    def run_async(self, fn):
+        if self.fail:
+            raise ConnectionError("lost")
+        self.statements.append(fn)
+
+
+def _checkout(connection: FakeDBAPIConnection, record: FakeRecord, tenant: str | None) -> None:
+    token = db._current_tenant.set(tenant)
+    try:
+        db._scope_connection_to_tenant(connection, record, None)
+    finally:
+        db._current_tenant.reset(token)
+
+
+def test_tenant_is_only_set_when_the_connection_holds_another_one():
+    connection, record = FakeDBAPIConnection(), FakeRecord()
+
+    _checkout(connection, record, None)  # fresh connection, no tenant wanted
+    _checkout(connection, record, "tenant-1")
+    _checkout(connection, record, "tenant-1")
+    _checkout(connection, record, "tenant-2")
+    _checkout(connection, record, None)
+    _checkout(connection, record, None)
+
+    assert len(connection.statements) == 3
+    assert record.info[db._CONNECTION_TENANT] is None
+
+
+def test_failed_change_forces_a_reset_on_next_checkout():
+    record = FakeRecord()
+    _checkout(FakeDBAPIConnection(), record, "tenant-1")
+
+    with pytest.raises(ConnectionError):
+        _checkout(FakeDBAPIConnection(fail=True), record, "tenant-2")
+
+    connection = FakeDBAPIConnection()
+    _checkout(connection, record, None)
+    assert len(connection.statements) == 1
+    assert db._tenant_change(db._UNKNOWN_TENANT, None) == ("RESET app.tenant_id", ())
+
+
+@pytest.fixture
+async def database(monkeypatch):
+    from src.core.settings import Settings
+
+    monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL)
+    await db.dispose_engine()
+    db.get_engine(Settings())
+    yield
+    await db.dispose_engine()
+
+
+async def _current_setting(session) -> str | None:
+    result = await session.execute(text("SELECT current_setting('app.tenant_id', true)"))
+    return result.scalar_one() or None
+
+
+@pytest.mark.skipif(
+    TEST_DATABASE_URL is None, reason="Requires TEST_DATABASE_URL pointing to PostgreSQL"
+)
+async def test_tenant_never_leaks_between_pooled_connections(database):
+    rng = random.Random(7)
+
+    async def request(tenant: str | None) -> None:
+        await asyncio.sleep(rng.random() / 100)
+        if tenant is None:
+            async with db.get_session_factory()() as session:
+                assert await _current_setting(session) is None
+            return
+        async with db.tenant_session(tenant) as session:
+            assert await _current_setting(session) == tenant
+            if rng.random() < 0.3:
+                # A failed transaction must not undo the tenant recorded on the connection.
+                with pytest.raises(DBAPIError):
+                    await session.execute(text("SELECT 1/0"))
+                await session.rollback()
+                assert await _current_setting(session) == tenant
+            else:
+                await session.commit()
+
+    tenants = ["tenant-1", "tenant-2", "tenant-3", None]
+    for _ in range(5):
+        await asyncio.gather(*(request(rng.choice(tenants)) for _ in range(40)))
+
+
+@pytest.mark.skipif(
+    TEST_DATABASE_URL is None, reason="Requires TEST_DATABASE_URL pointing to PostgreSQL"
+)
+async def test_same_tenant_reuses_connection_without_round_trip(database, monkeypatch):
+    changes = []
+    tenant_change = db._tenant_change
+
+    def recording_change(current, desired):
+        change = tenant_change(current, desired)
+        if change is not None:
+            changes.append(desired)
+        return change
+
+    monkeypatch.setattr(db, "_tenant_change", recording_change)
+
+    for _ in range(3):
+        async with db.tenant_session("tenant-1") as session:
+            assert await _current_setting(session) == "tenant-1"
+    async with db.get_session_factory()() as session:
+        assert await _current_setting(session) is None
+
+    assert changes == ["tenant-1", None]
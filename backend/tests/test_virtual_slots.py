@@ -0,0 +1,177 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import NoResultFound
+
+from src.core import db
+from src.features.scheduling.domain.value_objects import SlotMode, SlotStatus
+from src.features.scheduling.infra.models import CalendarDB, SlotDB
+from src.features.scheduling.infra.repositories import SchedulingRepository, SlotNotAvailableError
+
+TENANT = "tenant-1"
+# Paris moves to summer time on Sunday 2026-03-29.
+STARTS_AT = datetime(2026, 3, 23, tzinfo=timezone.utc)
+ENDS_AT = datetime(2026, 4, 4, tzinfo=timezone.utc)
+MORNINGS = {
+    "weekdays": [1, 2, 3, 4, 5],
+    "start_time": time(8),
+    "end_time": time(12),
+    "slot_minutes": 20,
+    "mode": SlotMode.ONSITE,
+    "timezone": "Europe/Paris",
+    "valid_from": date(2026, 1, 1),
+    "valid_until": None,
+    "capacity": 1,
+}
+# Early teleconsultations in Tokyo: they start the evening before, in UTC.
+EVENINGS = MORNINGS | {
+    "weekdays": [2, 4],
+    "start_time": time(7),
+    "end_time": time(10),
+    "slot_minutes": 30,
+    "mode": SlotMode.TELE,
+    "timezone": "Asia/Tokyo",
+    "capacity": 2,
+}
+FILTERS = [
+    {"practitioner_id": None, "mode": None},
+    {"practitioner_id": "prac-a", "mode": None},
+    {"practitioner_id": None, "mode": SlotMode.TELE},
+]
+
+
+@pytest.fixture
+async def templates(scheduling_db):
+    async with db.tenant_session(TENANT) as session:
+        session.add_all(
+            [
+                CalendarDB(id="cal-a", tenant_id=TENANT, practitioner_id="prac-a"),
+                CalendarDB(id="cal-b", tenant_id=TENANT, practitioner_id="prac-b"),
+            ]
+        )
+        await session.flush()
+        repository = SchedulingRepository(session)
+        await repository.create_schedule_template(TENANT, "cal-a", **MORNINGS)
+        # Shares its Monday starts with the mornings of cal-a.
+        await repository.create_schedule_template(
+            TENANT, "cal-a", **MORNINGS | {"weekdays": [1], "slot_minutes": 60}
+        )
+        await repository.create_schedule_template(TENANT, "cal-b", **EVENINGS)
+        session.add_all(
+            [
+                # A slot added by hand and a template slot closed by hand.
+                _slot("manual", "cal-b", datetime(2026, 3, 24, 15, tzinfo=timezone.utc)),
+                _slot(
+                    "closed",
+                    "cal-a",
+                    datetime(2026, 3, 24, 7, 20, tzinfo=timezone.utc),
+                    SlotStatus.CLOSED,
+                ),
+            ]
+        )
+        await session.commit()
+    return scheduling_db
+
+
+def _slot(slot_id: str, calendar: str, starts_at: datetime, status=SlotStatus.OPEN) -> SlotDB:
+    return SlotDB(
+        id=slot_id,
+        tenant_id=TENANT,
+        calendar_id=calendar,
+        starts_at=starts_at,
+        ends_at=starts_at + timedelta(minutes=45),
+        capacity=1,
+        mode=SlotMode.TELE,
+        status=status,
+    )
+
+
+async def _availabilities(virtual_slots: bool) -> list:
+    """Everything the availability endpoints can read, in one comparable list."""
+    results = []
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        repository = SchedulingRepository(session, virtual_slots=virtual_slots)
+        for filters in FILTERS:
+            slots = await repository.list_availabilities(TENANT, STARTS_AT, ENDS_AT, **filters)
+            cursor = slots[10]
+            page = await repository.list_availabilities(
+                TENANT,
+                STARTS_AT,
+                ENDS_AT,
+                **filters,
+                after=(cursor.starts_at, cursor.id),
+                limit=5,
+            )
+            rows = await repository.list_availability_rows(TENANT, STARTS_AT, ENDS_AT, **filters)
+            starting = await repository.list_availability_rows_starting(
+                TENANT, STARTS_AT, STARTS_AT + timedelta(days=2), **filters
+            )
+            summary = await repository.availability_summary(
+                TENANT, STARTS_AT.date(), ENDS_AT.date(), **filters
+            )
+            first = await repository.list_next_availability_rows(
+                TENANT, STARTS_AT, **filters, limit=5, per_practitioner=True
+            )
+            results.append((slots, page, [tuple(row) for row in rows], starting, summary, first))
+    return results
+
+
+async def _book(slot_id: str):
+    async with db.tenant_session(TENANT) as session:
+        repository = SchedulingRepository(session, virtual_slots=True)
+        booked = await repository.create_appointment(TENANT, slot_id, "patient-1", None, None)
+        await session.commit()
+    return booked
+
+
+async def test_virtual_slots_match_generated_slots(templates):
+    virtual = await _availabilities(virtual_slots=True)
+    (slots, *_), *_ = virtual
+    # Mornings (less the closed one), evenings with capacity 2 and the manual slot.
+    assert len(slots) == 10 * 12 - 1 + 4 * 6 + 1
+    assert {slot.capacity for slot in slots} == {1, 2}
+
+    # Booking a virtual slot writes it; the rest stays virtual.
+    _, booked = await _book(slots[0].id)
+    assert booked.id == slots[0].id
+    assert booked.status == SlotStatus.CLOSED
+    virtual = await _availabilities(virtual_slots=True)
+    assert slots[0] not in virtual[0][0]
+
+    async with db.tenant_session(TENANT) as session:
+        await SchedulingRepository(session).generate_slots(
+            TENANT, STARTS_AT.date() - timedelta(days=1), ENDS_AT.date() + timedelta(days=1)
+        )
+        await session.commit()
+
+    assert await _availabilities(virtual_slots=False) == virtual
+    # Once generated, the rows replace the virtual slots one for one.
+    assert await _availabilities(virtual_slots=True) == virtual
+
+
+async def test_booking_virtual_slots(templates):
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        repository = SchedulingRepository(session, virtual_slots=True)
+        slots = await repository.list_availabilities(
+            TENANT, STARTS_AT, ENDS_AT, None, SlotMode.TELE
+        )
+    evening = next(slot for slot in slots if slot.capacity == 2)
+
+    # Capacity is checked once the slot is stored, as for any slot.
+    _, first = await _book(evening.id)
+    _, second = await _book(evening.id)
+    assert (first.status, second.status) == (SlotStatus.OPEN, SlotStatus.CLOSED)
+    with pytest.raises(SlotNotAvailableError):
+        await _book(evening.id)
+
+    # Ids no template defines and malformed ids are not found; closed rows win over templates.
+    for slot_id in (evening.id[:8] + "-0000-0000-0000-000000000000", "not-a-slot"):
+        with pytest.raises(NoResultFound):
+            await _book(slot_id)
+    with pytest.raises(SlotNotAvailableError):
+        await _book("closed")
+
+    async with db.tenant_session(TENANT, read_only=True) as session:
+        stored = await session.scalar(select(SlotDB).where(SlotDB.id == evening.id))
+    assert (stored.starts_at, stored.capacity) == (evening.starts_at, 2)
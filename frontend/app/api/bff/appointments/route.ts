@@ -2,6 +2,7 @@ import { getServerSession } from "next-auth";
 import { getToken } from "next-auth/jwt";
 import { NextRequest, NextResponse } from "next/server";
 import { authOptions } from "@/lib/auth";
+import { readPrimarySetCookie } from "@/lib/readPrimary";
 
 export async function POST(request: NextRequest) {
   const session = await getServerSession(authOptions);
@@ -23,12 +24,19 @@ export async function POST(request: NextRequest) {
   }
 
   const payload = await request.json();
+  const headers: Record<string, string> = {
+    "Content-Type": "application/json",
+    Authorization: `Bearer ${accessToken}`,
+  };
+  // Retries carrying the same key get the first booking back instead of a second one.
+  const idempotencyKey = request.headers.get("Idempotency-Key");
+  if (idempotencyKey) {
+    headers["Idempotency-Key"] = idempotencyKey;
+  }
+
   const response = await fetch(`${process.env.API_BASE}/commands/scheduling/appointments`, {
     method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-      Authorization: `Bearer ${accessToken}`,
-    },
+    headers,
     body: JSON.stringify(payload),
   });
 
@@ -39,5 +47,15 @@ export async function POST(request: NextRequest) {
     data = { error: "Invalid response from API" };
   }
 
-  return NextResponse.json(data, { status: response.status });
+  const responseHeaders: Record<string, string> = {};
+  const replayed = response.headers.get("Idempotent-Replayed");
+  if (replayed) {
+    responseHeaders["Idempotent-Replayed"] = replayed;
+  }
+  // Keeps the next reads of the user on the primary database, whichever worker serves them.
+  const readPrimary = readPrimarySetCookie(response);
+  if (readPrimary) {
+    responseHeaders["Set-Cookie"] = readPrimary;
+  }
+  return NextResponse.json(data, { status: response.status, headers: responseHeaders });
 }
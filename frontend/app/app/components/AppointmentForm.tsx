@@ -1,6 +1,6 @@
 "use client";
 
-import { useState } from "react";
+import { useRef, useState } from "react";
 import { Button } from "@/components/ui/button";
 
 interface Props {
@@ -14,6 +14,8 @@ export function AppointmentForm({ defaultMode = "onsite" }: Props) {
   const [loading, setLoading] = useState(false);
   const [message, setMessage] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
+  // Submitting the same booking again (after a timeout, say) reuses its Idempotency-Key.
+  const attempt = useRef<{ body: string; key: string } | null>(null);
 
   const handleSubmit = async (event: React.FormEvent<HTMLFormElement>) => {
     event.preventDefault();
@@ -21,13 +23,18 @@ export function AppointmentForm({ defaultMode = "onsite" }: Props) {
     setMessage(null);
     setError(null);
 
+    const body = JSON.stringify({ slot_id: slotId, patient_id: patientId, mode: mode || undefined });
+    const key = attempt.current?.body === body ? attempt.current.key : crypto.randomUUID();
+    attempt.current = { body, key };
+
     try {
       const response = await fetch("/api/bff/appointments", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          "Idempotency-Key": key,
         },
-        body: JSON.stringify({ slot_id: slotId, patient_id: patientId, mode: mode || undefined }),
+        body,
       });
 
       const data = await response.json();
@@ -36,6 +43,7 @@ export function AppointmentForm({ defaultMode = "onsite" }: Props) {
         setError(typeof data?.error === "string" ? data.error : "Impossible de créer le rendez-vous");
       } else {
         setMessage("Rendez-vous créé ! ID: " + (data.appointment_id ?? "?"));
+        attempt.current = null;
         setSlotId("");
         setPatientId("");
       }
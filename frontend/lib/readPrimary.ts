@@ -0,0 +1,17 @@
+import type { NextRequest } from "next/server";
+
+// Backend cookie keeping the reads of a user on the primary database for a few seconds
+// after a booking. It is signed for the user, so the BFF only carries it around.
+export const READ_PRIMARY_COOKIE = "read_primary_until";
+
+/** `Set-Cookie` of a backend response to pass back to the browser, if it pins reads. */
+export function readPrimarySetCookie(response: Response): string | null {
+  const cookie = response.headers.get("set-cookie");
+  return cookie?.startsWith(`${READ_PRIMARY_COOKIE}=`) ? cookie : null;
+}
+
+/** `Cookie` header forwarding the pin of the browser to the backend, for BFF reads. */
+export function readPrimaryCookieHeader(request: NextRequest): string | null {
+  const pin = request.cookies.get(READ_PRIMARY_COOKIE);
+  return pin ? `${READ_PRIMARY_COOKIE}=${pin.value}` : null;
+}